@@ -0,0 +1,367 @@
+"""
+Offline replay of the stored trade history through the bot's decision flow.
+
+Trades from the trade store are streamed in block order into a `RollingMetricsEngine`. Every
+`TRADING_BLOCK_COOLDOWN` blocks the replay selects a sell token, builds the trading context,
+judges the previous decision and asks a pluggable agent for a new one, all with the same
+helpers the bot uses. Balances are simulated, and orders fill at the price of the next trade on
+the pair within `--fill-blocks`. Run from the cow-trader directory:
+
+    SILVERBACK_NETWORK_CHOICE=ethereum:local:test python -m backtest --agent rules
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List
+
+import click
+import numpy as np
+import pandas as pd
+
+from bot import (
+    DECISIONS_DTYPE,
+    LOOKBACK_BLOCKS,
+    TOKEN_UNIVERSE,
+    TRADING_BLOCK_COOLDOWN,
+    AgentDependencies,
+    AgentResponse,
+    RollingMetricsEngine,
+    _build_decision,
+    _create_trade_context,
+    _decision_outcome,
+    _decision_record,
+    _get_canonical_pair,
+    _get_storage,
+    _load_trades_db,
+    _migrate_trade_store,
+    _run_agent,
+    _select_sell_token,
+    _validate_decision,
+    trading_agent,
+)
+
+FILL_BLOCKS = 240
+
+
+class RuleAgent:
+    """
+    Deterministic stand-in for the LLM agent.
+    Buys the token that has gained most often against the sell token over the lookback window,
+    if it did so in at least `threshold` of the pair's price moves.
+    """
+
+    def __init__(self, threshold: float = 0.6):
+        self.threshold = threshold
+
+    def decide(self, deps: AgentDependencies) -> AgentResponse:
+        best_token, best_score = None, 0.0
+        for m in deps.trade_ctx.metrics:
+            if deps.sell_token not in (m.token_a, m.token_b):
+                continue
+            # up moves are moves of token_a's price in token_b
+            if m.token_b == deps.sell_token:
+                candidate, score = m.token_a, m.up_moves_ratio
+            else:
+                candidate, score = m.token_b, 1 - m.up_moves_ratio
+            if score > best_score:
+                best_token, best_score = candidate, score
+
+        if best_token is None or best_score < self.threshold:
+            return AgentResponse(
+                should_trade=False, reasoning=f"No token gained in {self.threshold:.0%} of moves"
+            )
+        return AgentResponse(
+            should_trade=True,
+            buy_token=best_token,
+            reasoning=f"{best_token} gained in {best_score:.0%} of moves",
+        )
+
+
+class RecordedAgent:
+    """Replays the decisions (and reasoning) the bot recorded, keyed by block"""
+
+    def __init__(self, decisions: pd.DataFrame, reasoning: List[Dict]):
+        reasoning_by_block = {entry["block_number"]: entry["reasoning"] for entry in reasoning}
+        self.responses = {
+            int(d["block_number"]): AgentResponse(
+                should_trade=bool(d["should_trade"]),
+                buy_token=d["buy_token"] if isinstance(d["buy_token"], str) else None,
+                reasoning=reasoning_by_block.get(d["block_number"], ""),
+            )
+            for d in decisions.to_dict("records")
+        }
+
+    @classmethod
+    def from_storage(cls) -> "RecordedAgent":
+        storage = _get_storage()
+        return cls(storage.load_decisions(), storage.load_reasoning())
+
+    @property
+    def decision_blocks(self) -> List[int]:
+        return sorted(self.responses)
+
+    def decide(self, deps: AgentDependencies) -> AgentResponse:
+        response = self.responses.get(deps.block_number)
+        if response is None:
+            return AgentResponse(should_trade=False, reasoning="No recorded decision")
+        return response
+
+
+class LLMAgent:
+    """The bot's trading agent, run with its usual deadline"""
+
+    def decide(self, deps: AgentDependencies) -> AgentResponse:
+        response, _ = asyncio.run(_run_agent(trading_agent, deps))
+        return response
+
+
+@dataclass
+class ReplayResult:
+    start_block: int
+    stop_block: int
+    blocks: int = 0
+    trades: int = 0
+    decisions: int = 0
+    trade_signals: int = 0
+    fills: int = 0
+    expired: int = 0
+    profitable: int = 0
+    unprofitable: int = 0
+    seconds: float = 0.0
+    blocks_per_second: float = 0.0
+    decisions_per_second: float = 0.0
+    trades_per_second: float = 0.0
+    final_balances: Dict[str, int] = field(default_factory=dict)
+
+
+class _PairPrices:
+    """Block-sorted prices per canonical pair, for looking up the next trade after a block"""
+
+    def __init__(self, trades: pd.DataFrame):
+        self.pairs = {
+            pair: (group.block_number.to_numpy(), group.price.to_numpy())
+            for pair, group in trades.groupby(["token_a", "token_b"], sort=False, observed=True)
+        }
+
+    def next_trade(self, pair: tuple[str, str], after_block: int, stop_block: int):
+        """Return (block, price) of the pair's first trade in (after_block, stop_block]"""
+        if pair not in self.pairs:
+            return None
+        blocks, prices = self.pairs[pair]
+        i = np.searchsorted(blocks, after_block, side="right")
+        if i == len(blocks) or blocks[i] > stop_block:
+            return None
+        return int(blocks[i]), float(prices[i])
+
+
+def _simulate_fill(
+    prices: _PairPrices,
+    sell_token: str,
+    buy_token: str,
+    sell_amount: int,
+    block_number: int,
+    fill_blocks: int,
+) -> Dict:
+    """Fill the whole sell amount at the next trade price on the pair, or expire"""
+    token_a, token_b = _get_canonical_pair(sell_token, buy_token)
+    trade = prices.next_trade((token_a, token_b), block_number, block_number + fill_blocks)
+    if trade is None:
+        return {"status": "expired", "executedSellAmount": "0", "executedBuyAmount": "0"}
+
+    _, price = trade
+    buy_amount = sell_amount * price if sell_token == token_a else sell_amount / price
+    return {
+        "status": "fulfilled",
+        "executedSellAmount": str(sell_amount),
+        "executedBuyAmount": str(int(buy_amount)),
+    }
+
+
+def replay(
+    trades: pd.DataFrame,
+    agent,
+    balances: Dict[str, int],
+    start_block: int | None = None,
+    stop_block: int | None = None,
+    decision_blocks: List[int] | None = None,
+    cooldown_blocks: int = TRADING_BLOCK_COOLDOWN,
+    lookback_blocks: int = LOOKBACK_BLOCKS,
+    fill_blocks: int = FILL_BLOCKS,
+) -> ReplayResult:
+    """
+    Replay `trades` (trade store schema) through the decision flow with `agent`, any object
+    with a `decide(deps) -> AgentResponse` method. Decisions are made every `cooldown_blocks`
+    from `start_block`, or at `decision_blocks` when given.
+    """
+    trades = trades.sort_values("block_number", kind="stable").reset_index(drop=True)
+    start_block = int(trades.block_number.min()) if start_block is None else start_block
+    stop_block = int(trades.block_number.max()) if stop_block is None else stop_block
+    trades = trades[trades.block_number <= stop_block]
+
+    if decision_blocks is None:
+        decision_blocks = range(start_block, stop_block + 1, cooldown_blocks)
+    decision_blocks = [b for b in decision_blocks if start_block <= b <= stop_block]
+
+    result = ReplayResult(start_block=start_block, stop_block=stop_block)
+    balances = dict(balances)
+    engine = RollingMetricsEngine(lookback_blocks)
+    prices = _PairPrices(trades)
+    records = trades.to_dict("records")
+    trade_blocks = trades.block_number.to_numpy()
+    decisions: List[Dict] = []
+    orders: Dict[int, Dict] = {}
+    ingested = 0
+    last_block = stop_block
+    started = time.perf_counter()
+
+    for block_number in decision_blocks:
+        end = int(np.searchsorted(trade_blocks, block_number, side="right"))
+        engine.update(records[ingested:end])
+        ingested = end
+
+        sell_token = _select_sell_token(balances=balances)
+        if sell_token is None:
+            click.echo(f"[{block_number}] No eligible sell tokens, stopping")
+            last_block = block_number
+            break
+
+        trade_ctx = _create_trade_context(
+            trades_df=trades.iloc[:0],
+            decisions_df=pd.DataFrame(decisions[-3:], columns=list(DECISIONS_DTYPE)),
+            lookback_blocks=lookback_blocks,
+            metrics_engine=engine,
+            token_balances=balances,
+        )
+
+        if decisions and decisions[-1]["should_trade"] and decisions[-1]["profitable"] == 2:
+            latest = decisions[-1]
+            final_price = next(
+                (
+                    m.last_price
+                    for m in trade_ctx.metrics
+                    if m.token_a == latest["sell_token"] and m.token_b == latest["buy_token"]
+                ),
+                None,
+            )
+            profitable = _decision_outcome(latest, final_price, orders.get(latest["block_number"]))
+            if profitable is not None:
+                latest["profitable"] = profitable
+                result.profitable += profitable
+                result.unprofitable += 1 - profitable
+
+        deps = AgentDependencies(
+            trade_ctx=trade_ctx, sell_token=sell_token, block_number=block_number
+        )
+        response = agent.decide(deps)
+        decision = _build_decision(
+            block_number=block_number,
+            response=response,
+            metrics=trade_ctx.metrics,
+            sell_token=sell_token,
+        )
+        decision.valid = _validate_decision(decision)
+        decisions.append(_decision_record(decision))
+        result.decisions += 1
+
+        if decision.valid and decision.should_trade:
+            result.trade_signals += 1
+            order = _simulate_fill(
+                prices,
+                decision.sell_token,
+                decision.buy_token,
+                balances[decision.sell_token],
+                block_number,
+                fill_blocks,
+            )
+            orders[block_number] = order
+            if order["status"] == "fulfilled":
+                result.fills += 1
+                balances[decision.sell_token] -= int(order["executedSellAmount"])
+                balances[decision.buy_token] += int(order["executedBuyAmount"])
+            else:
+                result.expired += 1
+
+    if last_block == stop_block:
+        engine.update(records[ingested:])
+        ingested = len(records)
+
+    elapsed = time.perf_counter() - started
+    result.seconds = round(elapsed, 3)
+    result.blocks = last_block - start_block + 1
+    result.trades = ingested
+    result.blocks_per_second = round((stop_block - start_block + 1) / elapsed)
+    result.decisions_per_second = round(result.decisions / elapsed)
+    result.trades_per_second = round(ingested / elapsed)
+    result.final_balances = balances
+    return result
+
+
+@click.command()
+@click.option(
+    "--agent", "agent_name", type=click.Choice(["rules", "recorded", "llm"]), default="rules"
+)
+@click.option("--start-block", type=int, help="First block to replay (default: first stored trade)")
+@click.option("--stop-block", type=int, help="Last block to replay (default: last stored trade)")
+@click.option("--balances", help="Initial balances as JSON {token: amount}")
+@click.option("--fill-blocks", default=FILL_BLOCKS, help="Blocks an order may wait for a fill")
+@click.option("--output", type=click.Path(), help="Write the result as JSON")
+def main(
+    agent_name: str,
+    start_block: int | None,
+    stop_block: int | None,
+    balances: str | None,
+    fill_blocks: int,
+    output: str | None,
+):
+    _migrate_trade_store()
+    # Load one lookback window ahead of the start so the first decision sees full metrics
+    trades = _load_trades_db(None if start_block is None else start_block - LOOKBACK_BLOCKS)
+    if trades.empty:
+        raise click.ClickException("Trade store is empty")
+
+    decision_blocks = None
+    if agent_name == "rules":
+        agent = RuleAgent()
+    elif agent_name == "recorded":
+        agent = RecordedAgent.from_storage()
+        decision_blocks = agent.decision_blocks
+    else:
+        agent = LLMAgent()
+
+    if balances is None:
+        TOKEN_UNIVERSE.load()
+        initial_balances = {
+            token: int(10 * TOKEN_UNIVERSE.minimum_balances[token])
+            for token in TOKEN_UNIVERSE.tokens
+        }
+    else:
+        initial_balances = {token: int(amount) for token, amount in json.loads(balances).items()}
+
+    result = replay(
+        trades,
+        agent,
+        initial_balances,
+        start_block=start_block,
+        stop_block=stop_block,
+        decision_blocks=decision_blocks,
+        fill_blocks=fill_blocks,
+    )
+    click.echo(
+        f"blocks={result.start_block}-{result.start_block + result.blocks - 1} "
+        f"trades={result.trades} "
+        f"decisions={result.decisions} signals={result.trade_signals} fills={result.fills} "
+        f"profitable={result.profitable}/{result.profitable + result.unprofitable} "
+        f"in {result.seconds}s "
+        f"({result.blocks_per_second} blocks/s, {result.decisions_per_second} decisions/s, "
+        f"{result.trades_per_second} trades/s)"
+    )
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(asdict(result), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
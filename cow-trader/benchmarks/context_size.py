@@ -0,0 +1,97 @@
+"""
+Size of the trading context handed to the agent, before and after the compact encoding.
+
+Builds a fixed fixture (synthetic trades, three prior decisions with metrics snapshots) and
+reports the serialized size of `TradeContext` against `_encode_trade_context`. Token counts are
+estimated at ~4 bytes per token. Run from the cow-trader directory:
+
+    SILVERBACK_NETWORK_CHOICE=ethereum:local:test python -m benchmarks.context_size
+"""
+
+import json
+from typing import Dict
+
+import click
+import pandas as pd
+from pydantic_core import to_json
+
+from benchmarks.synthetic import generate_trades, token_addresses
+from bot import MONITORED_TOKENS, TradeContext, _compute_metrics, _encode_trade_context
+
+BYTES_PER_TOKEN = 4
+LOOKBACK_BLOCKS = 15000
+DECISION_INTERVAL_BLOCKS = 360
+
+
+def build_fixture(n_tokens: int, n_trades: int = 20000, n_decisions: int = 3) -> TradeContext:
+    """Trading context over synthetic trades, using the monitored tokens first"""
+    trades = generate_trades(n_trades, n_tokens, trades_per_block=1)
+
+    monitored = sorted(MONITORED_TOKENS, key=str.lower)
+    addresses = dict(zip(token_addresses(n_tokens), monitored + token_addresses(n_tokens)[3:]))
+    for column in ("sellToken", "buyToken", "token_a", "token_b"):
+        trades[column] = trades[column].map(addresses)
+
+    latest_block = int(trades.block_number.max())
+    decisions = []
+    for i in range(n_decisions, 0, -1):
+        block_number = latest_block - i * DECISION_INTERVAL_BLOCKS
+        snapshot = _compute_metrics(trades[trades.block_number <= block_number], LOOKBACK_BLOCKS)
+        decisions.append(
+            {
+                "block_number": block_number,
+                "should_trade": i % 2 == 0,
+                "sell_token": monitored[0] if i % 2 == 0 else None,
+                "buy_token": monitored[1] if i % 2 == 0 else None,
+                "metrics_snapshot": [m.model_dump() for m in snapshot],
+                "profitable": 2,
+                "valid": i % 2 == 0,
+            }
+        )
+
+    balances = {token: 10**18 * (i + 1) for i, token in enumerate(monitored)}
+    return TradeContext(
+        token_balances=balances,
+        metrics=_compute_metrics(trades, LOOKBACK_BLOCKS),
+        prior_decisions=pd.DataFrame(decisions).to_dict("records"),
+        lookback_blocks=LOOKBACK_BLOCKS,
+    )
+
+
+def run_case(n_tokens: int) -> Dict:
+    trade_ctx = build_fixture(n_tokens)
+    before = len(to_json(trade_ctx))
+    after = len(to_json(_encode_trade_context(trade_ctx)))
+    return {
+        "tokens": n_tokens,
+        "pairs": len(trade_ctx.metrics),
+        "before_bytes": before,
+        "after_bytes": after,
+        "before_est_tokens": before // BYTES_PER_TOKEN,
+        "after_est_tokens": after // BYTES_PER_TOKEN,
+        "reduction": round(1 - after / before, 3),
+    }
+
+
+@click.command()
+@click.option("--tokens", default="3,10,20", help="Comma separated token counts")
+@click.option("--output", type=click.Path(), help="Write results as JSON")
+def main(tokens: str, output: str | None):
+    results = []
+    for n_tokens in [int(t) for t in tokens.split(",")]:
+        result = run_case(n_tokens)
+        click.echo(
+            f"tokens={result['tokens']:>3} pairs={result['pairs']:>4} "
+            f"before={result['before_bytes']:>7}B (~{result['before_est_tokens']} tokens) "
+            f"after={result['after_bytes']:>7}B (~{result['after_est_tokens']} tokens) "
+            f"reduction={result['reduction']:.1%}"
+        )
+        results.append(result)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
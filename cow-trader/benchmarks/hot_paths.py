@@ -0,0 +1,265 @@
+"""
+Microbenchmarks for the ingestion, metrics and storage hot paths of the decision block.
+
+Each case runs on synthetic GPv2 trades at several history sizes, repeated `--repeat` times,
+and records the best and median wall time. Storage cases run in a scratch directory. Results
+are written as JSON together with the commit they were measured on, and `--compare` flags
+cases that slowed down against an earlier results file. Run from the cow-trader directory:
+
+    SILVERBACK_NETWORK_CHOICE=ethereum:local:test python -m benchmarks.hot_paths \\
+        --output hot_paths.json --compare baseline.json
+"""
+
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import click
+import pandas as pd
+
+import bot
+from benchmarks.synthetic import (
+    decode_trade_logs,
+    generate_trade_logs,
+    generate_trades,
+    token_addresses,
+)
+
+UNMONITORED_TOKENS = token_addresses(2)
+
+
+def _time(fn: Callable, repeat: int, setup: Callable | None = None) -> Dict:
+    """Best and median seconds of `fn` over `repeat` runs, passing it the untimed `setup()`"""
+    timings = []
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return {"min_s": round(min(timings), 6), "median_s": round(statistics.median(timings), 6)}
+
+
+def _monitored_trades(n_trades: int, trades_per_block: int) -> pd.DataFrame:
+    """Synthetic trade store rows between the monitored tokens"""
+    trades = generate_trades(n_trades, len(bot.MONITORED_TOKENS), trades_per_block)
+    tokens = dict(zip(token_addresses(3), sorted(bot.MONITORED_TOKENS, key=str.lower)))
+    for column in ("sellToken", "buyToken", "token_a", "token_b"):
+        trades[column] = trades[column].map(tokens)
+    return trades
+
+
+def _decisions(n_decisions: int, metrics: List[bot.TradeMetrics]) -> pd.DataFrame:
+    snapshot = json.dumps([m.model_dump() for m in metrics])
+    return pd.DataFrame(
+        {
+            "block_number": range(
+                0, n_decisions * bot.TRADING_BLOCK_COOLDOWN, bot.TRADING_BLOCK_COOLDOWN
+            ),
+            "should_trade": False,
+            "sell_token": None,
+            "buy_token": None,
+            "metrics_snapshot": snapshot,
+            "profitable": 2,
+            "valid": False,
+            "cached": False,
+        }
+    ).astype({k: v for k, v in bot.DECISIONS_DTYPE.items() if k not in ("sell_token", "buy_token")})
+
+
+def _use_storage(backend: str, workdir: str) -> None:
+    """Point the storage backend and the trade store at a fresh scratch directory"""
+    bot.BLOCK_FILEPATH = os.path.join(workdir, "block.csv")
+    bot.ORDERS_FILEPATH = os.path.join(workdir, "orders.csv")
+    bot.DECISIONS_FILEPATH = os.path.join(workdir, "decisions.csv")
+    bot.REASONING_FILEPATH = os.path.join(workdir, "reasoning.csv")
+    bot.SQLITE_FILEPATH = os.path.join(workdir, "state.sqlite")
+    bot.TRADE_STORE_DIRPATH = os.path.join(workdir, "trades")
+    bot.STORAGE_BACKEND = backend
+    bot._get_storage.cache_clear()
+
+
+def run_cases(n_trades: int, trades_per_block: int, repeat: int, scratch: str) -> List[Dict]:
+    tokens = bot.MONITORED_TOKENS + UNMONITORED_TOKENS
+    raw_logs = generate_trade_logs(n_trades, tokens, trades_per_block)
+    decoded_logs = decode_trade_logs(raw_logs, tokens)
+    trades = _monitored_trades(n_trades, trades_per_block)
+    history_blocks = int(trades.block_number.max() - trades.block_number.min()) + 1
+    metrics = bot._compute_metrics(trades, bot.LOOKBACK_BLOCKS)
+    n_decisions = max(3, history_blocks // bot.TRADING_BLOCK_COOLDOWN)
+    decisions = _decisions(n_decisions, metrics)
+    balances = {token: 10**18 for token in bot.MONITORED_TOKENS}
+    records = trades.to_dict("records")
+
+    def process_trade_logs():
+        for log in decoded_logs:
+            if bot._is_monitored_trade(log):
+                bot._process_trade_log(log)
+
+    def filled_engine():
+        engine = bot.RollingMetricsEngine()
+        engine.update(records)
+        return engine
+
+    cases = {
+        "process_trade_log": _time(process_trade_logs, repeat),
+        "decode_trade_logs": _time(lambda: bot._decode_trade_logs(raw_logs), repeat),
+        "compute_metrics": _time(lambda: bot._compute_metrics(trades, bot.LOOKBACK_BLOCKS), repeat),
+        "metrics_engine_update": _time(
+            lambda engine: engine.update(records), repeat, bot.RollingMetricsEngine
+        ),
+    }
+
+    def create_trade_context(engine):
+        bot._create_trade_context(
+            trades_df=trades,
+            decisions_df=decisions,
+            metrics_engine=engine,
+            token_balances=balances,
+        )
+
+    cases["create_trade_context"] = _time(create_trade_context, repeat, filled_engine)
+
+    decision = bot.AgentDecision(
+        block_number=history_blocks, should_trade=False, metrics_snapshot=metrics
+    )
+    for backend in ("csv", "sqlite"):
+        _use_storage(backend, os.path.join(scratch, f"{n_trades}_{backend}"))
+        for row in decisions.to_dict("records"):
+            bot._get_storage().insert_decision(row)
+        cases[f"save_decision_{backend}"] = _time(lambda: bot._save_decision(decision), repeat)
+
+    _use_storage("sqlite", os.path.join(scratch, f"{n_trades}_trades"))
+    segment_blocks = max(1, history_blocks // 10)
+    segments = [
+        (
+            trades[trades.block_number.between(start, start + segment_blocks - 1)],
+            start,
+            start + segment_blocks - 1,
+        )
+        for start in range(1, history_blocks + 1, segment_blocks)
+    ]
+
+    def append_segments():
+        for segment, start, stop in segments:
+            bot._append_trades_segment(segment, start_block=start, stop_block=stop)
+
+    def clear_store():
+        shutil.rmtree(bot.TRADE_STORE_DIRPATH, ignore_errors=True)
+
+    cases["append_trades_segment"] = _time(lambda _: append_segments(), repeat, clear_store)
+    cases["load_trades_db"] = _time(bot._load_trades_db, repeat)
+    cases["load_lookback_trades"] = _time(bot._load_lookback_trades, repeat)
+
+    # Refreshing a worker's cache after one new segment should not depend on history size
+    cache = bot.TradeCache()
+    cache.refresh()
+    new_blocks = iter(range(history_blocks + 1, history_blocks + 1 + repeat))
+
+    def append_new_segment():
+        block_number = next(new_blocks)
+        bot._append_trades_segment(
+            trades.head(trades_per_block).assign(block_number=block_number),
+            start_block=block_number,
+            stop_block=block_number,
+        )
+        return cache
+
+    cases["trade_cache_refresh"] = _time(lambda c: c.refresh(), repeat, append_new_segment)
+
+    return [
+        {
+            "name": name,
+            "trades": n_trades,
+            "trades_per_block": trades_per_block,
+            "history_blocks": history_blocks,
+            "decisions": n_decisions,
+            **timing,
+        }
+        for name, timing in cases.items()
+    ]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _case_key(result: Dict) -> tuple:
+    return result["name"], result["trades"], result["trades_per_block"]
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> List[Dict]:
+    """Return cases whose median slowed down by more than `threshold` against the baseline"""
+    previous = {_case_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get(_case_key(result))
+        if before is None or before["median_s"] == 0:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        if ratio > 1 + threshold:
+            regressions.append(
+                {**result, "baseline_median_s": before["median_s"], "ratio": round(ratio, 2)}
+            )
+    return regressions
+
+
+@click.command()
+@click.option("--sizes", default="1000,100000,1000000", help="Comma separated trade counts")
+@click.option("--trades-per-block", default=1, help="Trades per synthetic block")
+@click.option("--repeat", default=5, help="Runs per case")
+@click.option("--output", type=click.Path(), help="Write results as JSON")
+@click.option(
+    "--compare", "baseline_path", type=click.Path(exists=True), help="Earlier results JSON"
+)
+@click.option("--threshold", default=0.2, help="Relative median slowdown flagged as a regression")
+def main(
+    sizes: str,
+    trades_per_block: int,
+    repeat: int,
+    output: str | None,
+    baseline_path: str | None,
+    threshold: float,
+):
+    commit = _git_commit()
+    results = []
+
+    with tempfile.TemporaryDirectory() as scratch:
+        for n_trades in [int(s) for s in sizes.split(",")]:
+            for result in run_cases(n_trades, trades_per_block, repeat, scratch):
+                click.echo(
+                    f"{result['name']:<24} trades={result['trades']:>8} "
+                    f"min={result['min_s'] * 1000:>10.3f}ms "
+                    f"median={result['median_s'] * 1000:>10.3f}ms"
+                )
+                results.append(result)
+
+    report = {"commit": commit, "python": platform.python_version(), "results": results}
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, threshold)
+        for r in regressions:
+            click.echo(
+                f"REGRESSION {r['name']} trades={r['trades']}: "
+                f"{r['baseline_median_s'] * 1000:.3f}ms -> {r['median_s'] * 1000:.3f}ms "
+                f"(x{r['ratio']}) vs {baseline.get('commit')}"
+            )
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Memory footprint of the in-memory trade history, string-typed schema against the typed schema.
+
+The string-typed schema is the one `_load_trades_db` used to return: token and owner addresses
+and amounts as Python strings. The typed schema uses categorical addresses and float64 amounts,
+with exact amounts left on disk. Sizes are `memory_usage(deep=True)`, which counts every string
+object as a load from the trade store creates it. Above `--string-sample` trades the string-typed
+size is extrapolated from the most recent trades, as its per-trade cost is constant and 10M
+string-typed trades need more than 6 GB. `_compute_metrics` only reads the lookback window, so
+it is timed on the same sample. Run from the cow-trader directory:
+
+    SILVERBACK_NETWORK_CHOICE=ethereum:local:test python -m benchmarks.memory
+"""
+
+import gc
+import json
+import time
+from typing import Dict
+
+import click
+import pandas as pd
+
+from benchmarks.synthetic import generate_trades
+from bot import LOOKBACK_BLOCKS, TRADES_DTYPE, _compute_metrics
+
+N_TOKENS = 20
+N_OWNERS = 100_000
+STRING_COLUMNS = ("owner", "sellToken", "buyToken", "token_a", "token_b")
+
+
+def _string_typed(trades: pd.DataFrame) -> pd.DataFrame:
+    """The trades in the previous string-typed schema"""
+    columns = {column: trades[column].astype(str).astype(object) for column in STRING_COLUMNS}
+    for column in ("sellAmount", "buyAmount"):
+        columns[column] = trades[column].astype("int64").astype(str).astype(object)
+    return trades.assign(**columns)
+
+
+def _measure(trades: pd.DataFrame) -> Dict:
+    started = time.perf_counter()
+    _compute_metrics(trades, LOOKBACK_BLOCKS)
+    return {
+        "bytes": int(trades.memory_usage(index=False, deep=True).sum()),
+        "compute_metrics_s": round(time.perf_counter() - started, 4),
+    }
+
+
+def run_case(n_trades: int, string_sample: int) -> Dict:
+    typed = generate_trades(n_trades, N_TOKENS, n_owners=N_OWNERS)
+    assert typed.dtypes.astype(str).to_dict() == TRADES_DTYPE
+    after = _measure(typed)
+
+    sample = min(n_trades, string_sample)
+    string_typed = _string_typed(typed.tail(sample))
+    del typed
+    gc.collect()
+    before = _measure(string_typed)
+    before["bytes"] = round(before["bytes"] * n_trades / sample)
+    del string_typed
+    gc.collect()
+
+    return {
+        "trades": n_trades,
+        "string_sample": sample,
+        "before_bytes": before["bytes"],
+        "after_bytes": after["bytes"],
+        "before_bytes_per_trade": round(before["bytes"] / n_trades, 1),
+        "after_bytes_per_trade": round(after["bytes"] / n_trades, 1),
+        "reduction": round(1 - after["bytes"] / before["bytes"], 3),
+        "before_compute_metrics_s": before["compute_metrics_s"],
+        "after_compute_metrics_s": after["compute_metrics_s"],
+    }
+
+
+@click.command()
+@click.option("--sizes", default="100000,1000000,10000000", help="Comma separated trade counts")
+@click.option(
+    "--string-sample", default=1_000_000, help="Most string-typed trades held in memory at once"
+)
+@click.option("--output", type=click.Path(), help="Write results as JSON")
+def main(sizes: str, string_sample: int, output: str | None):
+    results = []
+    for n_trades in [int(s) for s in sizes.split(",")]:
+        result = run_case(n_trades, string_sample)
+        click.echo(
+            f"trades={result['trades']:>9} "
+            f"before={result['before_bytes'] / 2**20:>8.1f}MiB "
+            f"({result['before_bytes_per_trade']}B/trade) "
+            f"after={result['after_bytes'] / 2**20:>7.1f}MiB "
+            f"({result['after_bytes_per_trade']}B/trade) "
+            f"reduction={result['reduction']:.1%}"
+        )
+        results.append(result)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Scaling benchmark for `_compute_metrics`.
+
+Compares the grouped implementation in bot.py against the previous per-pair loop and checks
+that both produce the same metrics. Run from the cow-trader directory:
+
+    SILVERBACK_NETWORK_CHOICE=ethereum:local:test python -m benchmarks.metrics
+"""
+
+import itertools
+import json
+import time
+from typing import Dict, List
+
+import click
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generate_trades
+from bot import TradeMetrics, _compute_metrics
+
+VOLUME_FIELDS = ("volume_buy", "volume_sell")
+
+
+def _compute_metrics_loop(df: pd.DataFrame, lookback_blocks: int) -> List[TradeMetrics]:
+    """Per-pair reference implementation that `_compute_metrics` replaced"""
+    if df.empty:
+        return []
+
+    latest_block = df.block_number.max()
+    filtered_df = df[df.block_number >= (latest_block - lookback_blocks)]
+
+    if filtered_df.empty:
+        return []
+
+    pairs_df = filtered_df[["token_a", "token_b"]].drop_duplicates()
+    metrics_list = []
+
+    for _, pair in pairs_df.iterrows():
+        pair_df = filtered_df[
+            (filtered_df.token_a == pair.token_a) & (filtered_df.token_b == pair.token_b)
+        ].sort_values("block_number", kind="stable")
+
+        pair_df = pair_df[pair_df.price.notna()]
+
+        if pair_df.empty:
+            continue
+
+        try:
+            volume_buy = pair_df.buyAmount.astype(float).sum()
+            volume_sell = pair_df.sellAmount.astype(float).sum()
+        except (ValueError, TypeError):
+            volume_buy = volume_sell = 0.0
+
+        prices = pair_df.price.values
+
+        up_moves_ratio = 0.5
+        max_up_streak = 0
+        max_down_streak = 0
+
+        if len(prices) >= 2:
+            price_changes = np.sign(np.diff(prices))
+            non_zero_moves = price_changes[price_changes != 0]
+
+            if len(non_zero_moves) > 0:
+                up_moves_ratio = np.mean(non_zero_moves > 0)
+
+            if len(price_changes) > 1:
+                change_points = np.where(price_changes[1:] != price_changes[:-1])[0] + 1
+                if len(change_points) > 0:
+                    streaks = np.split(price_changes, change_points)
+                    max_up_streak = max(
+                        (len(s) for s in streaks if len(s) > 0 and s[0] > 0), default=0
+                    )
+                    max_down_streak = max(
+                        (len(s) for s in streaks if len(s) > 0 and s[0] < 0), default=0
+                    )
+
+        metrics_list.append(
+            TradeMetrics(
+                token_a=pair.token_a,
+                token_b=pair.token_b,
+                last_price=float(prices[-1]),
+                min_price=float(np.min(prices)),
+                max_price=float(np.max(prices)),
+                volume_buy=float(volume_buy),
+                volume_sell=float(volume_sell),
+                up_moves_ratio=float(up_moves_ratio),
+                max_up_streak=int(max_up_streak),
+                max_down_streak=int(max_down_streak),
+                trade_count=len(pair_df),
+            )
+        )
+
+    return metrics_list
+
+
+def check_parity(expected: List[TradeMetrics], actual: List[TradeMetrics]) -> None:
+    """Assert metrics match; volumes may differ only by float summation order"""
+    assert len(expected) == len(actual), f"pair count {len(expected)} != {len(actual)}"
+    for e, a in zip(expected, actual):
+        e_dict, a_dict = e.model_dump(), a.model_dump()
+        for key, value in e_dict.items():
+            if key in VOLUME_FIELDS:
+                assert np.isclose(value, a_dict[key], rtol=1e-9), (key, e_dict, a_dict)
+            else:
+                assert value == a_dict[key], (key, e_dict, a_dict)
+
+
+def _timed(fn, *args) -> tuple[float, List[TradeMetrics]]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run_case(n_trades: int, n_tokens: int, reference_limit: float) -> Dict:
+    df = generate_trades(n_trades, n_tokens, trades_per_block=max(1, n_trades // 15000))
+    lookback_blocks = int(df.block_number.max() - df.block_number.min())
+    n_pairs = n_tokens * (n_tokens - 1) // 2
+
+    vectorized_s, metrics = _timed(_compute_metrics, df, lookback_blocks)
+    result = {
+        "trades": n_trades,
+        "tokens": n_tokens,
+        "pairs": len(metrics),
+        "vectorized_s": round(vectorized_s, 4),
+        "reference_s": None,
+        "speedup": None,
+        "parity": None,
+    }
+
+    if n_trades * n_pairs <= reference_limit:
+        reference_s, expected = _timed(_compute_metrics_loop, df, lookback_blocks)
+        check_parity(expected, metrics)
+        result.update(
+            reference_s=round(reference_s, 4),
+            speedup=round(reference_s / vectorized_s, 1),
+            parity=True,
+        )
+
+    return result
+
+
+@click.command()
+@click.option("--sizes", default="10000,1000000,10000000", help="Comma separated trade counts")
+@click.option("--tokens", default="3,20,100", help="Comma separated token counts")
+@click.option(
+    "--reference-limit",
+    default=5e8,
+    help="Only run the per-pair reference when trades x pairs is below this limit",
+)
+@click.option("--output", type=click.Path(), help="Write results as JSON")
+def main(sizes: str, tokens: str, reference_limit: float, output: str | None):
+    # Warm up so the first case does not pay one-off import and allocation costs
+    _compute_metrics(generate_trades(100, 3), 100)
+
+    results = []
+    for n_trades, n_tokens in itertools.product(
+        [int(s) for s in sizes.split(",")], [int(t) for t in tokens.split(",")]
+    ):
+        result = run_case(n_trades, n_tokens, reference_limit)
+        reference = f"{result['reference_s']}s" if result["reference_s"] is not None else "skipped"
+        click.echo(
+            f"trades={result['trades']:>10} tokens={result['tokens']:>4} "
+            f"pairs={result['pairs']:>5} vectorized={result['vectorized_s']:>8}s "
+            f"reference={reference} speedup={result['speedup']}"
+        )
+        results.append(result)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Resident memory of a worker's trade history against the length of the stored history.
+
+For each history length a synthetic trade store is written in backfill-sized segments. A newly
+spawned worker then loads its trade history as the frame the bot used to hold in memory, first
+from the whole store and then after `_archive_trade_store` has moved everything older than
+`TRADE_RETENTION_BLOCKS` into zstd Parquet cold partitions. The reported memory is the growth of
+the worker's resident set (Linux `/proc/self/statm`), which includes the touched pages of the
+memory-mapped segments. The cold partitions are read back to check that no trade was lost. Run
+from the cow-trader directory:
+
+    SILVERBACK_NETWORK_CHOICE=ethereum:local:test python -m benchmarks.retention
+"""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import click
+
+import bot
+from benchmarks.synthetic import generate_trades
+
+N_TOKENS = 20
+N_OWNERS = 100_000
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def _resident_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+def _load_history(store_dirpath: str, retention_blocks: int | None) -> Dict:
+    """Load the trade history the way a worker does"""
+    bot.TRADE_STORE_DIRPATH = store_dirpath
+    before = _resident_bytes()
+    started = time.perf_counter()
+    cache = bot.TradeCache(retention_blocks)
+    cache.refresh()
+    trades = bot._trades_frame(cache.table())
+    return {
+        "resident_bytes": _resident_bytes() - before,
+        "load_s": round(time.perf_counter() - started, 4),
+        "rows": len(trades),
+    }
+
+
+def _in_worker(retention_blocks: int | None) -> Dict:
+    """Measure `_load_history` in a new process, so nothing is inherited from this one"""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_load_history, (bot.TRADE_STORE_DIRPATH, retention_blocks))
+
+
+def _store_bytes(pattern: str) -> int:
+    return sum(p.stat().st_size for p in Path(bot.TRADE_STORE_DIRPATH).glob(pattern))
+
+
+def run_case(n_trades: int, trades_per_block: int, segment_blocks: int, scratch: str) -> Dict:
+    bot.TRADE_STORE_DIRPATH = os.path.join(scratch, f"trades_{n_trades}")
+    trades = generate_trades(n_trades, N_TOKENS, trades_per_block, n_owners=N_OWNERS)
+    stop_block = int(trades.block_number.max())
+    for start in range(1, stop_block + 1, segment_blocks):
+        stop = start + segment_blocks - 1
+        bot._append_trades_segment(
+            trades[trades.block_number.between(start, stop)], start_block=start, stop_block=stop
+        )
+    del trades
+
+    unbounded = _in_worker(None)
+    hot_bytes_before = _store_bytes("*.arrow")
+
+    started = time.perf_counter()
+    archived = bot._archive_trade_store()
+    archive_s = time.perf_counter() - started
+    retained = _in_worker(bot.TRADE_RETENTION_BLOCKS)
+    assert len(bot._load_trades_db()) == n_trades
+
+    return {
+        "trades": n_trades,
+        "history_blocks": stop_block,
+        "retention_blocks": bot.TRADE_RETENTION_BLOCKS,
+        "hot_trades": retained["rows"],
+        "archived_trades": archived,
+        "archive_s": round(archive_s, 3),
+        "unbounded_resident_bytes": unbounded["resident_bytes"],
+        "retained_resident_bytes": retained["resident_bytes"],
+        "unbounded_load_s": unbounded["load_s"],
+        "retained_load_s": retained["load_s"],
+        "hot_store_bytes_before": hot_bytes_before,
+        "hot_store_bytes_after": _store_bytes("*.arrow"),
+        "cold_store_bytes": _store_bytes(f"{bot.TRADE_COLD_DIRNAME}/*.parquet"),
+    }
+
+
+@click.command()
+@click.option("--sizes", default="100000,1000000,10000000", help="Comma separated trade counts")
+@click.option("--trades-per-block", default=1, help="Trades per synthetic block")
+@click.option(
+    "--segment-blocks", default=bot.BACKFILL_CHUNK_BLOCKS, help="Blocks per trade store segment"
+)
+@click.option("--output", type=click.Path(), help="Write results as JSON")
+def main(sizes: str, trades_per_block: int, segment_blocks: int, output: str | None):
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for n_trades in [int(s) for s in sizes.split(",")]:
+            result = run_case(n_trades, trades_per_block, segment_blocks, scratch)
+            click.echo(
+                f"trades={result['trades']:>9} "
+                f"resident unbounded={result['unbounded_resident_bytes'] / 2**20:>8.1f}MiB "
+                f"retained={result['retained_resident_bytes'] / 2**20:>6.1f}MiB "
+                f"({result['hot_trades']} hot trades) "
+                f"load {result['unbounded_load_s']}s -> {result['retained_load_s']}s "
+                f"store {result['hot_store_bytes_before'] / 2**20:.1f}MiB -> "
+                f"{result['hot_store_bytes_after'] / 2**20:.1f}MiB hot "
+                f"+ {result['cold_store_bytes'] / 2**20:.1f}MiB cold"
+            )
+            results.append(result)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
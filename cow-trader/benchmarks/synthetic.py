@@ -0,0 +1,120 @@
+"""Synthetic GPv2 trade generator for offline benchmarks"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+def token_addresses(n_tokens: int) -> list[str]:
+    """Deterministic token addresses, already in canonical (lowercase hex) order"""
+    return [f"0x{i + 1:040x}" for i in range(n_tokens)]
+
+
+def generate_trades(
+    n_trades: int,
+    n_tokens: int,
+    trades_per_block: int = 1,
+    start_block: int = 1,
+    seed: int = 0,
+    n_owners: int = 32,
+) -> pd.DataFrame:
+    """Generate trades in the typed trade store schema, as returned by `_load_trades_db`"""
+    rng = np.random.default_rng(seed)
+    tokens = pd.Categorical(token_addresses(n_tokens))
+    owners = pd.Categorical([f"0x{0xF000 + i:040x}" for i in range(n_owners)])
+
+    sell_idx = rng.integers(0, n_tokens, n_trades)
+    buy_idx = (sell_idx + rng.integers(1, n_tokens, n_trades)) % n_tokens
+    sell_amount = rng.integers(10**15, 10**18, n_trades, dtype=np.int64)
+    buy_amount = rng.integers(10**15, 10**18, n_trades, dtype=np.int64)
+
+    sell_is_a = sell_idx < buy_idx
+    price = np.where(sell_is_a, buy_amount / sell_amount, sell_amount / buy_amount)
+
+    return pd.DataFrame(
+        {
+            "block_number": start_block + np.arange(n_trades) // trades_per_block,
+            "owner": owners[rng.integers(0, len(owners), n_trades)],
+            "sellToken": tokens[sell_idx],
+            "buyToken": tokens[buy_idx],
+            "sellAmount": sell_amount.astype(float),
+            "buyAmount": buy_amount.astype(float),
+            "token_a": tokens[np.minimum(sell_idx, buy_idx)],
+            "token_b": tokens[np.maximum(sell_idx, buy_idx)],
+            "price": price,
+        }
+    )
+
+
+TRADE_TOPIC = bytes.fromhex("a07a543ab8a018198e99ca0184c93fe9050a79400a0a723441f84de1d972cc17")
+
+
+def generate_trade_logs(
+    n_trades: int,
+    tokens: list[str],
+    trades_per_block: int = 1,
+    start_block: int = 1,
+    seed: int = 0,
+) -> list[dict]:
+    """
+    Generate raw GPv2Settlement Trade logs as returned by `eth_getLogs`.
+    Token pairs are drawn from `tokens`, so include unmonitored tokens to exercise filtering.
+    """
+    rng = np.random.default_rng(seed)
+    token_words = [bytes(12) + bytes.fromhex(token[2:]) for token in tokens]
+    owners = [bytes(12) + (0xF000 + i).to_bytes(20, "big") for i in range(32)]
+    order_uid = (64).to_bytes(32, "big") + bytes(24)
+
+    sell_idx = rng.integers(0, len(tokens), n_trades)
+    buy_idx = (sell_idx + rng.integers(1, len(tokens), n_trades)) % len(tokens)
+    amounts = rng.integers(10**15, 10**18, (n_trades, 2), dtype=np.int64)
+    owner_idx = rng.integers(0, len(owners), n_trades)
+
+    return [
+        {
+            "blockNumber": start_block + i // trades_per_block,
+            "topics": [TRADE_TOPIC, owners[owner_idx[i]]],
+            "data": b"".join(
+                (
+                    token_words[sell_idx[i]],
+                    token_words[buy_idx[i]],
+                    int(amounts[i, 0]).to_bytes(32, "big"),
+                    int(amounts[i, 1]).to_bytes(32, "big"),
+                    bytes(32),
+                    (192).to_bytes(32, "big"),
+                    (56).to_bytes(32, "big"),
+                    order_uid,
+                )
+            ),
+        }
+        for i in range(n_trades)
+    ]
+
+
+@dataclass
+class DecodedTradeLog:
+    """The attributes of a decoded `ContractLog` that `_process_trade_log` reads"""
+
+    block_number: int
+    owner: str
+    sellToken: str
+    buyToken: str
+    sellAmount: int
+    buyAmount: int
+
+
+def decode_trade_logs(raw_logs: list[dict], tokens: list[str]) -> list[DecodedTradeLog]:
+    """Decode `generate_trade_logs` output into `ContractLog`-like objects"""
+    by_word = {bytes(12) + bytes.fromhex(token[2:]): token for token in tokens}
+    return [
+        DecodedTradeLog(
+            block_number=log["blockNumber"],
+            owner="0x" + log["topics"][1][12:].hex(),
+            sellToken=by_word[log["data"][:32]],
+            buyToken=by_word[log["data"][32:64]],
+            sellAmount=int.from_bytes(log["data"][64:96], "big"),
+            buyAmount=int.from_bytes(log["data"][96:128], "big"),
+        )
+        for log in raw_logs
+    ]
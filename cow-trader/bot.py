@@ -1,22 +1,49 @@
 import asyncio
+import fcntl
+import hashlib
+import heapq
 import json
+import math
 import os
-from dataclasses import dataclass
+import random
+import socket
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import Annotated, Dict, List
+from typing import AbstractSet, Annotated, Dict, List
 
 import click
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import requests
-from ape import Contract, accounts, chain
+from ape import accounts, chain, networks
 from ape.api import BlockAPI
-from ape.types import LogFilter
+from ape.contracts import ContractInstance
+from ape.types import ContractLog
 from ape_ethereum import multicall
+from eth_utils import keccak, to_checksum_address
+from ethpm_types import ContractType
+from prometheus_client import CollectorRegistry, Counter, Histogram, start_http_server
 from pydantic import BaseModel
-from pydantic_ai import Agent, RunContext
+from pydantic_ai import Agent, RunContext, capture_run_messages
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.usage import Usage
+from requests.adapters import HTTPAdapter
 from silverback import SilverbackBot, StateSnapshot
 from taskiq import Context, TaskiqDepends, TaskiqState
+from web3.exceptions import Web3TypeError
 
 # Initialize bot
 bot = SilverbackBot()
@@ -25,15 +52,28 @@ bot = SilverbackBot()
 PROMPT_AUTOSIGN = bot.signer
 ENCOURAGE_TRADE = os.environ.get("ENCOURAGE_TRADE", False)
 
-# File path configuration
-TRADE_FILEPATH = os.environ.get("TRADE_FILEPATH", ".db/trades.csv")
-BLOCK_FILEPATH = os.environ.get("BLOCK_FILEPATH", ".db/block.csv")
-ORDERS_FILEPATH = os.environ.get("ORDERS_FILEPATH", ".db/orders.csv")
-DECISIONS_FILEPATH = os.environ.get("DECISIONS_FILEPATH", ".db/decisions.csv")
-REASONING_FILEPATH = os.environ.get("REASONING_FILEPATH", ".db/reasoning.csv")
+# Chain traded by the bot, and further chains whose trades it follows in the same process
+DEFAULT_CHAIN_ID = 100
+CHAIN_ID = int(os.environ.get("CHAIN_ID", DEFAULT_CHAIN_ID))
+FOLLOWED_CHAINS = [int(c) for c in os.environ.get("FOLLOWED_CHAINS", "").split(",") if c.strip()]
+CHAINS_FILEPATH = os.environ.get("CHAINS_FILEPATH", "./chains.json")
+
+# File path configuration; chains other than the default one keep their state apart
+DB_DIRPATH = ".db" if CHAIN_ID == DEFAULT_CHAIN_ID else f".db/{CHAIN_ID}"
+TRADE_FILEPATH = os.environ.get("TRADE_FILEPATH", f"{DB_DIRPATH}/trades.csv")
+BLOCK_FILEPATH = os.environ.get("BLOCK_FILEPATH", f"{DB_DIRPATH}/block.csv")
+ORDERS_FILEPATH = os.environ.get("ORDERS_FILEPATH", f"{DB_DIRPATH}/orders.csv")
+DECISIONS_FILEPATH = os.environ.get("DECISIONS_FILEPATH", f"{DB_DIRPATH}/decisions.csv")
+REASONING_FILEPATH = os.environ.get("REASONING_FILEPATH", f"{DB_DIRPATH}/reasoning.csv")
+TRADE_STORE_DIRPATH = os.environ.get("TRADE_STORE_DIRPATH", f"{DB_DIRPATH}/trades")
+SQLITE_FILEPATH = os.environ.get("SQLITE_FILEPATH", f"{DB_DIRPATH}/state.sqlite")
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "sqlite")
+NAMESPACES_DIRPATH = os.environ.get("NAMESPACES_DIRPATH", DB_DIRPATH)
+TOKEN_CACHE_FILEPATH = os.environ.get("TOKEN_CACHE_FILEPATH", f"{DB_DIRPATH}/tokens.json")
 
 
 # Loading contract helper functions
+@lru_cache
 def _load_contracts_deployments(
     filepath: str = "../smart-contract-infra/deployments/contracts.json",
 ) -> dict:
@@ -41,7 +81,7 @@ def _load_contracts_deployments(
         return json.load(f)
 
 
-def _get_contract_address(contract_key: str, chain_id: int = 100) -> str:
+def _get_contract_address(contract_key: str, chain_id: int = CHAIN_ID) -> str:
     contracts = _load_contracts_deployments()
     chain_key = str(chain_id)
     try:
@@ -50,29 +90,114 @@ def _get_contract_address(contract_key: str, chain_id: int = 100) -> str:
         raise Exception(f"{contract_key} not found for chain ID {chain_id}")
 
 
-# Addresses
+# Chains
 GPV2_SETTLEMENT_ADDRESS = "0x9008D19f58AAbD9eD0D60971565AA8510560ab41"
-TOKEN_ALLOWLIST_ADDRESS = os.environ.get(
-    "TOKEN_ALLOWLIST_ADDRESS", _get_contract_address("allowlist", 100)
-)
-SAFE_ADDRESS = os.environ.get("SAFE_ADDRESS", _get_contract_address("safe", 100))
-TRADING_MODULE_ADDRESS = os.environ.get(
-    "TRADING_MODULE_ADDRESS", _get_contract_address("tradingModuleProxy", 100)
-)
 
 GNO = "0x9C58BAcC331c9aa871AFD802DB6379a98e80CEdb"
 COW = "0x177127622c4A00F3d409B75571e12cB3c8973d3c"
 WXDAI = "0xe91D153E0b41518A2Ce8Dd3D7944Fa863463a97d"
-MONITORED_TOKENS = [GNO, COW, WXDAI]
 
-MINIMUM_TOKEN_BALANCES = {
-    GNO: 55e14,
-    COW: 10e18,
-    WXDAI: 5e18,
+GNOSIS_CHAIN_DEFAULTS = {
+    "network": "gnosis:mainnet",
+    "api_network": "xdai",
+    "tokens": {GNO: "GNO", COW: "COW", WXDAI: "WXDAI"},
+    "minimum_token_balances": {GNO: 55e14, COW: 10e18, WXDAI: 5e18},
+    "stable_tokens": [WXDAI],
+}
+# Ape network and CoW API network of the chains in the deployments file. Token universes of
+# chains other than Gnosis Chain are configured in CHAINS_FILEPATH.
+CHAIN_DEFAULTS = {
+    1: {"network": "ethereum:mainnet", "api_network": "mainnet"},
+    100: GNOSIS_CHAIN_DEFAULTS,
+    8453: {"network": "base:mainnet", "api_network": "base"},
+    # Local fork of Gnosis Chain, with the Gnosis Chain deployment addresses
+    31337: {**GNOSIS_CHAIN_DEFAULTS, "network": "gnosis:mainnet-fork:foundry"},
+    42161: {"network": "arbitrum:mainnet", "api_network": "arbitrum_one"},
+    11155111: {"network": "ethereum:sepolia", "api_network": "sepolia"},
 }
 
 
+@dataclass
+class ChainConfig:
+    """
+    A chain the bot trades or follows: how to reach it, where CoW Protocol settles on it and
+    which tokens it monitors there.
+    """
+
+    chain_id: int
+    network: str
+    api_network: str
+    settlement_address: str = GPV2_SETTLEMENT_ADDRESS
+    api_base_url: str | None = None
+    tokens: Dict[str, str] = field(default_factory=dict)
+    minimum_token_balances: Dict[str, float] = field(default_factory=dict)
+    stable_tokens: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.settlement_address = to_checksum_address(self.settlement_address)
+        self.api_base_url = self.api_base_url or f"https://api.cow.fi/{self.api_network}/api/v1"
+        self.tokens = {to_checksum_address(t): symbol for t, symbol in self.tokens.items()}
+        self.minimum_token_balances = {
+            to_checksum_address(token): float(amount)
+            for token, amount in self.minimum_token_balances.items()
+        }
+        self.stable_tokens = [to_checksum_address(t) for t in self.stable_tokens]
+
+    @property
+    def namespace(self) -> str:
+        """Storage namespace of the chain's trade store when it is followed"""
+        return f"chains/{self.chain_id}"
+
+
+def _load_chains(filepath: str = CHAINS_FILEPATH) -> Dict[int, ChainConfig]:
+    """
+    Build the configuration of every chain in the deployments file, from CHAIN_DEFAULTS
+    overridden by the chain's entry in an optional JSON object of `ChainConfig` fields keyed
+    by chain ID. Chains without a known network are left out.
+    """
+    overrides = {}
+    if os.path.exists(filepath):
+        with open(filepath) as f:
+            overrides = {int(chain_id): entry for chain_id, entry in json.load(f).items()}
+
+    chains = {}
+    for chain_key, deployment in _load_contracts_deployments()["chains"].items():
+        chain_id = int(chain_key)
+        fields = {**CHAIN_DEFAULTS.get(chain_id, {}), **overrides.get(chain_id, {})}
+        if "settlement" in deployment:
+            fields.setdefault("settlement_address", deployment["settlement"])
+        if "network" in fields and "api_network" in fields:
+            chains[chain_id] = ChainConfig(chain_id, **fields)
+    return chains
+
+
+def _get_chain(chain_id: int) -> ChainConfig:
+    try:
+        return CHAINS[chain_id]
+    except KeyError:
+        raise Exception(f"No deployment or network configured for chain ID {chain_id}")
+
+
+CHAINS = _load_chains()
+CHAIN = _get_chain(CHAIN_ID)
+
+
+# Addresses
+TOKEN_ALLOWLIST_ADDRESS = os.environ.get("TOKEN_ALLOWLIST_ADDRESS") or _get_contract_address(
+    "allowlist"
+)
+SAFE_ADDRESS = os.environ.get("SAFE_ADDRESS") or _get_contract_address("safe")
+TRADING_MODULE_ADDRESS = os.environ.get("TRADING_MODULE_ADDRESS") or _get_contract_address(
+    "tradingModuleProxy"
+)
+
+# Configured tokens, monitored until the TokenAllowlist has been read
+MONITORED_TOKENS = list(CHAIN.tokens)
+MINIMUM_TOKEN_BALANCES = CHAIN.minimum_token_balances
+
+
 # ABI
+@lru_cache
 def _load_abi(abi_name: str) -> Dict:
     """Load ABI from json file"""
     abi_path = Path(os.environ.get(f"{abi_name}_ABI_FILEPATH", f"./abi/{abi_name}.json"))
@@ -81,19 +206,466 @@ def _load_abi(abi_name: str) -> Dict:
 
 
 # Contracts
-GPV2_SETTLEMENT_CONTRACT = Contract(GPV2_SETTLEMENT_ADDRESS, abi=_load_abi("GPv2Settlement"))
-TOKEN_ALLOWLIST_CONTRACT = Contract(TOKEN_ALLOWLIST_ADDRESS, abi=_load_abi("TokenAllowlist"))
-TRADING_MODULE_CONTRACT = Contract(TRADING_MODULE_ADDRESS, abi=_load_abi("TradingModule"))
+# The part of the ERC20 interface the bot calls, so token contracts need no explorer lookup
+ERC20_ABI = [
+    {
+        "type": "function",
+        "name": "balanceOf",
+        "stateMutability": "view",
+        "inputs": [{"name": "account", "type": "address"}],
+        "outputs": [{"name": "", "type": "uint256"}],
+    },
+    {
+        "type": "function",
+        "name": "symbol",
+        "stateMutability": "view",
+        "inputs": [],
+        "outputs": [{"name": "", "type": "string"}],
+    },
+    {
+        "type": "function",
+        "name": "decimals",
+        "stateMutability": "view",
+        "inputs": [],
+        "outputs": [{"name": "", "type": "uint8"}],
+    },
+]
+
+
+@lru_cache
+def _get_contract(address: str, abi_name: str) -> ContractInstance:
+    """Build a contract from its local ABI file without querying the provider or explorer"""
+    return ContractInstance(address, ContractType(abi=_load_abi(abi_name)))
+
+
+@lru_cache
+def _get_token_contract(token_address: str) -> ContractInstance:
+    """Build a token contract from `ERC20_ABI` without querying the provider or explorer"""
+    return ContractInstance(token_address, ContractType(abi=ERC20_ABI))
+
+
+# Subscribed to at import, so built from the local ABI alone
+GPV2_SETTLEMENT_CONTRACT = _get_contract(CHAIN.settlement_address, "GPv2Settlement")
 
 
 # API
-API_BASE_URL = "https://api.cow.fi/xdai/api/v1"
+API_BASE_URL = os.environ.get("API_BASE_URL", CHAIN.api_base_url)
 API_HEADERS = {"accept": "application/json", "Content-Type": "application/json"}
+API_TIMEOUTS = {
+    "quote": float(os.environ.get("API_QUOTE_TIMEOUT", 10)),
+    "orders": float(os.environ.get("API_ORDERS_TIMEOUT", 10)),
+}
+API_DEFAULT_TIMEOUT = float(os.environ.get("API_DEFAULT_TIMEOUT", 10))
+API_MAX_RETRIES = int(os.environ.get("API_MAX_RETRIES", 3))
+API_BACKOFF_SECONDS = float(os.environ.get("API_BACKOFF_SECONDS", 0.5))
+API_BACKOFF_MAX_SECONDS = float(os.environ.get("API_BACKOFF_MAX_SECONDS", 8))
+API_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+API_POOL_SIZE = int(os.environ.get("API_POOL_SIZE", 10))
+QUOTE_EXPIRY_MARGIN_SECONDS = int(os.environ.get("QUOTE_EXPIRY_MARGIN_SECONDS", 30))
+ORDER_POLL_MIN_SECONDS = float(os.environ.get("ORDER_POLL_MIN_SECONDS", 15))
+ORDER_POLL_MAX_SECONDS = float(os.environ.get("ORDER_POLL_MAX_SECONDS", 300))
+ORDER_POLL_PAGE_SIZE = int(os.environ.get("ORDER_POLL_PAGE_SIZE", 100))
 
 # Variables
-START_BLOCK = int(os.environ.get("START_BLOCK", chain.blocks.head.number))
 TRADING_BLOCK_COOLDOWN = int(os.environ.get("TRADING_BLOCK_COOLDOWN", 360))
-SYSTEM_PROMPT = Path("./system_prompt.txt").read_text().strip()
+LOOKBACK_BLOCKS = int(os.environ.get("LOOKBACK_BLOCKS", 15000))
+AGENT_DEADLINE_SECONDS = float(os.environ.get("AGENT_DEADLINE_SECONDS", 60))
+DECISION_CACHE_PRICE_TOLERANCE = float(os.environ.get("DECISION_CACHE_PRICE_TOLERANCE", 0.005))
+DECISION_CACHE_AMOUNT_TOLERANCE = float(os.environ.get("DECISION_CACHE_AMOUNT_TOLERANCE", 0.05))
+DECISION_CACHE_TTL_BLOCKS = int(os.environ.get("DECISION_CACHE_TTL_BLOCKS", 2160))
+DECISION_CACHE_MAX_ENTRIES = int(os.environ.get("DECISION_CACHE_MAX_ENTRIES", 128))
+BACKFILL_CHUNK_BLOCKS = int(os.environ.get("BACKFILL_CHUNK_BLOCKS", 5000))
+BACKFILL_MIN_CHUNK_BLOCKS = int(os.environ.get("BACKFILL_MIN_CHUNK_BLOCKS", 50))
+BACKFILL_MAX_WORKERS = int(os.environ.get("BACKFILL_MAX_WORKERS", 4))
+TOKEN_UNIVERSE_REFRESH_BLOCKS = int(os.environ.get("TOKEN_UNIVERSE_REFRESH_BLOCKS", 120))
+DEFAULT_MINIMUM_TOKEN_UNITS = float(os.environ.get("DEFAULT_MINIMUM_TOKEN_UNITS", 0.01))
+CONTEXT_ALL_PAIRS_MAX_TOKENS = int(os.environ.get("CONTEXT_ALL_PAIRS_MAX_TOKENS", 8))
+CHAIN_FETCH_WORKERS = int(os.environ.get("CHAIN_FETCH_WORKERS", BACKFILL_MAX_WORKERS))
+CONFIRMATION_BLOCKS = int(os.environ.get("CONFIRMATION_BLOCKS", 10))
+REORG_TRACKING_BLOCKS = int(os.environ.get("REORG_TRACKING_BLOCKS", 2 * CONFIRMATION_BLOCKS))
+LIVE_FLUSH_BLOCKS = int(os.environ.get("LIVE_FLUSH_BLOCKS", 10))
+TRADE_RETENTION_BLOCKS = int(
+    os.environ.get("TRADE_RETENTION_BLOCKS", max(LOOKBACK_BLOCKS, REORG_TRACKING_BLOCKS))
+)
+COLD_PARTITION_BLOCKS = int(os.environ.get("COLD_PARTITION_BLOCKS", 100_000))
+SYSTEM_PROMPT_FILEPATH = os.environ.get("SYSTEM_PROMPT_FILEPATH", "./system_prompt.txt")
+PORTFOLIOS_FILEPATH = os.environ.get("PORTFOLIOS_FILEPATH", "./portfolios.json")
+METRICS_ADDR = os.environ.get("METRICS_ADDR", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 9101))
+
+
+@lru_cache
+def _get_start_block() -> int:
+    """Block to start from when nothing has been processed yet, resolved on first use"""
+    return int(os.environ.get("START_BLOCK") or chain.blocks.head.number)
+
+
+@lru_cache
+def _load_system_prompt() -> str:
+    return Path(SYSTEM_PROMPT_FILEPATH).read_text().strip()
+
+
+# Portfolios
+DEFAULT_PORTFOLIO_NAME = "default"
+
+
+@dataclass
+class Portfolio:
+    """
+    A Safe traded by the bot, with its own minimum balances, cooldown and decision history.
+    Omitted fields fall back to the single-Safe configuration.
+    """
+
+    name: str
+    safe_address: str = SAFE_ADDRESS
+    trading_module_address: str = TRADING_MODULE_ADDRESS
+    minimum_token_balances: Dict[str, float] = field(default_factory=dict)
+    cooldown_blocks: int = TRADING_BLOCK_COOLDOWN
+
+    def __post_init__(self):
+        self.safe_address = to_checksum_address(self.safe_address)
+        self.trading_module_address = to_checksum_address(self.trading_module_address)
+        self.minimum_token_balances = {
+            **MINIMUM_TOKEN_BALANCES,
+            **{
+                to_checksum_address(token): float(amount)
+                for token, amount in self.minimum_token_balances.items()
+            },
+        }
+
+    @property
+    def namespace(self) -> str | None:
+        """Storage namespace of its orders, decisions and reasoning; the default one is shared"""
+        return None if self.name == DEFAULT_PORTFOLIO_NAME else f"portfolios/{self.name}"
+
+
+def _load_portfolios(filepath: str = PORTFOLIOS_FILEPATH) -> List[Portfolio]:
+    """
+    Load the portfolios from a JSON list of `Portfolio` fields, or run the single configured
+    Safe as the default portfolio when there is no such file.
+    """
+    if not os.path.exists(filepath):
+        return [Portfolio(DEFAULT_PORTFOLIO_NAME)]
+
+    with open(filepath) as f:
+        portfolios = [Portfolio(**entry) for entry in json.load(f)]
+    if not portfolios:
+        raise ValueError(f"No portfolios in {filepath}")
+    for attribute in ("name", "safe_address"):
+        values = [getattr(p, attribute) for p in portfolios]
+        if len(set(values)) != len(values):
+            raise ValueError(f"Duplicate portfolio {attribute} in {filepath}")
+    return portfolios
+
+
+PORTFOLIOS = _load_portfolios()
+PORTFOLIO_SAFES = {portfolio.safe_address: portfolio for portfolio in PORTFOLIOS}
+
+
+# Token universe
+@dataclass
+class TokenMetadata:
+    symbol: str
+    decimals: int | None = None
+
+
+def _load_token_cache(filepath: str) -> Dict:
+    """Load the cached allowlist and token metadata, or an empty cache"""
+    if not os.path.exists(filepath):
+        return {"allowlist": None, "block_number": None, "tokens": [], "metadata": {}}
+    with open(filepath) as f:
+        return json.load(f)
+
+
+def _save_token_cache(cache: Dict, filepath: str) -> None:
+    """Atomically replace the token cache"""
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, filepath)
+
+
+def _fetch_allowed_tokens(allowlist_address: str, block_number: int | None = None) -> List[str]:
+    """Read the tokens on the TokenAllowlist in a single call"""
+    allowlist = _get_contract(allowlist_address, "TokenAllowlist")
+    _count("rpc_calls", "eth_call")
+    if block_number is None:
+        tokens = allowlist.allowedTokens()
+    else:
+        tokens = allowlist.allowedTokens(block_id=block_number)
+    return [to_checksum_address(token) for token in tokens]
+
+
+def _fetch_token_metadata(tokens: List[str]) -> Dict[str, TokenMetadata]:
+    """
+    Get the symbol and decimals of every token using a single multicall.
+    Symbols that are not strings, such as bytes32 ones, are decoded from their raw bytes;
+    failed calls fall back to the address and unknown decimals.
+    """
+    call = multicall.Call()
+    for token in tokens:
+        call.add(_get_token_contract(token).symbol)
+        call.add(_get_token_contract(token).decimals)
+
+    _count("rpc_calls", "eth_call")
+    results = iter(call())
+
+    metadata = {}
+    for token in tokens:
+        symbol, decimals = next(results), next(results)
+        if isinstance(symbol, bytes):
+            symbol = symbol.rstrip(b"\0").decode("utf-8", "ignore")
+        metadata[token] = TokenMetadata(
+            symbol=symbol or token,
+            decimals=decimals if isinstance(decimals, int) else None,
+        )
+    return metadata
+
+
+def _unique_token_names(symbols: Dict[str, str]) -> Dict[str, str]:
+    """
+    Name each token by its symbol, suffixing symbols shared by several tokens with the start of
+    the address (e.g. `USDC-a0b8`), so a name always identifies one token
+    """
+    tokens_by_symbol = defaultdict(list)
+    for token, symbol in symbols.items():
+        tokens_by_symbol[symbol].append(token)
+
+    names = {}
+    for symbol, tokens in tokens_by_symbol.items():
+        if len(tokens) == 1:
+            names[tokens[0]] = symbol
+            continue
+        digits = 4
+        while digits < 40 and len({t[2 : 2 + digits].lower() for t in tokens}) < len(tokens):
+            digits += 2
+        names.update({t: f"{symbol}-{t[2 : 2 + digits].lower()}" for t in tokens})
+    return {token: names[token] for token in symbols}
+
+
+class TokenUniverse:
+    """
+    Tokens the bot monitors and trades: those on the TokenAllowlist, with their symbols and
+    decimals. The allowlist emits no events, so `refresh` polls `allowedTokens` once every
+    `refresh_blocks` and fetches metadata for newly listed tokens only. The allowlist and all
+    metadata seen are cached on disk, which lets other processes adopt a recent refresh without
+    a call. Each change swaps in new lookup structures, such as the set used to filter trades.
+    """
+
+    def __init__(
+        self,
+        tokens: Dict[str, TokenMetadata],
+        minimum_balances: Dict[str, float],
+        allowlist_address: str = TOKEN_ALLOWLIST_ADDRESS,
+        filepath: str = TOKEN_CACHE_FILEPATH,
+        refresh_blocks: int = TOKEN_UNIVERSE_REFRESH_BLOCKS,
+    ):
+        self.configured_minimums = minimum_balances
+        self.allowlist_address = to_checksum_address(allowlist_address)
+        self.filepath = filepath
+        self.refresh_blocks = refresh_blocks
+        self.block_number: int | None = None
+        self._lock = threading.Lock()
+        self._set(list(tokens), tokens)
+        self.load()
+
+    def _set(self, tokens: List[str], metadata: Dict[str, TokenMetadata]) -> None:
+        self.metadata = {token: metadata[token] for token in tokens}
+        self.names = _unique_token_names({token: m.symbol for token, m in self.metadata.items()})
+        self.minimum_balances = {
+            token: self.configured_minimums.get(
+                token, 10**m.decimals * DEFAULT_MINIMUM_TOKEN_UNITS if m.decimals else 0
+            )
+            for token, m in self.metadata.items()
+        }
+        self.token_bytes = {bytes.fromhex(token[2:]): token for token in tokens}
+        self.token_set = frozenset(tokens)
+        self.tokens = tokens
+
+    def _adopt(self, cache: Dict) -> bool:
+        """Switch to the cached allowlist; returns whether the tokens changed"""
+        self.block_number = cache["block_number"]
+        if cache["tokens"] == self.tokens:
+            return False
+        metadata = {token: TokenMetadata(**cache["metadata"][token]) for token in cache["tokens"]}
+        self._set(cache["tokens"], metadata)
+        return True
+
+    def load(self) -> bool:
+        """Adopt the allowlist last cached on disk, without any call"""
+        cache = _load_token_cache(self.filepath)
+        if cache["allowlist"] != self.allowlist_address or cache["block_number"] is None:
+            return False
+        with self._lock:
+            return self._adopt(cache)
+
+    def refresh(self, block_number: int) -> bool:
+        """
+        Bring the universe up to date with the allowlist at `block_number`, at most once per
+        `refresh_blocks`. Returns whether the tokens changed; a failed read changes nothing.
+        """
+        with self._lock:
+            if (
+                self.block_number is not None
+                and block_number < self.block_number + self.refresh_blocks
+            ):
+                return False
+            if int(self.allowlist_address, 16) == 0:
+                self.block_number = block_number
+                return False
+
+            cache = _load_token_cache(self.filepath)
+            if (
+                cache["allowlist"] == self.allowlist_address
+                and cache["block_number"] is not None
+                and 0 <= block_number - cache["block_number"] < self.refresh_blocks
+            ):
+                return self._adopt(cache)
+
+            try:
+                tokens = _fetch_allowed_tokens(self.allowlist_address, block_number)
+                missing = [token for token in tokens if token not in cache["metadata"]]
+                if missing:
+                    fetched = _fetch_token_metadata(missing)
+                    cache["metadata"].update({token: asdict(m) for token, m in fetched.items()})
+            except Exception as e:
+                # Keep the current universe and try again after another `refresh_blocks`
+                click.echo(f"Token allowlist refresh failed at block {block_number}: {e}")
+                self.block_number = block_number
+                return False
+            cache.update(allowlist=self.allowlist_address, block_number=block_number, tokens=tokens)
+            _save_token_cache(cache, self.filepath)
+            return self._adopt(cache)
+
+
+TOKEN_UNIVERSE = TokenUniverse(
+    {token: TokenMetadata(symbol) for token, symbol in CHAIN.tokens.items()},
+    MINIMUM_TOKEN_BALANCES,
+)
+
+
+# Instrumentation
+METRICS_REGISTRY = CollectorRegistry()
+SPAN_SECONDS = Histogram(
+    "cow_trader_span_seconds",
+    "Wall time of instrumented handler phases and calls",
+    ["span"],
+    registry=METRICS_REGISTRY,
+    buckets=(0.001, 0.005, 0.025, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+COUNTERS = {
+    "rpc_calls": Counter(
+        "cow_trader_rpc_calls",
+        "RPC requests made by the bot",
+        ["method"],
+        registry=METRICS_REGISTRY,
+    ),
+    "rows_ingested": Counter(
+        "cow_trader_rows_ingested",
+        "Trades ingested into the metrics engine",
+        ["source"],
+        registry=METRICS_REGISTRY,
+    ),
+    "cache_lookups": Counter(
+        "cow_trader_cache_lookups",
+        "Cache lookups by cache and result",
+        ["cache", "result"],
+        registry=METRICS_REGISTRY,
+    ),
+}
+
+
+@dataclass
+class _HandlerStats:
+    """Span wall times and counter increments of the handler run in progress"""
+
+    spans: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
+    counts: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def results(self) -> Dict:
+        return {
+            **{f"{name}_seconds": round(seconds, 4) for name, seconds in self.spans.items()},
+            **self.counts,
+        }
+
+
+_HANDLER_STATS: ContextVar[_HandlerStats | None] = ContextVar("_HANDLER_STATS", default=None)
+
+
+@contextmanager
+def _span(name: str):
+    """Time a phase into SPAN_SECONDS and the running handler's results"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_SECONDS.labels(name).observe(elapsed)
+        stats = _HANDLER_STATS.get()
+        if stats is not None:
+            stats.spans[name] += elapsed
+
+
+def _count(counter: str, *labels: str, amount: int = 1) -> None:
+    """Increment a counter, and the running handler's count of it"""
+    COUNTERS[counter].labels(*labels).inc(amount)
+    stats = _HANDLER_STATS.get()
+    if stats is not None:
+        stats.counts["_".join((counter, *labels))] += amount
+
+
+def _instrumented(handler):
+    """
+    Time a bot handler as a whole and merge its span and counter totals into the returned dict.
+    Nested spans, including those in worker threads started with `asyncio.to_thread`, are
+    attributed to the handler through a context variable.
+    """
+
+    def finish(stats: _HandlerStats, result):
+        if isinstance(result, dict):
+            return {**result, **stats.results()}
+        return result
+
+    if asyncio.iscoroutinefunction(handler):
+
+        @wraps(handler)
+        async def wrapper(*args, **kwargs):
+            stats = _HandlerStats()
+            token = _HANDLER_STATS.set(stats)
+            try:
+                with _span(handler.__name__):
+                    result = await handler(*args, **kwargs)
+            finally:
+                _HANDLER_STATS.reset(token)
+            return finish(stats, result)
+
+    else:
+
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            stats = _HandlerStats()
+            token = _HANDLER_STATS.set(stats)
+            try:
+                with _span(handler.__name__):
+                    result = handler(*args, **kwargs)
+            finally:
+                _HANDLER_STATS.reset(token)
+            return finish(stats, result)
+
+    return wrapper
+
+
+@lru_cache
+def _start_metrics_server() -> None:
+    """Serve METRICS_REGISTRY in the Prometheus text format, once per process"""
+    if METRICS_PORT <= 0:
+        return
+    try:
+        start_http_server(METRICS_PORT, addr=METRICS_ADDR, registry=METRICS_REGISTRY)
+        click.echo(f"Metrics served on http://{METRICS_ADDR}:{METRICS_PORT}/metrics")
+    except OSError as e:
+        click.echo(f"Metrics endpoint not started: {e}")
 
 
 # Agents
@@ -111,8 +683,23 @@ class TradeMetrics(BaseModel):
     trade_count: int
 
 
-def _compute_metrics(df: pd.DataFrame, lookback_blocks: int = 15000) -> List[TradeMetrics]:
-    """Compute trading metrics for all token pairs in filtered DataFrame"""
+def _amounts_to_float(amounts: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Convert amount column to floats, returning (values, invalid) arrays"""
+    try:
+        values = amounts.to_numpy(dtype=float)
+        return values, np.zeros(len(values), dtype=bool)
+    except (ValueError, TypeError):
+        values = np.array([pd.to_numeric(v, errors="coerce") for v in amounts], dtype=float)
+        return values, np.isnan(values) & amounts.notna().to_numpy()
+
+
+def _compute_metrics(
+    df: pd.DataFrame, lookback_blocks: int = LOOKBACK_BLOCKS
+) -> List[TradeMetrics]:
+    """
+    Compute trading metrics for all token pairs in filtered DataFrame.
+    Trades are sorted once by (pair, block) and every pair is reduced in a single grouped pass.
+    """
     if df.empty:
         return []
 
@@ -122,72 +709,358 @@ def _compute_metrics(df: pd.DataFrame, lookback_blocks: int = 15000) -> List[Tra
     if filtered_df.empty:
         return []
 
-    pairs_df = filtered_df[["token_a", "token_b"]].drop_duplicates()
-    metrics_list = []
+    # Pair codes in order of first appearance, matching `drop_duplicates` on the pair columns
+    token_a_codes, token_a_values = pd.factorize(filtered_df.token_a)
+    token_b_codes, token_b_values = pd.factorize(filtered_df.token_b)
+    pair_codes, pair_keys = pd.factorize(token_a_codes * len(token_b_values) + token_b_codes)
+    valid = filtered_df.price.notna().to_numpy()
+    if not valid.any():
+        return []
+
+    # Stable sort keeps ingestion order for trades within the same block
+    order = np.lexsort((filtered_df.block_number.to_numpy()[valid], pair_codes[valid]))
+    codes = pair_codes[valid][order]
+    prices = filtered_df.price.to_numpy(dtype=float)[valid][order]
+    buy_amounts, buy_invalid = _amounts_to_float(filtered_df.buyAmount[valid])
+    sell_amounts, sell_invalid = _amounts_to_float(filtered_df.sellAmount[valid])
+    buy_amounts, sell_amounts = buy_amounts[order], sell_amounts[order]
+    invalid_amounts = (buy_invalid | sell_invalid)[order]
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)]
+    trade_counts = ends - starts
+    group_ids = np.repeat(np.arange(len(starts)), trade_counts)
+
+    volume_valid = ~np.logical_or.reduceat(invalid_amounts, starts)
+    volume_buy = np.where(volume_valid, np.add.reduceat(np.nan_to_num(buy_amounts), starts), 0.0)
+    volume_sell = np.where(volume_valid, np.add.reduceat(np.nan_to_num(sell_amounts), starts), 0.0)
+
+    # Price moves between consecutive trades of the same pair
+    same_pair = group_ids[1:] == group_ids[:-1]
+    changes = np.sign(np.diff(prices))[same_pair]
+    change_groups = group_ids[1:][same_pair]
+
+    up_moves = np.bincount(change_groups, weights=changes > 0, minlength=len(starts))
+    non_zero_moves = np.bincount(change_groups, weights=changes != 0, minlength=len(starts))
+    up_moves_ratio = np.full(len(starts), 0.5)
+    np.divide(up_moves, non_zero_moves, out=up_moves_ratio, where=non_zero_moves > 0)
+
+    # Run-length encode moves into streaks; a pair with a single run reports no streaks.
+    # Without any moves (every pair has a single trade) there are no runs at all.
+    run_starts = np.flatnonzero(
+        np.r_[True, (change_groups[1:] != change_groups[:-1]) | (changes[1:] != changes[:-1])]
+        if len(changes)
+        else np.zeros(0, dtype=bool)
+    )
+    run_lengths = np.diff(np.r_[run_starts, len(changes)])
+    run_signs = changes[run_starts]
+    run_groups = change_groups[run_starts]
+    has_streaks = np.bincount(run_groups, minlength=len(starts)) > 1
+
+    max_up_streak = np.zeros(len(starts), dtype=int)
+    max_down_streak = np.zeros(len(starts), dtype=int)
+    np.maximum.at(max_up_streak, run_groups[run_signs > 0], run_lengths[run_signs > 0])
+    np.maximum.at(max_down_streak, run_groups[run_signs < 0], run_lengths[run_signs < 0])
+    max_up_streak[~has_streaks] = 0
+    max_down_streak[~has_streaks] = 0
+
+    last_price = prices[ends - 1]
+    min_price = np.minimum.reduceat(prices, starts)
+    max_price = np.maximum.reduceat(prices, starts)
+
+    return [
+        TradeMetrics(
+            token_a=token_a_values[pair_keys[code] // len(token_b_values)],
+            token_b=token_b_values[pair_keys[code] % len(token_b_values)],
+            last_price=float(last_price[i]),
+            min_price=float(min_price[i]),
+            max_price=float(max_price[i]),
+            volume_buy=float(volume_buy[i]),
+            volume_sell=float(volume_sell[i]),
+            up_moves_ratio=float(up_moves_ratio[i]),
+            max_up_streak=int(max_up_streak[i]),
+            max_down_streak=int(max_down_streak[i]),
+            trade_count=int(trade_counts[i]),
+        )
+        for i, code in enumerate(codes[starts])
+    ]
+
+
+@dataclass
+class _PairWindow:
+    """
+    Rolling state for a single token pair, in (block, arrival) order.
+    Streaks are counted by run length, so the longest one is still known when a run shrinks or
+    is split, and a late trade is inserted at its position by re-adding only the moves after it.
+    """
+
+    trades: deque = field(default_factory=deque)
+    min_prices: deque = field(default_factory=deque)
+    max_prices: deque = field(default_factory=deque)
+    volume_buy: int = 0
+    volume_sell: int = 0
+    changes: deque = field(default_factory=deque)
+    up_moves: int = 0
+    non_zero_moves: int = 0
+    runs: deque = field(default_factory=deque)
+    run_lengths: Dict[int, Dict[int, int]] = field(default_factory=lambda: {1: {}, -1: {}})
+    longest_runs: Dict[int, int] = field(default_factory=lambda: {1: 0, -1: 0})
+
+    def append(self, seq: int, block_number: int, price: float, buy: int, sell: int) -> None:
+        if self.trades:
+            self._add_change(int(np.sign(price - self.trades[-1][2])))
+
+        self.trades.append((seq, block_number, price, buy, sell))
+        self.volume_buy += buy
+        self.volume_sell += sell
+
+        while self.min_prices and self.min_prices[-1][2] >= price:
+            self.min_prices.pop()
+        self.min_prices.append((block_number, seq, price))
+        while self.max_prices and self.max_prices[-1][2] <= price:
+            self.max_prices.pop()
+        self.max_prices.append((block_number, seq, price))
+
+    def insert(self, seq: int, block_number: int, price: float, buy: int, sell: int) -> None:
+        """Insert a trade that arrived out of block order after the trades of its block"""
+        later = []
+        while self.trades and self.trades[-1][1] > block_number:
+            later.append(self.trades.pop())
+        later.reverse()
+
+        # The moves from the trade before the new one onwards are re-added below
+        for _ in range(len(later) if self.trades else len(later) - 1):
+            self._remove_change()
+        previous = self.trades[-1] if self.trades else None
+        trade = (seq, block_number, price, buy, sell)
+        for following in (trade, *later):
+            if previous is not None:
+                self._add_change(int(np.sign(following[2] - previous[2])))
+            previous = following
+        self.trades.append(trade)
+        self.trades.extend(later)
+        self.volume_buy += buy
+        self.volume_sell += sell
+
+        # Trades before the new one drop out of a monotonic deque as if it had been appended,
+        # and it only enters it when no later trade displaces it
+        for prices, displaces in (
+            (self.min_prices, float.__ge__),
+            (self.max_prices, float.__le__),
+        ):
+            later_entries = []
+            while prices and prices[-1][0] > block_number:
+                later_entries.append(prices.pop())
+            while prices and displaces(prices[-1][2], price):
+                prices.pop()
+            if not later_entries or not displaces(price, later_entries[-1][2]):
+                prices.append((block_number, seq, price))
+            prices.extend(reversed(later_entries))
+
+    def popleft(self) -> None:
+        seq, _, _, buy, sell = self.trades.popleft()
+        self.volume_buy -= buy
+        self.volume_sell -= sell
+
+        if self.min_prices[0][1] == seq:
+            self.min_prices.popleft()
+        if self.max_prices[0][1] == seq:
+            self.max_prices.popleft()
+
+        if self.changes:
+            change = self.changes.popleft()
+            self.up_moves -= change > 0
+            self.non_zero_moves -= change != 0
+            run = self.runs[0]
+            self._resize_run(run, -1)
+            if run[1] == 0:
+                self.runs.popleft()
+
+    def _add_change(self, change: int) -> None:
+        self.changes.append(change)
+        self.up_moves += change > 0
+        self.non_zero_moves += change != 0
+        if not self.runs or self.runs[-1][0] != change:
+            self.runs.append([change, 0])
+        self._resize_run(self.runs[-1], 1)
+
+    def _remove_change(self) -> None:
+        change = self.changes.pop()
+        self.up_moves -= change > 0
+        self.non_zero_moves -= change != 0
+        run = self.runs[-1]
+        self._resize_run(run, -1)
+        if run[1] == 0:
+            self.runs.pop()
+
+    def _resize_run(self, run: list, delta: int) -> None:
+        sign, length = run
+        run[1] += delta
+        if not sign:
+            return
+
+        lengths = self.run_lengths[sign]
+        if run[1]:
+            lengths[run[1]] = lengths.get(run[1], 0) + 1
+        if length:
+            lengths[length] -= 1
+            if not lengths[length]:
+                del lengths[length]
+
+        longest = self.longest_runs[sign]
+        if run[1] > longest:
+            self.longest_runs[sign] = run[1]
+        elif length == longest and longest not in lengths:
+            # Runs grow one move at a time, so walking down to the next length is amortised O(1)
+            while longest and longest not in lengths:
+                longest -= 1
+            self.longest_runs[sign] = longest
+
+    def to_metrics(self, token_a: str, token_b: str) -> TradeMetrics:
+        prices_count = len(self.trades)
+        streaks = len(self.runs) > 1
+        return TradeMetrics(
+            token_a=token_a,
+            token_b=token_b,
+            last_price=float(self.trades[-1][2]),
+            min_price=float(self.min_prices[0][2]),
+            max_price=float(self.max_prices[0][2]),
+            volume_buy=float(self.volume_buy),
+            volume_sell=float(self.volume_sell),
+            up_moves_ratio=(
+                self.up_moves / self.non_zero_moves
+                if prices_count >= 2 and self.non_zero_moves
+                else 0.5
+            ),
+            max_up_streak=self.longest_runs[1] if streaks else 0,
+            max_down_streak=self.longest_runs[-1] if streaks else 0,
+            trade_count=prices_count,
+        )
 
-    for _, pair in pairs_df.iterrows():
-        try:
-            pair_df = filtered_df[
-                (filtered_df.token_a == pair.token_a) & (filtered_df.token_b == pair.token_b)
-            ].sort_values("block_number")
 
-            pair_df = pair_df[pair_df.price.notna()]
+class RollingMetricsEngine:
+    """
+    Incrementally maintained equivalent of `_compute_metrics`.
+    Trades are ingested as they arrive and evicted once they fall out of the lookback window,
+    so each update costs O(new trades) instead of a full recompute. Pairs are indexed by token,
+    and a heap of their oldest blocks means eviction only visits pairs with expired trades,
+    which keeps both independent of the size of the token universe.
+    Safe to share between the live Trade handler and the block handlers.
+    """
 
-            if pair_df.empty:
+    def __init__(self, lookback_blocks: int = LOOKBACK_BLOCKS):
+        self.lookback_blocks = lookback_blocks
+        self.latest_block: int | None = None
+        self.pairs: Dict[tuple[str, str], _PairWindow] = {}
+        self.token_pairs: Dict[str, set] = defaultdict(set)
+        self._expiry: List[tuple[int, tuple[str, str]]] = []
+        self._seq = 0
+        self._lock = threading.RLock()
+
+    def update(self, trades: pd.DataFrame | List[Dict]) -> None:
+        """Ingest new trades (rows of the trade store schema)"""
+        if isinstance(trades, pd.DataFrame):
+            trades = trades.to_dict("records")
+
+        with self._lock:
+            self._update(trades)
+
+    def _update(self, trades: List[Dict]) -> None:
+        for trade in trades:
+            if pd.isna(trade["price"]):
                 continue
 
-            try:
-                volume_buy = pair_df.buyAmount.astype(float).sum()
-                volume_sell = pair_df.sellAmount.astype(float).sum()
-            except (ValueError, TypeError):
-                volume_buy = volume_sell = 0.0
-
-            prices = pair_df.price.values
-
-            up_moves_ratio = 0.5
-            max_up_streak = 0
-            max_down_streak = 0
-
-            if len(prices) >= 2:
-                price_changes = np.sign(np.diff(prices))
-                non_zero_moves = price_changes[price_changes != 0]
-
-                if len(non_zero_moves) > 0:
-                    up_moves_ratio = np.mean(non_zero_moves > 0)
-
-                if len(price_changes) > 1:
-                    try:
-                        change_points = np.where(price_changes[1:] != price_changes[:-1])[0] + 1
-                        if len(change_points) > 0:
-                            streaks = np.split(price_changes, change_points)
-                            max_up_streak = max(
-                                (len(s) for s in streaks if len(s) > 0 and s[0] > 0), default=0
-                            )
-                            max_down_streak = max(
-                                (len(s) for s in streaks if len(s) > 0 and s[0] < 0), default=0
-                            )
-                    except Exception:
-                        pass
-
-            metrics = TradeMetrics(
-                token_a=pair.token_a,
-                token_b=pair.token_b,
-                last_price=float(prices[-1]),
-                min_price=float(np.min(prices)),
-                max_price=float(np.max(prices)),
-                volume_buy=float(volume_buy),
-                volume_sell=float(volume_sell),
-                up_moves_ratio=float(up_moves_ratio),
-                max_up_streak=int(max_up_streak),
-                max_down_streak=int(max_down_streak),
-                trade_count=len(pair_df),
+            block_number = int(trade["block_number"])
+            pair_key = (trade["token_a"], trade["token_b"])
+            pair = self.pairs.get(pair_key)
+            if pair is None:
+                pair = self.pairs[pair_key] = _PairWindow()
+                for token in pair_key:
+                    self.token_pairs[token].add(pair_key)
+            row = (
+                self._seq,
+                block_number,
+                float(trade["price"]),
+                int(trade["buyAmount"]),
+                int(trade["sellAmount"]),
             )
-            metrics_list.append(metrics)
-        except Exception as e:
-            click.echo(f"Error processing pair {pair.token_a}-{pair.token_b}: {str(e)}")
-            continue
-
-    return metrics_list
+            self._seq += 1
+
+            if pair.trades and block_number < pair.trades[-1][1]:
+                oldest_block = pair.trades[0][1]
+                pair.insert(*row)
+                if block_number < oldest_block:
+                    self._push_expiry(pair_key)
+            elif not pair.trades:
+                pair.append(*row)
+                self._push_expiry(pair_key)
+            else:
+                pair.append(*row)
+
+            if self.latest_block is None or block_number > self.latest_block:
+                self.latest_block = block_number
+
+        self._evict()
+
+    def metrics(
+        self, tokens: AbstractSet[str] | None = None, token: str | None = None
+    ) -> List[TradeMetrics]:
+        """
+        Return metrics ordered like `_compute_metrics`, for every pair or only the pairs of
+        `token`, leaving out pairs with a token outside `tokens` when given
+        """
+        with self._lock:
+            self._evict()
+            pair_keys = self.token_pairs.get(token, ()) if token is not None else self.pairs
+            if tokens is not None:
+                pair_keys = [key for key in pair_keys if key[0] in tokens and key[1] in tokens]
+            ordered = sorted(pair_keys, key=lambda key: self.pairs[key].trades[0][1::-1])
+            return [self.pairs[key].to_metrics(*key) for key in ordered]
+
+    def _push_expiry(self, pair_key: tuple[str, str]) -> None:
+        """Schedule a pair for eviction once its oldest trade leaves the window"""
+        heapq.heappush(self._expiry, (self.pairs[pair_key].trades[0][1], pair_key))
+
+    def _evict(self) -> None:
+        if self.latest_block is None:
+            return
+
+        window_start = self.latest_block - self.lookback_blocks
+        while self._expiry and self._expiry[0][0] < window_start:
+            block_number, pair_key = heapq.heappop(self._expiry)
+            pair = self.pairs.get(pair_key)
+            # Entries go stale when a pair's oldest trade changes, which pushes a new entry
+            if pair is None or pair.trades[0][1] != block_number:
+                continue
+            while pair.trades and pair.trades[0][1] < window_start:
+                pair.popleft()
+            if pair.trades:
+                self._push_expiry(pair_key)
+            else:
+                self._remove(pair_key)
+
+    def _remove(self, pair_key: tuple[str, str]) -> None:
+        del self.pairs[pair_key]
+        for token in pair_key:
+            self.token_pairs[token].discard(pair_key)
+            if not self.token_pairs[token]:
+                del self.token_pairs[token]
+
+    def reload(self, trades: pd.DataFrame | List[Dict]) -> None:
+        """
+        Replace the window with `trades`, e.g. the stored history after a chain reorganisation.
+        Dropping the orphaned trades in place would shorten the window without restoring the
+        older trades it had already evicted.
+        """
+        if isinstance(trades, pd.DataFrame):
+            trades = trades.to_dict("records")
+
+        with self._lock:
+            self.latest_block = None
+            self.pairs = {}
+            self.token_pairs = defaultdict(set)
+            self._expiry = []
+            self._update(sorted(trades, key=lambda trade: int(trade["block_number"])))
 
 
 class TradeContext(BaseModel):
@@ -196,7 +1069,7 @@ class TradeContext(BaseModel):
     token_balances: Dict[str, int]
     metrics: List[TradeMetrics]
     prior_decisions: List[Dict]
-    lookback_blocks: int = 15000
+    lookback_blocks: int = LOOKBACK_BLOCKS
 
 
 @dataclass
@@ -205,6 +1078,8 @@ class AgentDependencies:
 
     trade_ctx: TradeContext
     sell_token: str | None
+    block_number: int | None = None
+    owner: str = SAFE_ADDRESS
 
 
 class AgentResponse(BaseModel):
@@ -225,27 +1100,40 @@ class AgentDecision(BaseModel):
     metrics_snapshot: List[TradeMetrics]
     profitable: int = 2
     valid: bool = False
+    cached: bool = False
+
+
+@dataclass
+class AgentRunStats:
+    """Wall time, tool calls and token usage of one decision"""
+
+    llm_seconds: float = 0.0
+    timed_out: bool = False
+    cached: bool = False
+    tool_calls: int = 0
+    llm_requests: int = 0
+    request_tokens: int = 0
+    response_tokens: int = 0
+    total_tokens: int = 0
 
 
 trading_agent = Agent(
     "anthropic:claude-3-sonnet-20240229",
     deps_type=AgentDependencies,
     result_type=AgentResponse,
-    system_prompt=SYSTEM_PROMPT,
 )
 
-TOKEN_NAMES = {
-    GNO: "GNO",
-    COW: "COW",
-    WXDAI: "WXDAI",
-}
+
+@trading_agent.system_prompt
+def system_prompt() -> str:
+    return _load_system_prompt()
 
 
 @trading_agent.tool_plain(retries=3)
 def get_token_name(address: str) -> str:
     """Return a human-readable token name for the provided address."""
     try:
-        return TOKEN_NAMES.get(address, address)
+        return TOKEN_UNIVERSE.names.get(address, address)
     except Exception as e:
         print(f"[get_token_name] failed with error: {e}")
         raise
@@ -256,7 +1144,7 @@ def get_eligible_buy_tokens(ctx: RunContext[AgentDependencies]) -> List[str]:
     """Return a list of tokens eligible for purchase (excluding the sell token)."""
     try:
         sell_token = ctx.deps.sell_token
-        return [token for token in MONITORED_TOKENS if token != sell_token]
+        return [token for token in TOKEN_UNIVERSE.tokens if token != sell_token]
     except Exception as e:
         print(f"[get_eligible_buy_tokens] failed with error: {e}")
         raise
@@ -266,7 +1154,7 @@ def get_eligible_buy_tokens(ctx: RunContext[AgentDependencies]) -> List[str]:
 def get_token_type(token: str) -> Dict:
     """Determine if the token is stable or volatile."""
     try:
-        is_stable = token == WXDAI
+        is_stable = token in CHAIN.stable_tokens
         return {
             "token": get_token_name(token),
             "is_stable": is_stable,
@@ -279,16 +1167,139 @@ def get_token_type(token: str) -> Dict:
         raise
 
 
+CONTEXT_SIGNIFICANT_DIGITS = 4
+METRICS_COLUMNS = [
+    "pair",
+    "last_price",
+    "min_price",
+    "max_price",
+    "volume_buy",
+    "volume_sell",
+    "up_moves_ratio",
+    "max_up_streak",
+    "max_down_streak",
+    "trade_count",
+]
+PRIOR_DECISIONS_COLUMNS = [
+    "block_number",
+    "should_trade",
+    "sell_token",
+    "buy_token",
+    "profitable",
+    "valid",
+    "price_change_pct",
+]
+
+
+def _round_sig(value: float, digits: int = CONTEXT_SIGNIFICANT_DIGITS) -> float:
+    return float(f"{value:.{digits}g}")
+
+
+def _encode_metrics(metrics: List[TradeMetrics], pair_name) -> Dict:
+    """Metrics as a table with one row per pair, named by `pair_name(token_a, token_b)`"""
+    rows = [
+        [
+            pair_name(m.token_a, m.token_b),
+            _round_sig(m.last_price),
+            _round_sig(m.min_price),
+            _round_sig(m.max_price),
+            _round_sig(m.volume_buy),
+            _round_sig(m.volume_sell),
+            round(m.up_moves_ratio, 2),
+            m.max_up_streak,
+            m.max_down_streak,
+            m.trade_count,
+        ]
+        for m in metrics
+    ]
+    return {"columns": METRICS_COLUMNS, "rows": rows}
+
+
+def _encode_trade_context(trade_ctx: TradeContext) -> Dict:
+    """
+    Compact encoding of a TradeContext for the agent: token names instead of addresses,
+    tables instead of lists of objects, floats rounded to significant digits, and prior decision
+    snapshots reduced to the last price change of each pair since the decision.
+    """
+    addresses = [*trade_ctx.token_balances]
+    for m in trade_ctx.metrics:
+        addresses += [m.token_a, m.token_b]
+
+    def pair_name(token_a: str, token_b: str) -> str:
+        return f"{get_token_name(token_a)}/{get_token_name(token_b)}"
+
+    last_prices = {pair_name(m.token_a, m.token_b): m.last_price for m in trade_ctx.metrics}
+
+    prior_rows = []
+    for d in trade_ctx.prior_decisions:
+        price_change_pct = {}
+        for snapshot in d["metrics_snapshot"]:
+            pair = pair_name(snapshot["token_a"], snapshot["token_b"])
+            if pair in last_prices and snapshot["last_price"]:
+                change = (last_prices[pair] / snapshot["last_price"] - 1) * 100
+                price_change_pct[pair] = round(change, 2)
+
+        prior_rows.append(
+            [
+                int(d["block_number"]),
+                bool(d["should_trade"]),
+                get_token_name(d["sell_token"]) if isinstance(d["sell_token"], str) else None,
+                get_token_name(d["buy_token"]) if isinstance(d["buy_token"], str) else None,
+                int(d["profitable"]),
+                bool(d["valid"]),
+                price_change_pct,
+            ]
+        )
+
+    return {
+        "tokens": {get_token_name(address): address for address in dict.fromkeys(addresses)},
+        "token_balances": {
+            get_token_name(token): str(balance)
+            for token, balance in trade_ctx.token_balances.items()
+        },
+        "lookback_blocks": trade_ctx.lookback_blocks,
+        "metrics": _encode_metrics(trade_ctx.metrics, pair_name),
+        "prior_decisions": {"columns": PRIOR_DECISIONS_COLUMNS, "rows": prior_rows},
+    }
+
+
 @trading_agent.tool(retries=3)
-def get_trading_context(ctx: RunContext[AgentDependencies]) -> TradeContext:
-    """Return the trading context from the agent's dependencies."""
+def get_trading_context(ctx: RunContext[AgentDependencies]) -> Dict:
+    """Return the compact trading context from the agent's dependencies."""
     try:
-        return ctx.deps.trade_ctx
+        return _encode_trade_context(ctx.deps.trade_ctx)
     except Exception as e:
         print(f"[get_trading_context] failed with error: {e}")
         raise
 
 
+def get_followed_chain_metrics() -> Dict[str, Dict]:
+    """Return pair metrics of the chains followed alongside this one, by chain ID."""
+    try:
+        followed = {}
+        for pipeline in _get_chain_pipelines():
+            names = _unique_token_names(pipeline.config.tokens)
+            followed[str(pipeline.config.chain_id)] = {
+                "network": pipeline.config.network,
+                "synced_block": pipeline.synced_block,
+                "metrics": _encode_metrics(
+                    pipeline.metrics(),
+                    lambda token_a, token_b: (
+                        f"{names.get(token_a, token_a)}/{names.get(token_b, token_b)}"
+                    ),
+                ),
+            }
+        return followed
+    except Exception as e:
+        print(f"[get_followed_chain_metrics] failed with error: {e}")
+        raise
+
+
+# Only offered to the agent when chains are followed alongside this one
+if FOLLOWED_CHAINS:
+    trading_agent.tool_plain(retries=3)(get_followed_chain_metrics)
+
+
 @trading_agent.tool(retries=3)
 def get_sell_token(ctx: RunContext[AgentDependencies]) -> str | None:
     """Return the sell token from the agent's dependencies."""
@@ -299,6 +1310,42 @@ def get_sell_token(ctx: RunContext[AgentDependencies]) -> str | None:
         raise
 
 
+@trading_agent.tool(retries=3)
+async def get_quotes(ctx: RunContext[AgentDependencies]) -> Dict[str, Dict]:
+    """Return live CoW Swap quotes for selling the sell token into each eligible buy token."""
+    try:
+        sell_token = ctx.deps.sell_token
+        if sell_token is None:
+            return {}
+
+        quotes = await _fetch_quotes(
+            sell_token=sell_token,
+            buy_tokens=get_eligible_buy_tokens(ctx),
+            sell_amount=ctx.deps.trade_ctx.token_balances[sell_token],
+            block_number=ctx.deps.block_number,
+            owner=ctx.deps.owner,
+        )
+        return {buy_token: _summarize_quote(quote) for buy_token, quote in quotes.items()}
+    except Exception as e:
+        print(f"[get_quotes] failed with error: {e}")
+        raise
+
+
+# The function tools registered on `trading_agent`, whose calls are counted in the run stats
+TRADING_AGENT_TOOLS = frozenset(
+    tool.__name__
+    for tool in (
+        get_token_name,
+        get_eligible_buy_tokens,
+        get_token_type,
+        get_trading_context,
+        get_sell_token,
+        get_quotes,
+        *([get_followed_chain_metrics] if FOLLOWED_CHAINS else []),
+    )
+)
+
+
 @trading_agent.system_prompt
 def encourage_trade(ctx: RunContext[AgentDependencies]) -> str:
     if ENCOURAGE_TRADE:
@@ -312,42 +1359,134 @@ def encourage_trade(ctx: RunContext[AgentDependencies]) -> str:
         return ""
 
 
-def _get_token_balances() -> Dict[str, int]:
-    """Get balances of monitored tokens using multicall"""
-    token_contracts = [Contract(token_address) for token_address in MONITORED_TOKENS]
-
+def _fetch_token_balances(
+    owners: List[str], block_number: int | None = None
+) -> Dict[str, Dict[str, int]]:
+    """Get balances of monitored tokens for every owner using a single multicall"""
+    tokens = TOKEN_UNIVERSE.tokens
     call = multicall.Call()
-    for contract in token_contracts:
-        call.add(contract.balanceOf, SAFE_ADDRESS)
+    for owner in owners:
+        for token_address in tokens:
+            call.add(_get_token_contract(token_address).balanceOf, owner)
+
+    _count("rpc_calls", "eth_call")
+    results = iter(call() if block_number is None else call(block_id=block_number))
 
-    results = list(call())
+    return {owner: dict(zip(tokens, results)) for owner in owners}
+
+
+class BalanceCache:
+    """
+    Balances of the monitored tokens for every portfolio Safe, fetched together once per block.
+    A lookup for a different block, or a Transfer involving one of the Safes, triggers a refetch.
+    """
 
-    return {token_address: balance for token_address, balance in zip(MONITORED_TOKENS, results)}
+    def __init__(self, owners: List[str]):
+        self.owners = list(owners)
+        self.block_number: int | None = None
+        self.balances: Dict[str, Dict[str, int]] | None = None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, block_number: int, owner: str = SAFE_ADDRESS) -> Dict[str, int]:
+        with self._lock:
+            if (
+                self.balances is not None
+                and self.block_number == block_number
+                and owner in self.balances
+            ):
+                self.hits += 1
+                _count("cache_lookups", "balance", "hit")
+            else:
+                self.misses += 1
+                _count("cache_lookups", "balance", "miss")
+                owners = self.owners if owner in self.owners else [*self.owners, owner]
+                self.balances = _fetch_token_balances(owners, block_number)
+                self.block_number = block_number
+            return dict(self.balances[owner])
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.balances = None
+            self.block_number = None
+
+    def stats(self) -> Dict[str, int]:
+        return {"balance_cache_hits": self.hits, "balance_cache_misses": self.misses}
+
+
+BALANCE_CACHE = BalanceCache(list(PORTFOLIO_SAFES))
+
+
+def _get_token_balances(
+    block_number: int | None = None, owner: str = SAFE_ADDRESS
+) -> Dict[str, int]:
+    """Get balances of monitored tokens, cached per block when `block_number` is given"""
+    with _span("get_token_balances"):
+        if block_number is None:
+            return _fetch_token_balances([owner])[owner]
+        return BALANCE_CACHE.get(block_number, owner)
 
 
 def _create_trade_context(
-    trades_df: pd.DataFrame, decisions_df: pd.DataFrame, lookback_blocks: int = 15000
+    trades_df: pd.DataFrame | None,
+    decisions_df: pd.DataFrame,
+    lookback_blocks: int = LOOKBACK_BLOCKS,
+    metrics_engine: RollingMetricsEngine | None = None,
+    block_number: int | None = None,
+    token_balances: Dict[str, int] | None = None,
+    owner: str = SAFE_ADDRESS,
+    sell_token: str | None = None,
 ) -> TradeContext:
-    """Create TradeContext with all required data"""
+    """
+    Create TradeContext with all required data, reading `owner`'s balances unless they are given.
+    Metrics come from `metrics_engine` when given, otherwise they are computed from `trades_df`.
+    Only pairs between tokens of the universe are included. Beyond CONTEXT_ALL_PAIRS_MAX_TOKENS
+    tokens, that is further narrowed to the pairs of `sell_token`, as all pairs grow
+    quadratically with the universe.
+    """
     prior_decisions = decisions_df.tail(3).copy()
     prior_decisions["metrics_snapshot"] = prior_decisions["metrics_snapshot"].apply(json.loads)
 
+    universe = TOKEN_UNIVERSE.token_set
+    token = sell_token if len(universe) > CONTEXT_ALL_PAIRS_MAX_TOKENS else None
+    if metrics_engine is not None:
+        metrics = metrics_engine.metrics(tokens=universe, token=token)
+    else:
+        metrics = [
+            m
+            for m in _compute_metrics(trades_df, lookback_blocks)
+            if m.token_a in universe
+            and m.token_b in universe
+            and token in (None, m.token_a, m.token_b)
+        ]
+
     return TradeContext(
-        token_balances=_get_token_balances(),
-        metrics=_compute_metrics(trades_df, lookback_blocks),
+        token_balances=(
+            _get_token_balances(block_number, owner) if token_balances is None else token_balances
+        ),
+        metrics=metrics,
         prior_decisions=prior_decisions.to_dict("records"),
         lookback_blocks=lookback_blocks,
     )
 
 
-def _select_sell_token() -> str | None:
+def _select_sell_token(
+    block_number: int | None = None,
+    balances: Dict[str, int] | None = None,
+    owner: str = SAFE_ADDRESS,
+    minimum_balances: Dict[str, float] | None = None,
+) -> str | None:
     """
-    Select token to sell based on current balances and minimum thresholds.
+    Select token to sell based on `owner`'s current balances and minimum thresholds, which
+    default to those of the token universe.
     Returns the token address that has a balance above threshold, or None if no token qualifies.
     """
-    balances = _get_token_balances()
+    if balances is None:
+        balances = _get_token_balances(block_number, owner)
+    minimum_balances = {**TOKEN_UNIVERSE.minimum_balances, **(minimum_balances or {})}
     valid_tokens = [
-        token for token in MONITORED_TOKENS if balances[token] > MINIMUM_TOKEN_BALANCES[token]
+        token for token, balance in balances.items() if balance > minimum_balances.get(token, 0)
     ]
     return valid_tokens[0] if valid_tokens else None
 
@@ -357,6 +1496,7 @@ def _build_decision(
     response: AgentResponse,
     metrics: List[TradeMetrics],
     sell_token: str,
+    cached: bool = False,
 ) -> AgentDecision:
     """Build decision dict from agent response"""
     return AgentDecision(
@@ -367,7 +1507,146 @@ def _build_decision(
         metrics_snapshot=metrics,
         reasoning=response.reasoning,
         valid=False,
+        cached=cached,
+    )
+
+
+async def _run_agent(
+    agent: Agent, deps: AgentDependencies, deadline_seconds: float = AGENT_DEADLINE_SECONDS
+) -> tuple[AgentResponse, AgentRunStats]:
+    """
+    Run the agent on the current event loop, giving up after `deadline_seconds`.
+    A timed out run yields a no-trade response. Returns the response and the run stats.
+    """
+    usage = Usage()
+    timed_out = False
+    started = time.perf_counter()
+
+    with capture_run_messages() as messages, _span("agent_run"):
+        try:
+            result = await asyncio.wait_for(
+                agent.run(
+                    "Analyze current market conditions and make a trading decision",
+                    deps=deps,
+                    usage=usage,
+                ),
+                timeout=deadline_seconds,
+            )
+            response = result.data
+        except asyncio.TimeoutError:
+            timed_out = True
+            response = AgentResponse(
+                should_trade=False,
+                buy_token=None,
+                reasoning=f"No decision within the {deadline_seconds:g}s agent deadline",
+            )
+
+    tool_calls = sum(
+        isinstance(part, ToolCallPart) and part.tool_name in TRADING_AGENT_TOOLS
+        for message in messages
+        if isinstance(message, ModelResponse)
+        for part in message.parts
+    )
+
+    return response, AgentRunStats(
+        llm_seconds=round(time.perf_counter() - started, 3),
+        timed_out=timed_out,
+        tool_calls=tool_calls,
+        llm_requests=usage.requests,
+        request_tokens=usage.request_tokens or 0,
+        response_tokens=usage.response_tokens or 0,
+        total_tokens=usage.total_tokens or 0,
+    )
+
+
+def _bucket(value: float, tolerance: float) -> float | int:
+    """Bucket positive values on a log scale so values within ~`tolerance` (relative) match"""
+    if tolerance <= 0 or value <= 0:
+        return value
+    return round(math.log(value) / math.log1p(tolerance))
+
+
+def _decision_cache_key(trade_ctx: TradeContext, sell_token: str | None) -> str:
+    """Canonical hash of the trading context, with prices and amounts bucketed to tolerances"""
+    price_tol = DECISION_CACHE_PRICE_TOLERANCE
+    amount_tol = DECISION_CACHE_AMOUNT_TOLERANCE
+
+    metrics = sorted(
+        (
+            m.token_a,
+            m.token_b,
+            _bucket(m.last_price, price_tol),
+            _bucket(m.min_price, price_tol),
+            _bucket(m.max_price, price_tol),
+            _bucket(m.volume_buy, amount_tol),
+            _bucket(m.volume_sell, amount_tol),
+            _bucket(m.trade_count, amount_tol),
+            round(m.up_moves_ratio, 2),
+            m.max_up_streak,
+            m.max_down_streak,
+        )
+        for m in trade_ctx.metrics
     )
+    balances = sorted(
+        (token, _bucket(float(balance), amount_tol))
+        for token, balance in trade_ctx.token_balances.items()
+    )
+    prior_decisions = [
+        (
+            bool(d["should_trade"]),
+            d["sell_token"] if isinstance(d["sell_token"], str) else None,
+            d["buy_token"] if isinstance(d["buy_token"], str) else None,
+            int(d["profitable"]),
+            bool(d["valid"]),
+        )
+        for d in trade_ctx.prior_decisions
+    ]
+
+    payload = [sell_token, trade_ctx.lookback_blocks, metrics, balances, prior_decisions]
+    return hashlib.sha256(json.dumps(payload).encode()).hexdigest()
+
+
+class DecisionCache:
+    """
+    Agent responses keyed by `_decision_cache_key`, reused while the context stays within tolerance.
+    Entries expire after `ttl_blocks`; the least recently used entry is evicted when full.
+    """
+
+    def __init__(
+        self,
+        ttl_blocks: int = DECISION_CACHE_TTL_BLOCKS,
+        max_entries: int = DECISION_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_blocks = ttl_blocks
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, tuple[int, AgentResponse]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, block_number: int) -> AgentResponse | None:
+        entry = self.entries.get(key)
+        if entry is not None and block_number - entry[0] > self.ttl_blocks:
+            del self.entries[key]
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            _count("cache_lookups", "decision", "miss")
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        _count("cache_lookups", "decision", "hit")
+        return entry[1]
+
+    def put(self, key: str, block_number: int, response: AgentResponse) -> None:
+        self.entries[key] = (block_number, response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"decision_cache_hits": self.hits, "decision_cache_misses": self.misses}
 
 
 def _validate_decision(decision: AgentDecision) -> bool:
@@ -377,34 +1656,76 @@ def _validate_decision(decision: AgentDecision) -> bool:
     if not decision.should_trade or decision.sell_token is None or decision.buy_token is None:
         return False
 
-    if decision.buy_token not in MONITORED_TOKENS or decision.buy_token == decision.sell_token:
+    if (
+        decision.buy_token not in TOKEN_UNIVERSE.token_set
+        or decision.buy_token == decision.sell_token
+    ):
         click.echo(f"Invalid buy token: buy={decision.buy_token}")
         return False
 
     return True
 
 
-def _save_decision(decision: AgentDecision) -> pd.DataFrame:
-    """Save validated decision to database"""
-    decisions_df = _load_decisions_db()
-
-    new_decision = {
+def _decision_record(decision: AgentDecision) -> Dict:
+    """Flatten a decision into a decisions store row"""
+    return {
         "block_number": decision.block_number,
         "should_trade": decision.should_trade,
         "sell_token": decision.sell_token,
         "buy_token": decision.buy_token,
-        "metrics_snapshot": json.dumps([m.dict() for m in decision.metrics_snapshot]),
+        "metrics_snapshot": json.dumps([m.model_dump() for m in decision.metrics_snapshot]),
         "profitable": decision.profitable,
         "valid": decision.valid,
+        "cached": decision.cached,
     }
 
-    decisions_df = pd.concat([decisions_df, pd.DataFrame([new_decision])], ignore_index=True)
-    _save_decisions_db(decisions_df)
-    return decisions_df
+
+def _save_decision(decision: AgentDecision, namespace: str | None = None) -> pd.DataFrame:
+    """Save validated decision to database"""
+    storage = _get_storage(namespace)
+    storage.insert_decision(_decision_record(decision))
+    return storage.load_decisions()
+
+
+def _decision_outcome(
+    decision: Dict | pd.Series, final_price: float | None, order: Dict | None = None
+) -> int | None:
+    """
+    Judge a trade decision against the pair's price now: 1 if profitable, 0 if not.
+    When the decision's order filled, its execution price is the reference instead of the
+    market price at decision time. Returns None when the outcome cannot be judged yet, or for
+    orders that closed without a fill.
+    """
+    if not decision["should_trade"]:
+        return None
+
+    executed_sell = 0 if order is None else int(order["executedSellAmount"])
+    closed = order is not None and order["status"] not in ORDER_OPEN_STATUSES
+    if final_price is None or (closed and executed_sell == 0):
+        return None
+
+    metrics = json.loads(decision["metrics_snapshot"])
+    initial_price = next(
+        m["last_price"]
+        for m in metrics
+        if m["token_a"] == decision["sell_token"] and m["token_b"] == decision["buy_token"]
+    )
+    if executed_sell > 0:
+        initial_price = int(order["executedBuyAmount"]) / executed_sell
+
+    profitable = (
+        final_price > initial_price
+        if decision["sell_token"] == metrics[0]["token_a"]
+        else final_price < initial_price
+    )
+    return int(profitable)
 
 
 def _update_latest_decision_outcome(
-    decisions_df: pd.DataFrame, final_price: float | None = None
+    decisions_df: pd.DataFrame,
+    final_price: float | None = None,
+    order: Dict | None = None,
+    namespace: str | None = None,
 ) -> pd.DataFrame:
     """Update most recent decision with outcome data"""
     if decisions_df.empty:
@@ -413,140 +1734,1005 @@ def _update_latest_decision_outcome(
     latest_idx = decisions_df.index[-1]
     latest_decision = decisions_df.iloc[-1]
 
-    if latest_decision.should_trade:
-        if final_price is None:
-            return decisions_df
-        else:
-            metrics = json.loads(latest_decision.metrics_snapshot)
-            initial_price = next(
-                m["last_price"]
-                for m in metrics
-                if m["token_a"] == latest_decision.sell_token
-                and m["token_b"] == latest_decision.buy_token
-            )
+    profitable = _decision_outcome(latest_decision, final_price, order)
+    if profitable is not None:
+        decisions_df.loc[latest_idx, "profitable"] = profitable
+        _get_storage(namespace).update_decision_outcome(latest_decision.block_number, profitable)
+
+    return decisions_df
 
-            profitable = (
-                final_price > initial_price
-                if latest_decision.sell_token == metrics[0]["token_a"]
-                else final_price < initial_price
-            )
 
-            decisions_df.loc[latest_idx, "profitable"] = int(profitable)
+def _save_reasoning(
+    block_number: int,
+    reasoning: str,
+    run_stats: Dict | None = None,
+    namespace: str | None = None,
+) -> None:
+    """Save agent reasoning, along with the agent run stats"""
+    entry = {"block_number": block_number, "reasoning": reasoning, **(run_stats or {})}
+    _get_storage(namespace).insert_reasoning(entry)
 
-        _save_decisions_db(decisions_df)
 
-    return decisions_df
+# Local storage helper functions
+TRADES_DTYPE = {
+    "block_number": "int64",
+    "owner": "category",
+    "sellToken": "category",
+    "buyToken": "category",
+    "sellAmount": "float64",
+    "buyAmount": "float64",
+    "token_a": "category",
+    "token_b": "category",
+    "price": "float64",
+}
+# Exact uint256 amounts as 32-byte big-endian values, stored alongside and loaded on request
+TRADES_RAW_COLUMNS = {"sellAmount": "sellAmountRaw", "buyAmount": "buyAmountRaw"}
+TRADES_SCHEMA_VERSION = 3
+TRADES_ARROW_SCHEMA = pa.schema(
+    [
+        ("block_number", pa.int64()),
+        *[
+            (column, pa.dictionary(pa.int32(), pa.string()))
+            for column in ("owner", "sellToken", "buyToken")
+        ],
+        ("sellAmount", pa.float64()),
+        ("buyAmount", pa.float64()),
+        ("token_a", pa.dictionary(pa.int32(), pa.string())),
+        ("token_b", pa.dictionary(pa.int32(), pa.string())),
+        ("price", pa.float64()),
+        *[(raw, pa.binary(32)) for raw in TRADES_RAW_COLUMNS.values()],
+    ]
+)
+# Rollbacks recorded in the manifest for other workers to replay
+TRADE_STORE_ROLLBACKS_KEPT = 64
+TRADE_COLD_DIRNAME = "cold"
 
 
-def _save_reasoning(block_number: int, reasoning: str) -> None:
-    """Save agent reasoning to JSON file"""
-    os.makedirs(os.path.dirname(REASONING_FILEPATH), exist_ok=True)
+def _uint256_bytes(value: int) -> bytes:
+    return int(value).to_bytes(32, "big")
 
-    entry = {"block_number": block_number, "reasoning": reasoning}
 
-    with open(REASONING_FILEPATH, "a") as f:
-        f.write(json.dumps(entry) + "\n")
+def _worker_id() -> str:
+    """Identify this process as a trade store writer; evaluated per call, as workers fork"""
+    return f"{socket.gethostname()}:{os.getpid()}"
 
 
-# Local storage helper functions
-def _load_trades_db() -> pd.DataFrame:
-    """Load trades database from CSV file or create new if doesn't exist"""
-    dtype = {
-        "block_number": int,
-        "owner": str,
-        "sellToken": str,
-        "buyToken": str,
-        "sellAmount": str,
-        "buyAmount": str,
-    }
+def _write_trades_file(trades: pd.DataFrame, path: Path) -> None:
+    """
+    Write trades as an uncompressed Arrow IPC file, which readers can memory-map.
+    Raw amounts are 32-byte binary, null when unknown. Categories not used by the rows, as
+    left by slicing a larger frame, are dropped so they are not written into the dictionaries.
+    """
+    df = trades.reindex(columns=TRADES_ARROW_SCHEMA.names)
+    for column in df.select_dtypes("category"):
+        df[column] = df[column].cat.remove_unused_categories()
+    for raw in TRADES_RAW_COLUMNS.values():
+        df[raw] = df[raw].astype(object)
+    table = pa.Table.from_pandas(df, schema=TRADES_ARROW_SCHEMA, preserve_index=False)
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, TRADES_ARROW_SCHEMA) as writer:
+        writer.write_table(table)
 
-    df = (
-        pd.read_csv(TRADE_FILEPATH, dtype=dtype)
-        if os.path.exists(TRADE_FILEPATH)
-        else pd.DataFrame(columns=dtype.keys()).astype(dtype)
-    )
-    return df
+
+def _read_trades_file(path: Path) -> pa.Table:
+    """Memory-map a trade store segment; the table shares the OS page cache between processes"""
+    return pa.ipc.open_file(pa.memory_map(str(path))).read_all()
 
 
-def _save_trades_db(trades_dict: Dict) -> None:
+def _typed_trades(trades: pd.DataFrame | List[Dict]) -> pd.DataFrame:
     """
-    Save trades dictionary back to CSV file.
+    Convert trades to the trade store schema.
+    Integer or string amounts are parsed once: into float64 amounts for analytics and, unless
+    already present, into exact raw columns. Float amounts carry no exact raw value.
     """
-    df = pd.DataFrame(trades_dict)
-    df.to_csv(TRADE_FILEPATH, index=False)
+    df = pd.DataFrame(trades, columns=None if len(trades) else list(TRADES_DTYPE))
+    raw_columns = {}
+    for amount, raw in TRADES_RAW_COLUMNS.items():
+        if raw in df:
+            raw_columns[raw] = df[raw]
+        elif len(df) and not pd.api.types.is_float_dtype(df[amount]):
+            raw_columns[raw] = [_uint256_bytes(value) for value in df[amount]]
+    return df[list(TRADES_DTYPE)].assign(**raw_columns).astype(TRADES_DTYPE)
+
+
+def _trade_store_path(namespace: str | None = None) -> Path:
+    """Trade store directory of the bot's own chain, or of a followed chain's namespace"""
+    if namespace is None:
+        return Path(TRADE_STORE_DIRPATH)
+    return Path(NAMESPACES_DIRPATH) / namespace / "trades"
+
+
+def _load_trade_manifest(namespace: str | None = None) -> Dict:
+    """Load trade store manifest from JSON file or create new if doesn't exist"""
+    manifest_path = _trade_store_path(namespace) / "manifest.json"
+    if not manifest_path.exists():
+        return {
+            "segments": [],
+            "imported_csv": None,
+            "schema_version": TRADES_SCHEMA_VERSION,
+            "next_seq": 0,
+            "rollbacks": [],
+            "cold": [],
+        }
 
+    with manifest_path.open() as f:
+        return json.load(f)
 
-def _load_block_db() -> int:
-    """Load the last processed block from CSV file or create new if doesn't exist"""
-    df = (
-        pd.read_csv(BLOCK_FILEPATH)
-        if os.path.exists(BLOCK_FILEPATH)
-        else pd.DataFrame({"last_processed_block": [START_BLOCK]})
-    )
-    return df["last_processed_block"].iloc[0]
 
+def _save_trade_manifest(manifest: Dict, namespace: str | None = None) -> None:
+    """Atomically replace the trade store manifest"""
+    store_path = _trade_store_path(namespace)
+    os.makedirs(store_path, exist_ok=True)
+    manifest_path = store_path / "manifest.json"
+    tmp_path = manifest_path.with_suffix(".tmp")
 
-def _save_block_db(block_number: int) -> None:
-    """Save the last processed block to CSV file"""
-    os.makedirs(os.path.dirname(BLOCK_FILEPATH), exist_ok=True)
-    df = pd.DataFrame({"last_processed_block": [block_number]})
-    df.to_csv(BLOCK_FILEPATH, index=False)
+    with tmp_path.open("w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
 
 
-def _load_orders_db() -> pd.DataFrame:
+def _next_seq(manifest: Dict) -> int:
+    """Allocate the next write sequence number, the cursor `TradeCache` tails the store by"""
+    seq = manifest.get("next_seq", 0)
+    manifest["next_seq"] = seq + 1
+    return seq
+
+
+def _append_trades_segment(
+    trades: pd.DataFrame | List[Dict],
+    start_block: int,
+    stop_block: int,
+    writer: str | None = None,
+    namespace: str | None = None,
+) -> None:
     """
-    Load orders database from CSV file or create new if doesn't exist
+    Append trades covering blocks [start_block, stop_block] to the trade store.
+    Only the new segment is written; ranges without trades are recorded in the manifest only.
+    `writer` marks trades its process has already fed to its metrics engine.
     """
-    dtype = {
-        "orderUid": str,
-        "signed": bool,
-        "sellToken": str,
-        "buyToken": str,
-        "receiver": str,
-        "sellAmount": str,
-        "buyAmount": str,
-        "validTo": int,
-    }
+    manifest = _load_trade_manifest(namespace)
+    df = _typed_trades(trades)
+    segment = {"start_block": start_block, "stop_block": stop_block, "rows": len(df)}
+
+    if not df.empty:
+        store_path = _trade_store_path(namespace)
+        os.makedirs(store_path, exist_ok=True)
+        filename = f"trades_{start_block:012d}_{stop_block:012d}.arrow"
+        _write_trades_file(df, store_path / filename)
+        segment["file"] = filename
+        segment["last_trade_block"] = int(df.block_number.max())
+        segment["seq"] = _next_seq(manifest)
+        segment["writer"] = writer
+        manifest["segments"].append(segment)
+    else:
+        previous = manifest["segments"][-1] if manifest["segments"] else None
+        if previous and not previous.get("file") and previous["stop_block"] + 1 == start_block:
+            previous["stop_block"] = stop_block
+        else:
+            manifest["segments"].append(segment)
+
+    _save_trade_manifest(manifest, namespace)
+
+
+def _rollback_trade_store(from_block: int, namespace: str | None = None) -> None:
+    """
+    Remove stored trades from `from_block` onwards, from hot segments and cold partitions alike,
+    so the range is fetched again. A segment or partition spanning `from_block` is rewritten with
+    its earlier rows; superseded files are deleted only after the manifest no longer references
+    them. The rollback is recorded so other workers can roll back their metrics engines.
+    """
+    manifest = _load_trade_manifest(namespace)
+    store_path = _trade_store_path(namespace)
+    segments, stale_files = [], []
+    rollback = {"seq": _next_seq(manifest), "from_block": from_block, "writer": _worker_id()}
+    manifest["rollbacks"] = [*manifest.get("rollbacks", []), rollback][-TRADE_STORE_ROLLBACKS_KEPT:]
+
+    for segment in manifest["segments"]:
+        if segment["stop_block"] < from_block:
+            segments.append(segment)
+            continue
+
+        if segment.get("file"):
+            stale_files.append(store_path / segment["file"])
+        if segment["start_block"] >= from_block:
+            continue
+
+        trimmed = {"start_block": segment["start_block"], "stop_block": from_block - 1, "rows": 0}
+        if segment.get("file"):
+            table = _read_trades_file(store_path / segment["file"])
+            df = table.filter(pc.field("block_number") < from_block).to_pandas()
+            if not df.empty:
+                filename = f"trades_{trimmed['start_block']:012d}_{from_block - 1:012d}.arrow"
+                _write_trades_file(df, store_path / filename)
+                # The rows are already known to every worker that read the original segment
+                trimmed.update(
+                    rows=len(df),
+                    file=filename,
+                    last_trade_block=int(df.block_number.max()),
+                    seq=_next_seq(manifest),
+                    writer=segment.get("writer"),
+                    trimmed=True,
+                )
+        segments.append(trimmed)
+
+    partitions = []
+    for partition in manifest.get("cold", []):
+        if partition["stop_block"] < from_block:
+            partitions.append(partition)
+            continue
+
+        stale_files.append(store_path / partition["file"])
+        if partition["start_block"] >= from_block:
+            continue
+        table = pq.read_table(store_path / partition["file"], schema=TRADES_ARROW_SCHEMA)
+        table = table.filter(pc.field("block_number") < from_block)
+        if table.num_rows:
+            last_block = table["block_number"][-1].as_py()
+            filename = (
+                f"{TRADE_COLD_DIRNAME}/trades_{partition['start_block']:012d}_{last_block:012d}"
+                ".parquet"
+            )
+            pq.write_table(table, store_path / filename, compression="zstd")
+            partitions.append(
+                {**partition, "file": filename, "stop_block": last_block, "rows": table.num_rows}
+            )
 
-    df = (
-        pd.read_csv(ORDERS_FILEPATH, dtype=dtype)
-        if os.path.exists(ORDERS_FILEPATH)
-        else pd.DataFrame(columns=dtype.keys()).astype(dtype)
+    manifest["segments"] = segments
+    manifest["cold"] = partitions
+    _save_trade_manifest(manifest, namespace)
+    for path in stale_files:
+        path.unlink(missing_ok=True)
+
+
+def _trade_store_cursor(namespace: str | None = None) -> int | None:
+    """Return the last block of the contiguous range covered by the trade store"""
+    segments = sorted(_load_trade_manifest(namespace)["segments"], key=lambda s: s["start_block"])
+    if not segments:
+        return None
+
+    cursor = segments[0]["stop_block"]
+    for segment in segments[1:]:
+        if segment["start_block"] > cursor + 1:
+            break
+        cursor = max(cursor, segment["stop_block"])
+    return cursor
+
+
+def _trade_store_start() -> int | None:
+    """Return the first block the trade store is expected to cover"""
+    manifest = _load_trade_manifest()
+    starts = [s["start_block"] for s in manifest["segments"]]
+    if manifest.get("start_block") is not None:
+        starts.append(manifest["start_block"])
+    return min(starts) if starts else None
+
+
+def _missing_block_ranges(
+    start_block: int, stop_block: int, namespace: str | None = None
+) -> List[tuple[int, int]]:
+    """Return the block ranges within [start_block, stop_block] not covered by the trade store"""
+    covered = sorted(
+        (s["start_block"], s["stop_block"]) for s in _load_trade_manifest(namespace)["segments"]
     )
-    return df
+    missing = []
+    cursor = start_block
+
+    for covered_start, covered_stop in covered:
+        if covered_stop < cursor:
+            continue
+        if covered_start > stop_block:
+            break
+        if covered_start > cursor:
+            missing.append((cursor, covered_start - 1))
+        cursor = covered_stop + 1
+
+    if cursor <= stop_block:
+        missing.append((cursor, stop_block))
+    return missing
+
+
+def _last_trade_block(namespace: str | None = None) -> int | None:
+    """Return the block number of the most recent stored trade"""
+    manifest = _load_trade_manifest(namespace)
+    blocks = [s["last_trade_block"] for s in manifest["segments"] if s.get("file")]
+    blocks += [p["stop_block"] for p in manifest.get("cold", [])]
+    return max(blocks) if blocks else None
+
+
+def _archive_trade_store(
+    retention_blocks: int = TRADE_RETENTION_BLOCKS,
+    partition_blocks: int = COLD_PARTITION_BLOCKS,
+    namespace: str | None = None,
+) -> int:
+    """
+    Move hot segments ending more than `retention_blocks` before the last stored trade into
+    cold partitions: zstd-compressed Parquet files of at most `partition_blocks` blocks, which
+    `_load_trades_db` still reads. Archiving waits until a partition's worth of blocks has aged
+    out, so short live segments are compacted into few files. The archived ranges stay in the
+    manifest as covered. Returns the number of archived trades.
+    """
+    manifest = _load_trade_manifest(namespace)
+    hot = [s for s in manifest["segments"] if s.get("file")]
+    if not hot:
+        return 0
+
+    cutoff = max(s["last_trade_block"] for s in hot) - retention_blocks
+    expired = sorted((s for s in hot if s["stop_block"] < cutoff), key=lambda s: s["start_block"])
+    if not expired or cutoff - expired[0]["start_block"] < partition_blocks:
+        return 0
+
+    store_path = _trade_store_path(namespace)
+    os.makedirs(store_path / TRADE_COLD_DIRNAME, exist_ok=True)
+    table = pa.concat_tables(_read_trades_file(store_path / s["file"]) for s in expired)
+    buckets = pc.divide(table["block_number"], partition_blocks)
+    partitions = []
+    for bucket in pc.unique(buckets).to_pylist():
+        partition = table.filter(pc.equal(buckets, bucket)).sort_by("block_number")
+        first_block = partition["block_number"][0].as_py()
+        last_block = partition["block_number"][-1].as_py()
+        filename = f"{TRADE_COLD_DIRNAME}/trades_{first_block:012d}_{last_block:012d}.parquet"
+        pq.write_table(partition, store_path / filename, compression="zstd")
+        partitions.append(
+            {
+                "file": filename,
+                "start_block": first_block,
+                "stop_block": last_block,
+                "rows": partition.num_rows,
+            }
+        )
+
+    # Collapse the archived and empty ranges below the cutoff into covered-only entries
+    archived = {s["file"] for s in expired}
+    covered, segments = [], []
+    for segment in sorted(manifest["segments"], key=lambda s: s["start_block"]):
+        if segment["stop_block"] >= cutoff or (
+            segment.get("file") and segment["file"] not in archived
+        ):
+            segments.append(segment)
+        elif covered and covered[-1]["stop_block"] + 1 >= segment["start_block"]:
+            covered[-1]["stop_block"] = max(covered[-1]["stop_block"], segment["stop_block"])
+        else:
+            covered.append(
+                {
+                    "start_block": segment["start_block"],
+                    "stop_block": segment["stop_block"],
+                    "rows": 0,
+                }
+            )
 
+    manifest["segments"] = covered + segments
+    manifest["cold"] = [*manifest.get("cold", []), *partitions]
+    _save_trade_manifest(manifest, namespace)
+    for filename in archived:
+        (store_path / filename).unlink(missing_ok=True)
+    return table.num_rows
 
-def _save_orders_db(df: pd.DataFrame) -> None:
-    """Save orders to CSV file"""
-    os.makedirs(os.path.dirname(ORDERS_FILEPATH), exist_ok=True)
-    df.to_csv(ORDERS_FILEPATH, index=False)
 
+def _load_trades_db(
+    start_block: int | None = None, raw_amounts: bool = False, namespace: str | None = None
+) -> pd.DataFrame:
+    """
+    Load trades from the trade store, reading only segments and cold partitions that overlap
+    blocks >= start_block. Both are read as one dataset so token and owner dictionaries are
+    unified, not re-encoded. The exact raw amount columns are only read with `raw_amounts`.
+    """
+    store_path = _trade_store_path(namespace)
+    manifest = _load_trade_manifest(namespace)
+    columns = TRADES_ARROW_SCHEMA.names if raw_amounts else list(TRADES_DTYPE)
+
+    datasets = []
+    for entries, file_format in (
+        (manifest.get("cold", []), "parquet"),
+        (manifest["segments"], "arrow"),
+    ):
+        paths = [
+            str(store_path / entry["file"])
+            for entry in sorted(entries, key=lambda e: e["start_block"])
+            if entry.get("file") and (start_block is None or entry["stop_block"] >= start_block)
+        ]
+        if paths:
+            datasets.append(ds.dataset(paths, schema=TRADES_ARROW_SCHEMA, format=file_format))
+
+    if not datasets:
+        return pd.DataFrame(columns=columns).astype(TRADES_DTYPE)
+    dataset = ds.dataset(datasets)
+    block_filter = ds.field("block_number") >= start_block if start_block is not None else None
+    return dataset.to_table(columns=columns, filter=block_filter).to_pandas()
+
+
+def _load_lookback_trades(
+    lookback_blocks: int = LOOKBACK_BLOCKS, namespace: str | None = None
+) -> pd.DataFrame:
+    """Load only the trades within lookback_blocks of the most recent stored trade"""
+    last_trade_block = _last_trade_block(namespace)
+    if last_trade_block is None:
+        return _load_trades_db(namespace=namespace)
+    return _load_trades_db(start_block=last_trade_block - lookback_blocks, namespace=namespace)
+
+
+@dataclass
+class TradeCacheUpdate:
+    """Trade store changes picked up by `TradeCache.refresh`"""
+
+    rows: pa.Table
+    rollback_block: int | None = None
+    segments: int = 0
+
+
+class TradeCache:
+    """
+    Read-only view of the trade store shared by the workers of a host.
+    Segments are memory-mapped Arrow IPC files, so the table is backed by the OS page cache
+    rather than a private copy per worker. `refresh` tails the manifest from the last write
+    sequence number seen, at a cost proportional to the segments written since. Only segments
+    within `retention_blocks` of the last stored trade are kept mapped.
+    """
+
+    def __init__(self, retention_blocks: int | None = TRADE_RETENTION_BLOCKS):
+        self.retention_blocks = retention_blocks
+        self.cursor = -1
+        self.tables: Dict[str, pa.Table] = {}
+        self.start_blocks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> TradeCacheUpdate:
+        """
+        Map segments written since the last refresh and drop segments that were removed from
+        the store or aged out of the retention window. Returns the rows this worker has not
+        seen yet within the window: those of new segments written by other processes, as this
+        process feeds its own writes to its metrics engine. Rollbacks by other processes are
+        returned as the earliest block to roll back from.
+        """
+        manifest = _load_trade_manifest()
+        worker_id = _worker_id()
+        store_path = Path(TRADE_STORE_DIRPATH)
+
+        with self._lock:
+            listed = {s["file"]: s for s in manifest["segments"] if s.get("file")}
+            window_start = None
+            if self.retention_blocks is not None and listed:
+                last_trade_block = max(s["last_trade_block"] for s in listed.values())
+                window_start = last_trade_block - self.retention_blocks
+
+            def in_window(segment: Dict) -> bool:
+                return window_start is None or segment["stop_block"] >= window_start
+
+            for filename in [f for f in self.tables if f not in listed or not in_window(listed[f])]:
+                del self.tables[filename], self.start_blocks[filename]
+
+            rollback_block = min(
+                (
+                    rollback["from_block"]
+                    for rollback in manifest.get("rollbacks", [])
+                    if rollback["seq"] > self.cursor and rollback["writer"] != worker_id
+                ),
+                default=None,
+            )
+
+            new_segments = sorted(
+                (s for s in listed.values() if s["seq"] > self.cursor), key=lambda s: s["seq"]
+            )
+            rows = []
+            for segment in [s for s in new_segments if in_window(s)]:
+                table = _read_trades_file(store_path / segment["file"])
+                self.tables[segment["file"]] = table
+                self.start_blocks[segment["file"]] = segment["start_block"]
+                if not segment.get("trimmed") and segment["writer"] != worker_id:
+                    rows.append(table)
+
+            self.cursor = max(self.cursor, manifest.get("next_seq", 0) - 1)
+
+        rows = pa.concat_tables(rows) if rows else TRADES_ARROW_SCHEMA.empty_table()
+        if window_start is not None:
+            rows = rows.filter(pc.field("block_number") >= window_start)
+        return TradeCacheUpdate(
+            rows=rows,
+            rollback_block=rollback_block,
+            segments=len(new_segments),
+        )
+
+    def table(self, start_block: int | None = None) -> pa.Table:
+        """Cached trades in block order, from `start_block` onwards, without copying"""
+        with self._lock:
+            files = sorted(self.tables, key=self.start_blocks.get)
+            tables = [self.tables[f] for f in files]
+        if not tables:
+            return TRADES_ARROW_SCHEMA.empty_table()
+        table = pa.concat_tables(tables)
+        if start_block is not None:
+            table = table.filter(pc.field("block_number") >= start_block)
+        return table
+
+    def rows(self) -> int:
+        with self._lock:
+            return sum(t.num_rows for t in self.tables.values())
+
+
+def _trades_frame(table: pa.Table) -> pd.DataFrame:
+    """Convert cached trades to the in-memory trade schema, without the raw amount columns"""
+    return table.select(list(TRADES_DTYPE)).to_pandas()
+
+
+def _refresh_trade_cache(
+    trade_cache: TradeCache, metrics_engine: RollingMetricsEngine
+) -> TradeCacheUpdate:
+    """
+    Bring a worker's metrics engine up to date with trade store writes by other processes.
+    After another process's rollback the engine is reloaded from the cache, as trades it had
+    evicted may fall back into the shortened window.
+    """
+    update = trade_cache.refresh()
+    if update.rollback_block is not None:
+        last_trade_block = _last_trade_block()
+        start_block = (
+            last_trade_block - metrics_engine.lookback_blocks
+            if last_trade_block is not None
+            else None
+        )
+        metrics_engine.reload(_trades_frame(trade_cache.table(start_block=start_block)))
+    elif update.rows.num_rows:
+        metrics_engine.update(_trades_frame(update.rows))
+    return update
+
+
+def _import_trades_csv() -> None:
+    """
+    One-time import of a legacy trades CSV file into the trade store.
+    """
+    manifest = _load_trade_manifest()
+    if manifest.get("imported_csv") or not os.path.exists(TRADE_FILEPATH):
+        return
+
+    # Amounts are read as strings so the raw columns stay exact
+    df = pd.read_csv(
+        TRADE_FILEPATH,
+        dtype={k: str for k in TRADES_DTYPE if k not in ("block_number", "price")},
+    )
+    if not df.empty:
+        _append_trades_segment(
+            df,
+            start_block=int(df.block_number.min()),
+            stop_block=int(df.block_number.max()),
+        )
+        manifest = _load_trade_manifest()
+
+    manifest["imported_csv"] = TRADE_FILEPATH
+    _save_trade_manifest(manifest)
+    click.echo(f"Imported {len(df)} trades from {TRADE_FILEPATH}")
+
+
+def _migrate_trade_store() -> None:
+    """
+    One-time rewrite of Parquet trade store segments, including those written with string
+    amounts, into typed Arrow IPC segments.
+    """
+    manifest = _load_trade_manifest()
+    if manifest.get("schema_version", 1) >= TRADES_SCHEMA_VERSION:
+        return
+
+    store_path = Path(TRADE_STORE_DIRPATH)
+    stale_files = []
+    for segment in sorted(manifest["segments"], key=lambda s: s["start_block"]):
+        if not segment.get("file"):
+            continue
+        path = store_path / segment["file"]
+        if path.suffix == ".parquet":
+            _write_trades_file(_typed_trades(pd.read_parquet(path)), path.with_suffix(".arrow"))
+            segment["file"] = path.with_suffix(".arrow").name
+            stale_files.append(path)
+        segment.setdefault("seq", _next_seq(manifest))
+        segment.setdefault("writer", None)
+
+    manifest.setdefault("rollbacks", [])
+    manifest["schema_version"] = TRADES_SCHEMA_VERSION
+    _save_trade_manifest(manifest)
+    for path in stale_files:
+        path.unlink(missing_ok=True)
+    click.echo(f"Migrated {len(stale_files)} trade store segments to typed Arrow IPC files")
+
+
+ORDERS_DTYPE = {
+    "orderUid": str,
+    "signed": bool,
+    "sellToken": str,
+    "buyToken": str,
+    "receiver": str,
+    "sellAmount": str,
+    "buyAmount": str,
+    "validTo": int,
+    "block_number": "Int64",
+    "status": str,
+    "executedSellAmount": str,
+    "executedBuyAmount": str,
+}
+ORDER_DEFAULTS = {"status": "open", "executedSellAmount": "0", "executedBuyAmount": "0"}
+ORDER_OPEN_STATUSES = ("presignaturePending", "open")
+
+DECISIONS_DTYPE = {
+    "block_number": int,
+    "should_trade": bool,
+    "sell_token": str,
+    "buy_token": str,
+    "metrics_snapshot": str,
+    "profitable": int,
+    "valid": bool,
+    "cached": bool,
+}
+
+
+def _write_csv_atomic(df: pd.DataFrame, filepath: str) -> None:
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    tmp_path = f"{filepath}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, filepath)
+
+
+class CsvStorage:
+    """Bot state kept in the original `.db/*.csv` files; every change rewrites the file"""
+
+    def __init__(self, dirpath: str | None = None):
+        """Use the configured file paths, or files of the same names in `dirpath`"""
+        filepaths = [BLOCK_FILEPATH, ORDERS_FILEPATH, DECISIONS_FILEPATH, REASONING_FILEPATH]
+        if dirpath is not None:
+            filepaths = [os.path.join(dirpath, os.path.basename(f)) for f in filepaths]
+        (
+            self.block_filepath,
+            self.orders_filepath,
+            self.decisions_filepath,
+            self.reasoning_filepath,
+        ) = filepaths
+
+    def load_block(self) -> int | None:
+        if not os.path.exists(self.block_filepath):
+            return None
+        return int(pd.read_csv(self.block_filepath)["last_processed_block"].iloc[0])
+
+    def save_block(self, block_number: int) -> None:
+        _write_csv_atomic(
+            pd.DataFrame({"last_processed_block": [block_number]}), self.block_filepath
+        )
+
+    def load_orders(self, block_number: int | None = None) -> pd.DataFrame:
+        if not os.path.exists(self.orders_filepath):
+            return pd.DataFrame(columns=ORDERS_DTYPE.keys()).astype(ORDERS_DTYPE)
+
+        df = pd.read_csv(self.orders_filepath, dtype=ORDERS_DTYPE)
+        df = df.reindex(columns=list(ORDERS_DTYPE)).fillna(ORDER_DEFAULTS)
+        if block_number is not None:
+            df = df[df.block_number == block_number].reset_index(drop=True)
+        return df.astype(ORDERS_DTYPE)
+
+    def load_open_orders(self) -> pd.DataFrame:
+        df = self.load_orders()
+        return df[df.status.isin(ORDER_OPEN_STATUSES)]
+
+    def insert_order(self, order: Dict) -> None:
+        df = pd.concat([self.load_orders(), pd.DataFrame([order])], ignore_index=True)
+        _write_csv_atomic(df, self.orders_filepath)
+
+    def update_order(self, order_uid: str, **fields) -> None:
+        df = self.load_orders()
+        for column, value in fields.items():
+            df.loc[df.orderUid == order_uid, column] = value
+        _write_csv_atomic(df, self.orders_filepath)
+
+    def load_decisions(self, from_block: int | None = None) -> pd.DataFrame:
+        if not os.path.exists(self.decisions_filepath):
+            return pd.DataFrame(columns=DECISIONS_DTYPE.keys()).astype(DECISIONS_DTYPE)
+
+        df = pd.read_csv(self.decisions_filepath, dtype=DECISIONS_DTYPE)
+        if "cached" not in df.columns:
+            df["cached"] = False
+        if from_block is not None:
+            df = df[df.block_number >= from_block].reset_index(drop=True)
+        return df
+
+    def insert_decision(self, decision: Dict) -> None:
+        df = pd.concat([self.load_decisions(), pd.DataFrame([decision])], ignore_index=True)
+        _write_csv_atomic(df, self.decisions_filepath)
+
+    def update_decision_outcome(self, block_number: int, profitable: int) -> None:
+        df = self.load_decisions()
+        df.loc[df.block_number == block_number, "profitable"] = profitable
+        _write_csv_atomic(df, self.decisions_filepath)
+
+    def load_reasoning(self) -> List[Dict]:
+        if not os.path.exists(self.reasoning_filepath):
+            return []
+        with open(self.reasoning_filepath) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def insert_reasoning(self, entry: Dict) -> None:
+        os.makedirs(os.path.dirname(self.reasoning_filepath), exist_ok=True)
+        with open(self.reasoning_filepath, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS block (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    last_processed_block INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    orderUid TEXT PRIMARY KEY,
+    signed INTEGER NOT NULL,
+    sellToken TEXT,
+    buyToken TEXT,
+    receiver TEXT,
+    sellAmount TEXT,
+    buyAmount TEXT,
+    validTo INTEGER,
+    block_number INTEGER,
+    status TEXT NOT NULL DEFAULT 'open',
+    executedSellAmount TEXT NOT NULL DEFAULT '0',
+    executedBuyAmount TEXT NOT NULL DEFAULT '0'
+);
+CREATE INDEX IF NOT EXISTS orders_pair ON orders (sellToken, buyToken);
+CREATE TABLE IF NOT EXISTS decisions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    block_number INTEGER NOT NULL,
+    should_trade INTEGER NOT NULL,
+    sell_token TEXT,
+    buy_token TEXT,
+    metrics_snapshot TEXT,
+    profitable INTEGER NOT NULL DEFAULT 2,
+    valid INTEGER NOT NULL DEFAULT 0,
+    cached INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS decisions_block ON decisions (block_number);
+CREATE INDEX IF NOT EXISTS decisions_pair ON decisions (sell_token, buy_token);
+CREATE TABLE IF NOT EXISTS reasoning (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    block_number INTEGER NOT NULL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reasoning_block ON reasoning (block_number);
+"""
+
+# Columns added to existing tables since the schema was introduced
+SQLITE_ADDED_COLUMNS = {
+    "orders": {
+        "block_number": "INTEGER",
+        "status": "TEXT NOT NULL DEFAULT 'open'",
+        "executedSellAmount": "TEXT NOT NULL DEFAULT '0'",
+        "executedBuyAmount": "TEXT NOT NULL DEFAULT '0'",
+    },
+}
+SQLITE_ADDED_INDEXES = """
+CREATE INDEX IF NOT EXISTS orders_status ON orders (status);
+CREATE INDEX IF NOT EXISTS orders_block ON orders (block_number);
+"""
+
+
+class SqliteStorage:
+    """
+    Bot state in an embedded SQLite database (WAL mode), written one row per transaction.
+    Existing `.db/*.csv` state is migrated once when the database is first opened.
+    """
+
+    def __init__(self, filepath: str = SQLITE_FILEPATH, csv: CsvStorage | None = None):
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        self.filepath = filepath
+        self.csv = CsvStorage() if csv is None else csv
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(filepath, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+        self._add_missing_columns()
+        self._migrate_csv()
+
+    def _execute(self, sql: str, params: tuple = ()) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(sql, params)
+
+    def _query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    def load_block(self) -> int | None:
+        with self._lock:
+            row = self.conn.execute("SELECT last_processed_block FROM block").fetchone()
+        return None if row is None else row[0]
+
+    def save_block(self, block_number: int) -> None:
+        self._execute(
+            "INSERT INTO block (id, last_processed_block) VALUES (0, ?) "
+            "ON CONFLICT (id) DO UPDATE SET last_processed_block = excluded.last_processed_block",
+            (int(block_number),),
+        )
+
+    def load_orders(self, block_number: int | None = None) -> pd.DataFrame:
+        query = f"SELECT {', '.join(ORDERS_DTYPE)} FROM orders"
+        if block_number is None:
+            df = self._query(f"{query} ORDER BY rowid")
+        else:
+            df = self._query(f"{query} WHERE block_number = ? ORDER BY rowid", (int(block_number),))
+        return df.astype(ORDERS_DTYPE)
+
+    def load_open_orders(self) -> pd.DataFrame:
+        df = self._query(
+            f"SELECT {', '.join(ORDERS_DTYPE)} FROM orders "
+            f"WHERE status IN ({', '.join('?' * len(ORDER_OPEN_STATUSES))}) ORDER BY rowid",
+            ORDER_OPEN_STATUSES,
+        )
+        return df.astype(ORDERS_DTYPE)
+
+    def insert_order(self, order: Dict) -> None:
+        self._execute(
+            f"INSERT OR REPLACE INTO orders ({', '.join(ORDERS_DTYPE)}) "
+            f"VALUES ({', '.join('?' * len(ORDERS_DTYPE))})",
+            self._row({**ORDER_DEFAULTS, **order}, ORDERS_DTYPE),
+        )
+
+    def update_order(self, order_uid: str, **fields) -> None:
+        dtype = {column: ORDERS_DTYPE[column] for column in fields}
+        self._execute(
+            f"UPDATE orders SET {', '.join(f'{column} = ?' for column in fields)} "
+            "WHERE orderUid = ?",
+            (*self._row(fields, dtype), order_uid),
+        )
+
+    def load_decisions(self, from_block: int | None = None) -> pd.DataFrame:
+        query = f"SELECT {', '.join(DECISIONS_DTYPE)} FROM decisions"
+        if from_block is None:
+            df = self._query(f"{query} ORDER BY id")
+        else:
+            df = self._query(f"{query} WHERE block_number >= ? ORDER BY id", (int(from_block),))
+        dtype = {k: v for k, v in DECISIONS_DTYPE.items() if k not in ("sell_token", "buy_token")}
+        return df.astype(dtype)
+
+    def insert_decision(self, decision: Dict) -> None:
+        self._execute(
+            f"INSERT INTO decisions ({', '.join(DECISIONS_DTYPE)}) "
+            f"VALUES ({', '.join('?' * len(DECISIONS_DTYPE))})",
+            self._row(decision, DECISIONS_DTYPE),
+        )
+
+    def update_decision_outcome(self, block_number: int, profitable: int) -> None:
+        self._execute(
+            "UPDATE decisions SET profitable = ? WHERE block_number = ?",
+            (int(profitable), int(block_number)),
+        )
+
+    def load_reasoning(self) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute("SELECT entry FROM reasoning ORDER BY id").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def insert_reasoning(self, entry: Dict) -> None:
+        self._execute(
+            "INSERT INTO reasoning (block_number, entry) VALUES (?, ?)",
+            (int(entry["block_number"]), json.dumps(entry)),
+        )
+
+    @staticmethod
+    def _row(record: Dict, dtype: Dict) -> tuple:
+        """Order `record` by the table columns, mapping NaN/None to NULL"""
+        row = []
+        for column, column_type in dtype.items():
+            value = record.get(column)
+            if value is None or pd.isna(value):
+                row.append(None)
+            elif column_type is str:
+                row.append(str(value))
+            else:
+                row.append(int(value))
+        return tuple(row)
+
+    def _add_missing_columns(self) -> None:
+        """Bring tables created by an earlier version of the schema up to date"""
+        with self._lock, self.conn:
+            for table, columns in SQLITE_ADDED_COLUMNS.items():
+                existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                for column, definition in columns.items():
+                    if column not in existing:
+                        self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        with self._lock:
+            self.conn.executescript(SQLITE_ADDED_INDEXES)
+
+    def _migrate_csv(self) -> None:
+        """Import the CSV backend files once, in a single transaction"""
+        with self._lock:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'csv_migrated'").fetchone():
+                return
+
+        csv = self.csv
+        block_number = csv.load_block()
+        orders = csv.load_orders().to_dict("records")
+        decisions = csv.load_decisions().to_dict("records")
+        reasoning = []
+        if os.path.exists(csv.reasoning_filepath):
+            with open(csv.reasoning_filepath) as f:
+                reasoning = [line for line in f if line.strip()]
+
+        with self._lock, self.conn:
+            if block_number is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO block (id, last_processed_block) VALUES (0, ?)",
+                    (block_number,),
+                )
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO orders ({', '.join(ORDERS_DTYPE)}) "
+                f"VALUES ({', '.join('?' * len(ORDERS_DTYPE))})",
+                [self._row({**ORDER_DEFAULTS, **order}, ORDERS_DTYPE) for order in orders],
+            )
+            self.conn.executemany(
+                f"INSERT INTO decisions ({', '.join(DECISIONS_DTYPE)}) "
+                f"VALUES ({', '.join('?' * len(DECISIONS_DTYPE))})",
+                [self._row(decision, DECISIONS_DTYPE) for decision in decisions],
+            )
+            self.conn.executemany(
+                "INSERT INTO reasoning (block_number, entry) VALUES (?, ?)",
+                [(json.loads(line)["block_number"], line.strip()) for line in reasoning],
+            )
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('csv_migrated', '1')")
+
+        if block_number is not None or orders or decisions or reasoning:
+            click.echo(
+                f"Migrated CSV state to {self.filepath}: {len(orders)} orders, "
+                f"{len(decisions)} decisions, {len(reasoning)} reasoning entries"
+            )
+
+
+@lru_cache
+def _get_storage(namespace: str | None = None) -> CsvStorage | SqliteStorage:
+    """
+    Return the storage backend selected by STORAGE_BACKEND ("sqlite" or "csv").
+    A `namespace` keeps its own files, named as the configured ones, in a subdirectory of
+    NAMESPACES_DIRPATH.
+    """
+    dirpath = None if namespace is None else os.path.join(NAMESPACES_DIRPATH, namespace)
+    if STORAGE_BACKEND == "csv":
+        return CsvStorage(dirpath)
+    if STORAGE_BACKEND == "sqlite":
+        if dirpath is None:
+            return SqliteStorage(SQLITE_FILEPATH)
+        filepath = os.path.join(dirpath, os.path.basename(SQLITE_FILEPATH))
+        return SqliteStorage(filepath, CsvStorage(dirpath))
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+
+
+def _load_block_db() -> int:
+    """Load the last processed block, defaulting to the start block"""
+    block_number = _get_storage().load_block()
+    return _get_start_block() if block_number is None else block_number
+
+
+def _save_block_db(block_number: int) -> None:
+    """Save the last processed block"""
+    _get_storage().save_block(block_number)
+
+
+def _load_orders_db(namespace: str | None = None, block_number: int | None = None) -> pd.DataFrame:
+    """Load orders, or only those placed at `block_number`"""
+    return _get_storage(namespace).load_orders(block_number)
 
-def _load_decisions_db() -> pd.DataFrame:
-    """Load decisions database from CSV file"""
-    dtype = {
-        "block_number": int,
-        "should_trade": bool,
-        "sell_token": str,
-        "buy_token": str,
-        "metrics_snapshot": str,
-        "profitable": int,
-        "valid": bool,
-    }
 
-    df = (
-        pd.read_csv(DECISIONS_FILEPATH, dtype=dtype)
-        if os.path.exists(DECISIONS_FILEPATH)
-        else pd.DataFrame(columns=dtype.keys()).astype(dtype)
+def _load_decisions_db(namespace: str | None = None) -> pd.DataFrame:
+    """Load decisions"""
+    return _get_storage(namespace).load_decisions()
+
+
+def _refresh_decisions(decisions_df: pd.DataFrame, namespace: str | None = None) -> pd.DataFrame:
+    """
+    Bring in-memory decisions up to date with storage, reading only those from the latest
+    known decision onwards, which picks up both new decisions and its recorded outcome.
+    """
+    if decisions_df.empty:
+        return _load_decisions_db(namespace)
+
+    latest_block = int(decisions_df.block_number.iloc[-1])
+    recent = _get_storage(namespace).load_decisions(from_block=latest_block)
+    return pd.concat(
+        [decisions_df[decisions_df.block_number < latest_block], recent], ignore_index=True
     )
-    return df
 
 
-def _save_decisions_db(df: pd.DataFrame) -> None:
-    """Save decisions to CSV file"""
-    df = df.copy()
-    os.makedirs(os.path.dirname(DECISIONS_FILEPATH), exist_ok=True)
-    df.to_csv(DECISIONS_FILEPATH, index=False)
+def _load_decision_order(block_number: int, namespace: str | None = None) -> Dict | None:
+    """Return the order placed for the decision made at `block_number`, if any"""
+    orders = _load_orders_db(namespace, block_number)
+    return None if orders.empty else orders.iloc[-1].to_dict()
 
 
 # Historical log helper functions
@@ -573,72 +2759,559 @@ def _process_trade_log(log) -> Dict:
         "owner": log.owner,
         "sellToken": log.sellToken,
         "buyToken": log.buyToken,
-        "sellAmount": str(log.sellAmount),
-        "buyAmount": str(log.buyAmount),
+        "sellAmount": float(log.sellAmount),
+        "buyAmount": float(log.buyAmount),
         "token_a": token_a,
         "token_b": token_b,
         "price": price,
+        "sellAmountRaw": _uint256_bytes(log.sellAmount),
+        "buyAmountRaw": _uint256_bytes(log.buyAmount),
     }
 
 
-def _get_historical_trades(
+def _as_bytes(value) -> bytes:
+    """Normalise hex string or bytes-like RPC values to bytes"""
+    return bytes.fromhex(value[2:]) if isinstance(value, str) else bytes(value)
+
+
+@lru_cache(maxsize=4096)
+def _checksum_address(raw_address: bytes) -> str:
+    return to_checksum_address(raw_address)
+
+
+def _get_raw_trade_logs(
     settlement_contract,
     start_block: int,
-    stop_block: int = chain.blocks.head.number,
-):
-    """Get historical trades for monitored token pairs"""
-    log_filter = LogFilter(
-        addresses=[settlement_contract.address],
-        events=[settlement_contract.Trade.abi],
-        start_block=start_block,
-        stop_block=stop_block,
+    stop_block: int,
+    owner: str | None = None,
+    provider=None,
+) -> List:
+    """
+    Get undecoded Trade logs emitted by the settlement contract in [start_block, stop_block],
+    optionally only those of `owner`, from `provider` or else the bot's own
+    """
+    topics = ["0x" + keccak(text=settlement_contract.Trade.abi.selector).hex()]
+    if owner is not None:
+        topics.append("0x" + bytes(12).hex() + owner[2:].lower())
+
+    _count("rpc_calls", "eth_getLogs")
+    return (provider or accounts.provider).web3.eth.get_logs(
+        {
+            "address": settlement_contract.address,
+            "topics": topics,
+            "fromBlock": start_block,
+            "toBlock": stop_block,
+        }
     )
 
-    for log in accounts.provider.get_contract_logs(log_filter):
-        if log.sellToken in MONITORED_TOKENS and log.buyToken in MONITORED_TOKENS:
-            yield log
+
+def _decode_order_fills(raw_logs: List) -> Dict[str, tuple[int, int]]:
+    """Sum executed (sellAmount, buyAmount) per order UID over raw Trade logs"""
+    fills = defaultdict(lambda: (0, 0))
+
+    for log in raw_logs:
+        data = _as_bytes(log["data"])
+        uid_offset = int.from_bytes(data[160:192], "big")
+        uid_length = int.from_bytes(data[uid_offset : uid_offset + 32], "big")
+        order_uid = "0x" + data[uid_offset + 32 : uid_offset + 32 + uid_length].hex()
+
+        sell_amount, buy_amount = fills[order_uid]
+        fills[order_uid] = (
+            sell_amount + int.from_bytes(data[64:96], "big"),
+            buy_amount + int.from_bytes(data[96:128], "big"),
+        )
+
+    return dict(fills)
+
+
+def _decode_trade_logs(raw_logs: List, token_bytes: Dict[bytes, str] | None = None) -> pd.DataFrame:
+    """
+    Decode raw Trade logs for monitored token pairs directly into trade store columns.
+    Non-monitored trades are rejected by looking up the raw sellToken/buyToken words in
+    `token_bytes`, by default those of the token universe, before anything else is decoded;
+    prices follow `_process_trade_log`.
+    """
+    if token_bytes is None:
+        token_bytes = TOKEN_UNIVERSE.token_bytes
+    columns = {column: [] for column in [*TRADES_DTYPE, *TRADES_RAW_COLUMNS.values()]}
+
+    for log in raw_logs:
+        data = _as_bytes(log["data"])
+        sell_token = token_bytes.get(data[12:32])
+        buy_token = token_bytes.get(data[44:64])
+        if sell_token is None or buy_token is None:
+            continue
+
+        sell_amount = int.from_bytes(data[64:96], "big")
+        buy_amount = int.from_bytes(data[96:128], "big")
+        token_a, token_b = _get_canonical_pair(sell_token, buy_token)
+        block_number = log["blockNumber"]
+
+        columns["block_number"].append(
+            int(block_number, 16) if isinstance(block_number, str) else block_number
+        )
+        columns["owner"].append(_checksum_address(_as_bytes(log["topics"][1])[12:]))
+        columns["sellToken"].append(sell_token)
+        columns["buyToken"].append(buy_token)
+        columns["sellAmount"].append(float(sell_amount))
+        columns["buyAmount"].append(float(buy_amount))
+        columns["sellAmountRaw"].append(data[64:96])
+        columns["buyAmountRaw"].append(data[96:128])
+        columns["token_a"].append(token_a)
+        columns["token_b"].append(token_b)
+        columns["price"].append(
+            buy_amount / sell_amount if sell_token == token_a else sell_amount / buy_amount
+        )
+
+    return pd.DataFrame(columns).astype(TRADES_DTYPE)
 
 
 def _process_historical_trades(
     settlement_contract, start_block: int, stop_block: int
-) -> List[Dict]:
+) -> pd.DataFrame:
     """Process historical trades and store in database"""
-    trades = []
+    trades = _decode_trade_logs(_get_raw_trade_logs(settlement_contract, start_block, stop_block))
+
+    _append_trades_segment(
+        trades, start_block=start_block, stop_block=stop_block, writer=_worker_id()
+    )
 
-    for log in _get_historical_trades(settlement_contract, start_block, stop_block):
-        trades.append(_process_trade_log(log))
+    return trades
 
-    if trades:
-        existing_trades = _load_trades_db()
-        all_trades = pd.concat([existing_trades, pd.DataFrame(trades)], ignore_index=True)
 
-        _save_trades_db(all_trades)
+def _split_block_range(start_block: int, stop_block: int, chunk_blocks: int) -> List[tuple]:
+    """Split [start_block, stop_block] into consecutive chunks of at most chunk_blocks"""
+    return [
+        (chunk_start, min(chunk_start + chunk_blocks - 1, stop_block))
+        for chunk_start in range(start_block, stop_block + 1, chunk_blocks)
+    ]
 
-    return trades
 
+def _fetch_trades_chunk(
+    settlement_contract,
+    start_block: int,
+    stop_block: int,
+    provider=None,
+    token_bytes: Dict[bytes, str] | None = None,
+) -> pd.DataFrame:
+    """Fetch and decode trades for a single block chunk"""
+    return _decode_trade_logs(
+        _get_raw_trade_logs(settlement_contract, start_block, stop_block, provider=provider),
+        token_bytes,
+    )
 
-def _catch_up_trades(current_block: int, next_decision_block: int, buffer_blocks: int = 5) -> None:
+
+def _backfill_trades(
+    settlement_contract,
+    start_block: int,
+    stop_block: int,
+    chunk_blocks: int = BACKFILL_CHUNK_BLOCKS,
+    max_workers: int = BACKFILL_MAX_WORKERS,
+    provider=None,
+    token_bytes: Dict[bytes, str] | None = None,
+    namespace: str | None = None,
+    executor: ThreadPoolExecutor | None = None,
+) -> int:
     """
-    Catch up on trade events from last processed block until shortly before next decision
+    Backfill trades for [start_block, stop_block] in block chunks fetched concurrently, at most
+    `max_workers` at a time, on `executor` if shared or else on a pool of its own.
+    Every finished chunk is written to the trade store as its own segment, so an interrupted
+    backfill resumes by fetching only the ranges still missing from the manifest.
+    Chunks rejected by the provider are split in half down to BACKFILL_MIN_CHUNK_BLOCKS.
+    Returns the number of trades stored.
     """
-    trades_df = _load_trades_db()
-    last_processed_block = trades_df["block_number"].max() if not trades_df.empty else START_BLOCK
+    manifest = _load_trade_manifest(namespace)
+    if manifest.get("start_block") is None or start_block < manifest["start_block"]:
+        manifest["start_block"] = start_block
+        _save_trade_manifest(manifest, namespace)
+
+    chunks = deque(
+        chunk
+        for missing_start, missing_stop in _missing_block_ranges(start_block, stop_block, namespace)
+        for chunk in _split_block_range(missing_start, missing_stop, chunk_blocks)
+    )
+    if not chunks:
+        return 0
+
+    click.echo(f"Backfilling {len(chunks)} chunks between blocks {start_block}-{stop_block}")
+    stored = 0
+    pending = {}
+
+    with nullcontext(executor) if executor else ThreadPoolExecutor(max_workers) as pool:
+        while chunks or pending:
+            while chunks and len(pending) < max_workers:
+                chunk = chunks.popleft()
+                future = pool.submit(
+                    _fetch_trades_chunk, settlement_contract, *chunk, provider, token_bytes
+                )
+                pending[future] = chunk
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk_start, chunk_stop = pending.pop(future)
+                try:
+                    trades = future.result()
+                except Exception as e:
+                    if chunk_stop - chunk_start + 1 <= BACKFILL_MIN_CHUNK_BLOCKS:
+                        for queued in pending:
+                            queued.cancel()
+                        raise
+                    click.echo(f"Chunk {chunk_start}-{chunk_stop} rejected ({e}), splitting")
+                    middle = (chunk_start + chunk_stop) // 2
+                    chunks.extendleft([(middle + 1, chunk_stop), (chunk_start, middle)])
+                    continue
+
+                _append_trades_segment(
+                    trades, start_block=chunk_start, stop_block=chunk_stop, namespace=namespace
+                )
+                _count("rows_ingested", "backfill", amount=len(trades))
+                stored += len(trades)
+
+    click.echo(f"Backfill complete: {stored} trades stored")
+    return stored
+
+
+def _catch_up_trades(
+    current_block: int, next_decision_block: int, buffer_blocks: int = 5
+) -> pd.DataFrame:
+    """
+    Catch up on trade events from last processed block until shortly before next decision.
+    With live ingestion running this only fills ranges the subscription did not cover.
+    Returns the newly stored trades.
+    """
+    last_processed_block = _trade_store_cursor()
+    if last_processed_block is None:
+        last_processed_block = _get_start_block()
 
     target_block = min(current_block, next_decision_block - buffer_blocks)
 
-    if target_block <= last_processed_block:
-        return
+    trades = [
+        _process_historical_trades(
+            GPV2_SETTLEMENT_CONTRACT, start_block=missing_start, stop_block=missing_stop
+        )
+        for missing_start, missing_stop in _missing_block_ranges(
+            last_processed_block + 1, target_block
+        )
+    ]
+
+    if not trades:
+        return pd.DataFrame(columns=list(TRADES_DTYPE)).astype(TRADES_DTYPE)
+    return pd.concat(trades, ignore_index=True)
+
+
+# Live trade ingestion helper functions
+class _LiveTradeBuffer:
+    """
+    Monitored trades received from the live Trade subscription and not yet stored, along with
+    the block hashes of the recent tail used to detect reorgs. Only the worker process holding
+    `_claim_live_writer` keeps one.
+    """
+
+    def __init__(self):
+        self.start_block: int | None = None
+        self.flushed_block: int | None = None
+        self.resynced_block: int | None = None
+        self.block_hashes: Dict[int, bytes] = {}
+        self._trades: List[tuple[Dict, bytes | None]] = []
+        self._lock = threading.Lock()
+
+    def mark_seen(self, block_number: int) -> None:
+        """Record that the live subscription covers `block_number` onwards"""
+        with self._lock:
+            if self.start_block is None or block_number < self.start_block:
+                self.start_block = block_number
+
+    def add(self, trade: Dict, block_hash: bytes | None = None) -> bool:
+        """
+        Buffer a trade unless it belongs to an orphaned block or to a range already re-fetched
+        after a reorg. Returns whether the trade was accepted.
+        """
+        block_number = trade["block_number"]
+        with self._lock:
+            if self.resynced_block is not None and block_number <= self.resynced_block:
+                return False
+            known_hash = self.block_hashes.get(block_number)
+            if block_hash is not None and known_hash is not None and block_hash != known_hash:
+                return False
+            self._trades.append((trade, block_hash))
+            return True
+
+    def record_block(self, block_number: int, block_hash: bytes, parent_hash: bytes) -> bool:
+        """
+        Record the hash of a new head block.
+        Returns True if it conflicts with the recorded hashes or with buffered trades.
+        """
+        with self._lock:
+            conflict = (
+                self.block_hashes.get(block_number - 1, parent_hash) != parent_hash
+                or self.block_hashes.get(block_number, block_hash) != block_hash
+                or any(
+                    trade["block_number"] == block_number and trade_hash not in (None, block_hash)
+                    for trade, trade_hash in self._trades
+                )
+            )
+            self.block_hashes[block_number] = block_hash
+            return conflict
+
+    def prune(self, below_block: int) -> None:
+        """Forget block hashes older than `below_block`"""
+        with self._lock:
+            for block_number in [n for n in self.block_hashes if n < below_block]:
+                del self.block_hashes[block_number]
+
+    def rollback(self, from_block: int, resync_block: int) -> None:
+        """
+        Discard buffered trades and block hashes from `from_block` onwards.
+        Live trades up to `resync_block` are rejected from now on, as that range is re-fetched.
+        """
+        with self._lock:
+            self._trades = [(t, h) for t, h in self._trades if t["block_number"] < from_block]
+            for block_number in [n for n in self.block_hashes if n >= from_block]:
+                del self.block_hashes[block_number]
+            self.resynced_block = resync_block
+            if self.start_block is None or from_block < self.start_block:
+                self.start_block = from_block
+
+    def resync(self, trades: List[Dict], block_hashes: Dict[int, bytes]) -> None:
+        """Buffer trades re-fetched in bulk, with the canonical hashes of their range"""
+        with self._lock:
+            self.block_hashes.update(block_hashes)
+            self._trades.extend((t, block_hashes.get(t["block_number"])) for t in trades)
+
+    def pending(self) -> List[Dict]:
+        """Return buffered trades without removing them"""
+        with self._lock:
+            return [t for t, _ in self._trades]
+
+    def drain(self, stop_block: int) -> List[Dict]:
+        """Remove and return buffered trades up to and including `stop_block`"""
+        with self._lock:
+            ready = [t for t, _ in self._trades if t["block_number"] <= stop_block]
+            self._trades = [(t, h) for t, h in self._trades if t["block_number"] > stop_block]
+            return ready
+
+
+def _is_monitored_trade(log) -> bool:
+    tokens = TOKEN_UNIVERSE.token_set
+    return log.sellToken in tokens and log.buyToken in tokens
+
+
+def _get_blocks(start_block: int, stop_block: int) -> List[Dict]:
+    """
+    Get the canonical blocks [start_block, stop_block] in one JSON-RPC batch request, or one
+    request per block from providers that cannot batch (such as the local test provider)
+    """
+    block_numbers = range(start_block, stop_block + 1)
+    if not block_numbers:
+        return []
+
+    web3 = accounts.provider.web3
+    _count("rpc_calls", "eth_getBlockByNumber", amount=len(block_numbers))
+    try:
+        with web3.batch_requests() as batch:
+            for block_number in block_numbers:
+                batch.add(web3.eth.get_block(block_number))
+            return list(batch.execute())
+    except Web3TypeError:
+        return [web3.eth.get_block(block_number) for block_number in block_numbers]
+
+
+def _find_fork_block(live_trades: _LiveTradeBuffer, block) -> int | None:
+    """
+    Record a new head block and return the first block replaced by a reorg, if any.
+    Blocks skipped since the last recorded one are recorded first so the parent hashes chain up;
+    on a conflict, the recorded hashes are compared with the canonical chain, fetched in one
+    batch, walking back to the fork. Only the last REORG_TRACKING_BLOCKS hashes are kept, so a
+    deeper reorg is reported from the oldest recorded block.
+    """
+    last_recorded = max(live_trades.block_hashes, default=block.number - 1)
+    first_block = max(last_recorded + 1, block.number - REORG_TRACKING_BLOCKS)
+    conflict = False
+    for skipped in _get_blocks(first_block, block.number - 1):
+        conflict |= live_trades.record_block(
+            skipped["number"], _as_bytes(skipped["hash"]), _as_bytes(skipped["parentHash"])
+        )
+    conflict |= live_trades.record_block(
+        block.number, _as_bytes(block.hash), _as_bytes(block.parent_hash)
+    )
+    if not conflict:
+        return None
+
+    fork_block = min(first_block, block.number)
+    oldest_recorded = fork_block
+    while oldest_recorded - 1 in live_trades.block_hashes:
+        oldest_recorded -= 1
+    canonical = _get_blocks(oldest_recorded, fork_block - 1)
+    for recorded in reversed(canonical):
+        if live_trades.block_hashes[recorded["number"]] == _as_bytes(recorded["hash"]):
+            break
+        fork_block -= 1
+    return fork_block
+
+
+def _resync_after_reorg(
+    live_trades: _LiveTradeBuffer,
+    metrics_engine: RollingMetricsEngine,
+    trade_cache: TradeCache,
+    fork_block: int,
+    head_block: int,
+) -> int:
+    """
+    Roll back everything ingested from `fork_block` and re-fetch [fork_block, head_block] in bulk:
+    its trades in one log request and its block hashes in one batch. The trade store, including
+    cold partitions, is only touched when the reorg is deeper than what has been flushed. The
+    metrics engine is reloaded with the lookback window before `fork_block`, from `trade_cache`
+    and the trades still buffered. `fork_block` comes from `_find_fork_block`, so reorgs deeper
+    than REORG_TRACKING_BLOCKS are only rolled back from the oldest tracked block. Returns the
+    number of trades re-fetched.
+    """
+    live_trades.rollback(fork_block, resync_block=head_block)
+    if live_trades.flushed_block is not None and fork_block <= live_trades.flushed_block:
+        _rollback_trade_store(fork_block)
+        live_trades.flushed_block = fork_block - 1
+
+    # Rows written by other processes are part of the reloaded window, so are not fed separately
+    trade_cache.refresh()
+    history = trade_cache.table(start_block=fork_block - 1 - metrics_engine.lookback_blocks)
+    history = _trades_frame(history.filter(pc.field("block_number") < fork_block))
+    cursor = _trade_store_cursor()
+    metrics_engine.reload(
+        [
+            *history.to_dict("records"),
+            *(t for t in live_trades.pending() if cursor is None or t["block_number"] > cursor),
+        ]
+    )
+
+    trades = _fetch_trades_chunk(GPV2_SETTLEMENT_CONTRACT, fork_block, head_block).to_dict(
+        "records"
+    )
+    block_hashes = {
+        block["number"]: _as_bytes(block["hash"]) for block in _get_blocks(fork_block, head_block)
+    }
+    live_trades.resync(trades, block_hashes)
+    metrics_engine.update(trades)
+    _count("rows_ingested", "resync", amount=len(trades))
+    return len(trades)
+
+
+LIVE_WRITER_LOCK_FILENAME = "live_writer.lock"
+LIVE_READERS_LOCK_FILENAME = "live_readers.lock"
+
+
+def _claim_live_writer(namespace: str | None = None):
+    """
+    Try to become the live writer of the trade store, for as long as the returned file stays
+    open. Only one worker process buffers and flushes live trades; the others get None, should
+    `_register_live_reader` and leave ingestion to `_catch_up_trades`.
+    """
+    store_path = _trade_store_path(namespace)
+    os.makedirs(store_path, exist_ok=True)
+    lock_file = open(store_path / LIVE_WRITER_LOCK_FILENAME, "a+")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    lock_file.truncate(0)
+    lock_file.write(_worker_id())
+    lock_file.flush()
+    return lock_file
+
+
+def _register_live_reader(namespace: str | None = None):
+    """
+    Announce a worker process that is not the live writer, for as long as the returned file
+    stays open, so the writer knows its buffer misses the Trade events handed to this process
+    """
+    store_path = _trade_store_path(namespace)
+    os.makedirs(store_path, exist_ok=True)
+    lock_file = open(store_path / LIVE_READERS_LOCK_FILENAME, "a+")
+    fcntl.flock(lock_file, fcntl.LOCK_SH)
+    return lock_file
+
+
+def _has_live_readers(namespace: str | None = None) -> bool:
+    """Return whether other worker processes are registered with `_register_live_reader`"""
+    store_path = _trade_store_path(namespace)
+    os.makedirs(store_path, exist_ok=True)
+    with open(store_path / LIVE_READERS_LOCK_FILENAME, "a+") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return False
 
-    _process_historical_trades(
-        GPV2_SETTLEMENT_CONTRACT, start_block=last_processed_block + 1, stop_block=target_block
+
+def _trade_key(trade: Dict) -> tuple:
+    return (
+        trade["block_number"],
+        trade["owner"],
+        trade["sellToken"],
+        trade["buyToken"],
+        trade["sellAmountRaw"],
+        trade["buyAmountRaw"],
     )
 
 
+def _flush_live_trades(
+    live_trades: _LiveTradeBuffer,
+    stop_block: int,
+    metrics_engine: RollingMetricsEngine | None = None,
+) -> int:
+    """
+    Persist buffered live trades up to `stop_block` as a single trade store segment.
+    Blocks before the subscription started, or already stored, are left out. The segment covers
+    every block of its range, so while other worker processes are registered, and may have been
+    handed some of its Trade events, the range is fetched in one log request instead; trades
+    missing from the buffer are fed to `metrics_engine`. Returns the number of trades stored.
+    """
+    if live_trades.start_block is None:
+        return 0
+
+    start_block = live_trades.start_block
+    cursor = _trade_store_cursor()
+    if cursor is not None:
+        start_block = max(start_block, cursor + 1)
+    if live_trades.flushed_block is not None:
+        start_block = max(start_block, live_trades.flushed_block + 1)
+
+    # Trades below start_block belong to blocks already stored
+    trades = [t for t in live_trades.drain(stop_block) if t["block_number"] >= start_block]
+    if start_block > stop_block:
+        return 0
+
+    if _has_live_readers():
+        fetched = _fetch_trades_chunk(GPV2_SETTLEMENT_CONTRACT, start_block, stop_block)
+        fetched = fetched.to_dict("records")
+        buffered = defaultdict(int)
+        for trade in trades:
+            buffered[_trade_key(trade)] += 1
+        missed = []
+        for trade in fetched:
+            key = _trade_key(trade)
+            if buffered[key]:
+                buffered[key] -= 1
+            else:
+                missed.append(trade)
+        if metrics_engine is not None and missed:
+            metrics_engine.update(missed)
+        _count("rows_ingested", "live_fetch", amount=len(missed))
+        trades = fetched
+
+    _append_trades_segment(
+        trades, start_block=start_block, stop_block=stop_block, writer=_worker_id()
+    )
+    live_trades.flushed_block = stop_block
+    return len(trades)
+
+
 # CoW Swap trading helper functions
 def _construct_quote_payload(
     sell_token: str,
     buy_token: str,
     sell_amount: str,
+    owner: str = SAFE_ADDRESS,
 ) -> Dict:
     """
     Construct payload for CoW Protocol quote request using PreSign method.
@@ -648,8 +3321,8 @@ def _construct_quote_payload(
         "sellToken": sell_token,
         "buyToken": buy_token,
         "sellAmountBeforeFee": str(sell_amount),
-        "from": SAFE_ADDRESS,
-        "receiver": SAFE_ADDRESS,
+        "from": owner,
+        "receiver": owner,
         "appData": "{}",
         "appDataHash": "0xb48d38f93eaa084033fc5970bf96e559c33c4cdc07d889ab00b4d63f9590739d",
         "sellTokenBalance": "erc20",
@@ -661,14 +3334,276 @@ def _construct_quote_payload(
     }
 
 
+class QuoteCache:
+    """
+    Quotes keyed by block, owner, sell token, buy token and sell amount, shared by all portfolios.
+    Verified quotes are simulated from the owner's balance, so they are not reused across Safes.
+    Only the current block's quotes are kept, each served until shortly before its validTo.
+    """
+
+    def __init__(self):
+        self.block_number: int | None = None
+        self.quotes: Dict[tuple[str, str, str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        block_number: int,
+        sell_token: str,
+        buy_token: str,
+        sell_amount,
+        owner: str = SAFE_ADDRESS,
+    ) -> Dict | None:
+        with self._lock:
+            quote = None
+            if block_number == self.block_number:
+                quote = self.quotes.get((owner, sell_token, buy_token, str(sell_amount)))
+
+        if quote is not None and (
+            int(quote["quote"]["validTo"]) <= time.time() + QUOTE_EXPIRY_MARGIN_SECONDS
+        ):
+            quote = None
+        _count("cache_lookups", "quote", "miss" if quote is None else "hit")
+        return quote
+
+    def put(
+        self,
+        block_number: int,
+        sell_token: str,
+        buy_token: str,
+        sell_amount,
+        quote: Dict,
+        owner: str = SAFE_ADDRESS,
+    ) -> None:
+        with self._lock:
+            if block_number != self.block_number:
+                self.block_number = block_number
+                self.quotes = {}
+            self.quotes[(owner, sell_token, buy_token, str(sell_amount))] = quote
+
+
+QUOTE_CACHE = QuoteCache()
+
+
+class CowOrderbookClient:
+    """
+    CoW Protocol orderbook API client sharing one connection pool between sync and async callers.
+    Requests time out per endpoint and are retried with jittered exponential backoff on 429/5xx.
+    At most `pool_size` async requests run at once on each event loop, so a fan-out over many
+    tokens queues for a connection instead of starting a thread per request.
+    """
+
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        timeouts: Dict[str, float] | None = None,
+        max_retries: int = API_MAX_RETRIES,
+        backoff_seconds: float = API_BACKOFF_SECONDS,
+        pool_size: int = API_POOL_SIZE,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeouts = {**API_TIMEOUTS, **(timeouts or {})}
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.pool_size = pool_size
+        self._semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+        self.session = requests.Session()
+        self.session.headers.update(API_HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=1000))
+        self.retries: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def request(
+        self,
+        method: str,
+        endpoint: str,
+        path: str | None = None,
+        idempotent: bool = True,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send a request to `endpoint` (also the timeout and metrics key) and return the response.
+        Non-idempotent requests are only retried when they cannot have reached the server.
+        """
+        url = f"{self.base_url}/{path or endpoint}"
+        timeout = self.timeouts.get(endpoint, API_DEFAULT_TIMEOUT)
+        started = time.perf_counter()
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                unsent = isinstance(e, requests.ConnectTimeout)
+                if last_attempt or not (idempotent or unsent):
+                    self._record(endpoint, started, error=True)
+                    raise
+                self._backoff(endpoint, attempt)
+                continue
+
+            retryable = response.status_code == 429 or (
+                idempotent and response.status_code in API_RETRY_STATUS_CODES
+            )
+            if not retryable or last_attempt:
+                break
+            self._backoff(endpoint, attempt, response.headers.get("Retry-After"))
+
+        self._record(endpoint, started, error=not response.ok)
+        response.raise_for_status()
+        return response
+
+    def get_quote(self, payload: Dict) -> Dict:
+        """Get quote from CoW API"""
+        return self.request("POST", "quote", json=payload).json()
+
+    def submit_order(self, order_payload: Dict) -> str:
+        """
+        Submit order to CoW API
+        Returns order UID string or raises exception
+        """
+        try:
+            response = self.request("POST", "orders", json=order_payload, idempotent=False)
+            return response.text.strip('"')
+        except requests.RequestException as e:
+            if e.response is not None:
+                error_data = e.response.json()
+                error_type = error_data.get("errorType", "Unknown")
+                error_description = error_data.get("description", str(e))
+                raise Exception(f"{error_type} - {error_description}")
+            raise Exception(f"Order request failed: {e}")
+
+    def get_account_orders(
+        self, owner: str, offset: int = 0, limit: int = ORDER_POLL_PAGE_SIZE
+    ) -> List[Dict]:
+        """Get a page of the owner's orders, most recent first"""
+        return self.request(
+            "GET",
+            "account_orders",
+            path=f"account/{owner}/orders",
+            params={"offset": offset, "limit": limit},
+        ).json()
+
+    async def get_quote_async(self, payload: Dict) -> Dict:
+        async with self._semaphore():
+            return await asyncio.to_thread(self.get_quote, payload)
+
+    async def submit_order_async(self, order_payload: Dict) -> str:
+        async with self._semaphore():
+            return await asyncio.to_thread(self.submit_order, order_payload)
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        """Semaphore bounding the running loop's requests to the connection pool size"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._semaphores:
+                self._semaphores[loop] = asyncio.Semaphore(self.pool_size)
+            return self._semaphores[loop]
+
+    def stats(self) -> Dict[str, Dict]:
+        """Return request counts and latency percentiles (ms) per endpoint"""
+        with self._lock:
+            endpoints = {
+                endpoint: np.array(latencies) * 1000
+                for endpoint, latencies in self.latencies.items()
+            }
+            return {
+                endpoint: {
+                    "requests": len(latencies),
+                    "retries": self.retries[endpoint],
+                    "errors": self.errors[endpoint],
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p95_ms": float(np.percentile(latencies, 95)),
+                    "max_ms": float(latencies.max()),
+                }
+                for endpoint, latencies in endpoints.items()
+                if len(latencies)
+            }
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _backoff(self, endpoint: str, attempt: int, retry_after: str | None = None) -> None:
+        with self._lock:
+            self.retries[endpoint] += 1
+
+        delay = min(API_BACKOFF_MAX_SECONDS, self.backoff_seconds * 2**attempt)
+        delay = random.uniform(delay / 2, delay)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        time.sleep(delay)
+
+    def _record(self, endpoint: str, started: float, error: bool = False) -> None:
+        with self._lock:
+            self.latencies[endpoint].append(time.perf_counter() - started)
+            if error:
+                self.errors[endpoint] += 1
+
+
+COW_API_CLIENT = CowOrderbookClient()
+
+
 def _get_quote(payload: Dict) -> Dict:
     """
     Get quote from CoW API
     Returns quote response or raises exception
     """
-    response = requests.post(url=f"{API_BASE_URL}/quote", headers=API_HEADERS, json=payload)
-    response.raise_for_status()
-    return response.json()
+    with _span("get_quote"):
+        return COW_API_CLIENT.get_quote(payload)
+
+
+async def _fetch_quotes(
+    sell_token: str,
+    buy_tokens: List[str],
+    sell_amount,
+    block_number: int | None,
+    owner: str = SAFE_ADDRESS,
+) -> Dict[str, Dict]:
+    """
+    Fetch quotes for `owner` selling `sell_token` against every buy token concurrently.
+    Cached quotes for the block are reused; failed quotes are returned as {"error": ...}.
+    """
+
+    async def fetch(buy_token: str) -> Dict:
+        if block_number is not None:
+            cached = QUOTE_CACHE.get(block_number, sell_token, buy_token, sell_amount, owner)
+            if cached is not None:
+                return cached
+
+        payload = _construct_quote_payload(
+            sell_token=sell_token, buy_token=buy_token, sell_amount=sell_amount, owner=owner
+        )
+        try:
+            quote = await COW_API_CLIENT.get_quote_async(payload)
+        except Exception as e:
+            return {"error": str(e)}
+
+        if block_number is not None:
+            QUOTE_CACHE.put(block_number, sell_token, buy_token, sell_amount, quote, owner)
+        return quote
+
+    quotes = await asyncio.gather(*(fetch(buy_token) for buy_token in buy_tokens))
+    return dict(zip(buy_tokens, quotes))
+
+
+def _summarize_quote(quote_response: Dict) -> Dict:
+    """Reduce a quote response to the fields the agent needs"""
+    if "error" in quote_response:
+        return quote_response
+
+    quote = quote_response["quote"]
+    return {
+        "sell_amount": quote["sellAmount"],
+        "buy_amount": quote["buyAmount"],
+        "fee_amount": quote["feeAmount"],
+        "price": int(quote["buyAmount"]) / int(quote["sellAmount"]),
+        "valid_to": quote["validTo"],
+    }
 
 
 def _construct_order_payload(quote_response: Dict) -> Dict:
@@ -703,25 +3638,18 @@ def _submit_order(order_payload: Dict) -> str:
     Submit order to CoW API
     Returns order UID string or raises exception
     """
-    try:
-        response = requests.post(
-            url=f"{API_BASE_URL}/orders", headers=API_HEADERS, json=order_payload
-        )
-        response.raise_for_status()
-        return response.text.strip('"')
-    except requests.RequestException as e:
-        if e.response is not None:
-            error_data = e.response.json()
-            error_type = error_data.get("errorType", "Unknown")
-            error_description = error_data.get("description", str(e))
-            raise Exception(f"{error_type} - {error_description}")
-        raise Exception(f"Order request failed: {e}")
+    with _span("submit_order"):
+        return COW_API_CLIENT.submit_order(order_payload)
 
 
-def _save_order(order_uid: str, order_payload: Dict, signed: bool) -> None:
+def _save_order(
+    order_uid: str,
+    order_payload: Dict,
+    signed: bool,
+    block_number: int | None = None,
+    namespace: str | None = None,
+) -> Dict:
     """Save order to database with individual fields"""
-    df = _load_orders_db()
-
     new_order = {
         "orderUid": order_uid,
         "signed": signed,
@@ -731,63 +3659,82 @@ def _save_order(order_uid: str, order_payload: Dict, signed: bool) -> None:
         "sellAmount": order_payload["sellAmount"],
         "buyAmount": order_payload["buyAmount"],
         "validTo": order_payload["validTo"],
+        "block_number": block_number,
+        **ORDER_DEFAULTS,
     }
 
-    df = pd.concat([df, pd.DataFrame([new_order])], ignore_index=True)
-    _save_orders_db(df)
+    _get_storage(namespace).insert_order(new_order)
+    return new_order
 
 
-def sign_order(order_uid: str, order_payload: dict) -> None:
+def sign_order(
+    order_uid: str, order_payload: dict, trading_module_address: str = TRADING_MODULE_ADDRESS
+) -> None:
     """Sign order via TradingModule contract"""
 
     BALANCE_ERC20 = "0x5a28e9363bb942b639270062aa6bb295f434bcdfc42c97267bf003f272060dc9"
     KIND_SELL = "0xf3b277728b3fee749481eb3e0b3b48980dbbab78658fc419025cb16eee346775"
 
-    TRADING_MODULE_CONTRACT.setOrder(
-        order_uid,
-        (
-            order_payload["sellToken"],
-            order_payload["buyToken"],
-            order_payload["receiver"],
-            order_payload["sellAmount"],
-            order_payload["buyAmount"],
-            order_payload["validTo"],
-            order_payload["appDataHash"],
-            order_payload["feeAmount"],
-            KIND_SELL,
-            order_payload["partiallyFillable"],
-            BALANCE_ERC20,
-            BALANCE_ERC20,
-        ),
-        True,
-        sender=bot.signer,
-    )
+    _count("rpc_calls", "eth_sendTransaction")
+    with _span("sign_order"):
+        _get_contract(trading_module_address, "TradingModule").setOrder(
+            order_uid,
+            (
+                order_payload["sellToken"],
+                order_payload["buyToken"],
+                order_payload["receiver"],
+                order_payload["sellAmount"],
+                order_payload["buyAmount"],
+                order_payload["validTo"],
+                order_payload["appDataHash"],
+                order_payload["feeAmount"],
+                KIND_SELL,
+                order_payload["partiallyFillable"],
+                BALANCE_ERC20,
+                BALANCE_ERC20,
+            ),
+            True,
+            sender=bot.signer,
+        )
 
 
 def create_submit_and_sign_order(
     sell_token: str,
     buy_token: str,
     sell_amount: str,
+    block_number: int | None = None,
+    portfolio: Portfolio = PORTFOLIOS[0],
 ) -> tuple[str | None, str | None]:
     """
-    Create and submit order to CoW API
+    Create and submit an order for `portfolio`'s Safe to CoW API, reusing the block's cached
+    quote when available
     Returns (order_uid, error_message)
     """
+    owner = portfolio.safe_address
     try:
-        quote_payload = _construct_quote_payload(
-            sell_token=sell_token, buy_token=buy_token, sell_amount=sell_amount
-        )
-        quote = _get_quote(quote_payload)
-        click.echo(f"Quote received: {quote}")
+        quote = None
+        if block_number is not None:
+            quote = QUOTE_CACHE.get(block_number, sell_token, buy_token, sell_amount, owner)
+
+        if quote is None:
+            quote_payload = _construct_quote_payload(
+                sell_token=sell_token, buy_token=buy_token, sell_amount=sell_amount, owner=owner
+            )
+            quote = _get_quote(quote_payload)
+            click.echo(f"Quote received: {quote}")
+        else:
+            click.echo(f"Reusing quote: {quote}")
 
         order_payload = _construct_order_payload(quote)
         order_uid = _submit_order(order_payload)
         click.echo(f"Order submitted: {order_uid}")
 
-        _save_order(order_uid, order_payload, False)
+        order = _save_order(order_uid, order_payload, False, block_number, portfolio.namespace)
+        _get_order_tracker(owner, portfolio.namespace).track(order)
 
         click.echo("Signing order...")
-        sign_order(order_uid, order_payload)
+        sign_order(order_uid, order_payload, portfolio.trading_module_address)
+        _get_storage(portfolio.namespace).update_order(order_uid, signed=True)
 
         return order_uid, None
 
@@ -795,93 +3742,249 @@ def create_submit_and_sign_order(
         return None, str(e)
 
 
-# Silverback bot
-@bot.on_startup()
-def bot_startup(startup_state: StateSnapshot):
-    """Initialize bot state and historical data"""
-    if PROMPT_AUTOSIGN and click.confirm("Enable autosign?"):
-        bot.signer.set_autosign(enabled=True)
+class OrderTracker:
+    """
+    Follows submitted orders until they are fulfilled, expired or cancelled.
+    All open orders are refreshed together from the account orders endpoint, more often as the
+    nearest `validTo` approaches. Fills from our own Trade events are applied as they arrive, and
+    while the API is unreachable open orders are matched against the owner's Trade logs instead.
+    """
 
-    # Process historical trades
-    block_db = _load_block_db()
-    last_processed_block = block_db
-    _save_block_db(chain.blocks.head.number)
-    _process_historical_trades(
-        GPV2_SETTLEMENT_CONTRACT,
-        start_block=last_processed_block,
-        stop_block=chain.blocks.head.number,
-    )
+    def __init__(
+        self,
+        client: CowOrderbookClient = COW_API_CLIENT,
+        owner: str = SAFE_ADDRESS,
+        namespace: str | None = None,
+        min_interval: float = ORDER_POLL_MIN_SECONDS,
+        max_interval: float = ORDER_POLL_MAX_SECONDS,
+    ):
+        self.client = client
+        self.owner = owner
+        self.namespace = namespace
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.next_poll_at = 0.0
+        self.polls = 0
+        self.fallback_polls = 0
+        self.transitions = 0
+        self._orders: Dict[str, Dict] | None = None
+        self._lock = threading.RLock()
+
+    def open_orders(self) -> Dict[str, Dict]:
+        """Open orders by UID, loaded from storage on first use"""
+        with self._lock:
+            if self._orders is None:
+                open_orders = _get_storage(self.namespace).load_open_orders().to_dict("records")
+                self._orders = {order["orderUid"]: order for order in open_orders}
+            return self._orders
+
+    def track(self, order: Dict) -> None:
+        """Start tracking a newly submitted order"""
+        with self._lock:
+            self.open_orders()[order["orderUid"]] = dict(order)
+            self.next_poll_at = min(self.next_poll_at, time.time() + self.min_interval)
+
+    def due(self, now: float | None = None) -> bool:
+        with self._lock:
+            return bool(self.open_orders()) and (now or time.time()) >= self.next_poll_at
+
+    def poll(self, block_number: int, now: float | None = None) -> Dict:
+        """Refresh every open order and schedule the next poll"""
+        now = time.time() if now is None else now
+        with self._lock:
+            orders = {uid: dict(order) for uid, order in self.open_orders().items()}
 
-    # Initialize bot state
+        try:
+            updates = self._fetch_order_updates(orders, now)
+            self.polls += 1
+        except requests.RequestException as e:
+            click.echo(f"Order status request failed ({e}), matching Trade logs instead")
+            updates = self._match_trade_logs(orders, block_number, now)
+            self.fallback_polls += 1
+
+        transitions = sum(self._apply(uid, update) for uid, update in updates.items())
+        with self._lock:
+            self.next_poll_at = now + self._interval(self.open_orders().values(), now)
+        return {"order_transitions": transitions}
+
+    def record_trade(self, order_uid: str, sell_amount: int, buy_amount: int) -> None:
+        """Apply the fill from one of our own Trade events"""
+        with self._lock:
+            order = self.open_orders().get(order_uid)
+            if order is None:
+                return
+            executed_sell = int(order["executedSellAmount"]) + sell_amount
+            executed_buy = int(order["executedBuyAmount"]) + buy_amount
+            update = {
+                "status": "fulfilled" if executed_sell >= int(order["sellAmount"]) else "open",
+                "executedSellAmount": str(executed_sell),
+                "executedBuyAmount": str(executed_buy),
+            }
+            self._apply(order_uid, update)
+
+    def stats(self) -> Dict:
+        return {
+            "open_orders": len(self.open_orders()),
+            "order_polls": self.polls,
+            "order_fallback_polls": self.fallback_polls,
+            "order_transitions": self.transitions,
+        }
 
-    decisions_df = _load_decisions_db()
-    if decisions_df.empty:
-        bot.state.next_decision_block = chain.blocks.head.number
-    else:
-        bot.state.next_decision_block = decisions_df.iloc[-1].block_number + TRADING_BLOCK_COOLDOWN
+    def _interval(self, orders, now: float) -> float:
+        """A quarter of the time left until the nearest expiry, within the configured bounds"""
+        expiries = [order["validTo"] for order in orders]
+        if not expiries:
+            return self.max_interval
+        return float(np.clip((min(expiries) - now) / 4, self.min_interval, self.max_interval))
+
+    def _fetch_order_updates(self, orders: Dict[str, Dict], now: float) -> Dict[str, Dict]:
+        """Page through the owner's orders, most recent first, until every open order is found"""
+        updates = {}
+        offset = 0
+
+        while len(updates) < len(orders):
+            page = self.client.get_account_orders(self.owner, offset, ORDER_POLL_PAGE_SIZE)
+            for remote in page:
+                if remote["uid"] in orders:
+                    updates[remote["uid"]] = {
+                        "status": remote["status"],
+                        "executedSellAmount": str(remote["executedSellAmount"]),
+                        "executedBuyAmount": str(remote["executedBuyAmount"]),
+                    }
+            if len(page) < ORDER_POLL_PAGE_SIZE:
+                break
+            offset += len(page)
+
+        for uid, order in orders.items():
+            if uid not in updates and order["validTo"] < now:
+                updates[uid] = {"status": "expired"}
+        return updates
+
+    def _match_trade_logs(
+        self, orders: Dict[str, Dict], block_number: int, now: float
+    ) -> Dict[str, Dict]:
+        """Derive order updates from the owner's Trade logs since the orders were placed"""
+        start_block = min(
+            (int(o["block_number"]) for o in orders.values() if not pd.isna(o["block_number"])),
+            default=block_number - TRADING_BLOCK_COOLDOWN,
+        )
+        fills = _decode_order_fills(
+            _get_raw_trade_logs(GPV2_SETTLEMENT_CONTRACT, start_block, block_number, self.owner)
+        )
 
-    bot.state.can_trade = False
-    bot.state.sell_token = None
+        updates = {}
+        for uid, order in orders.items():
+            executed_sell, executed_buy = fills.get(uid, (0, 0))
+            if executed_sell >= int(order["sellAmount"]):
+                status = "fulfilled"
+            elif order["validTo"] < now:
+                status = "expired"
+            else:
+                status = order["status"]
+            updates[uid] = {
+                "status": status,
+                "executedSellAmount": str(executed_sell),
+                "executedBuyAmount": str(executed_buy),
+            }
+        return updates
+
+    def _apply(self, order_uid: str, update: Dict) -> bool:
+        """Persist changed fields; returns True on a status transition"""
+        with self._lock:
+            order = self.open_orders().get(order_uid)
+            if order is None:
+                return False
+            changed = {k: v for k, v in update.items() if order.get(k) != v}
+            if not changed:
+                return False
+            order.update(changed)
+            if order["status"] not in ORDER_OPEN_STATUSES:
+                del self._orders[order_uid]
+
+            _get_storage(self.namespace).update_order(order_uid, **changed)
+            if "status" not in changed:
+                return False
+            self.transitions += 1
 
-    return {"message": "Starting...", "block_number": startup_state.last_block_seen}
+        click.echo(
+            f"Order {order_uid[:10]}... {order['status']}: "
+            f"sold {order['executedSellAmount']}, bought {order['executedBuyAmount']}"
+        )
+        return True
 
 
-@bot.on_worker_startup()
-def worker_startup(state: TaskiqState):
-    """Initialize worker state"""
-    state.agent = trading_agent
-    state.trades_df = _load_trades_db()
-    state.decisions_df = _load_decisions_db()
+@lru_cache
+def _get_order_tracker(owner: str = SAFE_ADDRESS, namespace: str | None = None) -> OrderTracker:
+    """Return the order tracker of one Safe, whose orders are stored in `namespace`"""
+    return OrderTracker(owner=owner, namespace=namespace)
 
 
-@bot.on_(chain.blocks)
-def update_state(block: BlockAPI, context: Annotated[Context, TaskiqDepends()]):
-    """Update trade history and decision outcomes"""
-    click.echo(f"\n[{block.number}] Starting state update...")
-    _save_block_db(block.number)
-    bot.state.can_trade = False
-    click.echo(f"[{block.number}] State: trade={bot.state.can_trade}, sell={bot.state.sell_token}")
+# Portfolio helper functions
+@dataclass
+class PortfolioState:
+    """Trading state of one portfolio, shared by the block handlers through `bot.state`"""
+
+    next_decision_block: int
+    can_trade: bool = False
+    sell_token: str | None = None
+
+
+def _next_decision_block(portfolio: Portfolio, head_block: int) -> int:
+    """First block a portfolio may decide at: its cooldown after its latest decision"""
+    decisions_df = _load_decisions_db(portfolio.namespace)
+    if decisions_df.empty:
+        return head_block
+    return int(decisions_df.iloc[-1].block_number) + portfolio.cooldown_blocks
 
-    if block.number < bot.state.next_decision_block:
-        click.echo(f"[{block.number}] Skip - next decision at {bot.state.next_decision_block}")
-        return {"message": "Skipped - before cooldown", "block": block.number}
 
-    click.echo(f"[{block.number}] Past cooldown, catching up trades...")
-    _catch_up_trades(current_block=block.number, next_decision_block=bot.state.next_decision_block)
+def _update_portfolio_state(portfolio: Portfolio, block_number: int, worker: TaskiqState) -> Dict:
+    """Select the sell token of a portfolio past its cooldown and judge its previous decision"""
+    portfolio_state = bot.state.portfolios[portfolio.name]
+    decisions_df = worker.decisions[portfolio.name]
+    tag = f"[{block_number}][{portfolio.name}]"
 
-    bot.state.sell_token = _select_sell_token()
-    click.echo(f"[{block.number}] Sell token: {bot.state.sell_token}")
+    with _span("select_sell_token"):
+        portfolio_state.sell_token = _select_sell_token(
+            block_number,
+            owner=portfolio.safe_address,
+            minimum_balances=portfolio.minimum_token_balances,
+        )
+    click.echo(f"{tag} Sell token: {portfolio_state.sell_token}")
 
-    if not bot.state.sell_token:
-        click.echo(f"[{block.number}] No eligible sell tokens found")
-        return {"message": "No eligible sell tokens", "block": block.number}
+    if not portfolio_state.sell_token:
+        click.echo(f"{tag} No eligible sell tokens found")
+        return {"message": "No eligible sell tokens"}
 
-    if context.state.decisions_df.empty:
-        click.echo(f"[{block.number}] No previous decisions, enabling trading")
-        bot.state.can_trade = True
+    if decisions_df.empty:
+        click.echo(f"{tag} No previous decisions, enabling trading")
+        portfolio_state.can_trade = True
         return {"message": "No previous decisions", "can_trade": True}
 
-    latest_decision = context.state.decisions_df.iloc[-1]
+    latest_decision = decisions_df.iloc[-1]
     msg = (
-        f"[{block.number}] Latest: "
-        f"trade={latest_decision.should_trade}, "
-        f"block={latest_decision.block_number}"
+        f"{tag} Latest: trade={latest_decision.should_trade}, block={latest_decision.block_number}"
     )
     click.echo(msg)
 
     if not latest_decision.should_trade:
-        click.echo(f"[{block.number}] Last decision wasn't a trade, enabling trading")
-        bot.state.can_trade = True
+        click.echo(f"{tag} Last decision wasn't a trade, enabling trading")
+        portfolio_state.can_trade = True
         return {
             "message": "Last decision was not a trade",
             "can_trade": True,
             "last_decision_block": latest_decision.block_number,
         }
 
-    click.echo(f"[{block.number}] Creating trade context for outcome update...")
-    trade_ctx = _create_trade_context(
-        trades_df=context.state.trades_df, decisions_df=context.state.decisions_df
-    )
+    click.echo(f"{tag} Creating trade context for outcome update...")
+    with _span("create_trade_context"):
+        trade_ctx = _create_trade_context(
+            trades_df=None,
+            decisions_df=decisions_df,
+            metrics_engine=worker.metrics_engine,
+            block_number=block_number,
+            owner=portfolio.safe_address,
+            sell_token=latest_decision.sell_token,
+        )
 
     matching_metrics = [
         m.last_price
@@ -890,27 +3993,27 @@ def update_state(block: BlockAPI, context: Annotated[Context, TaskiqDepends()]):
     ]
 
     if not matching_metrics:
-        click.echo(
-            f"[{block.number}] No metrics {latest_decision.sell_token}-{latest_decision.buy_token}"
-        )
-        context.state.decisions_df = _update_latest_decision_outcome(
-            decisions_df=context.state.decisions_df,
-            final_price=None,
+        click.echo(f"{tag} No metrics {latest_decision.sell_token}-{latest_decision.buy_token}")
+        with _span("outcome_update"):
+            worker.decisions[portfolio.name] = _update_latest_decision_outcome(
+                decisions_df=decisions_df,
+                final_price=None,
+                namespace=portfolio.namespace,
+            )
+        portfolio_state.can_trade = True
+        return {"message": "Marked as unknown outcome", "can_trade": True}
+
+    click.echo(f"{tag} Updating previous decision outcome...")
+    with _span("outcome_update"):
+        worker.decisions[portfolio.name] = _update_latest_decision_outcome(
+            decisions_df=decisions_df,
+            final_price=matching_metrics[0],
+            order=_load_decision_order(latest_decision.block_number, portfolio.namespace),
+            namespace=portfolio.namespace,
         )
-        bot.state.can_trade = True
-        return {
-            "message": "Marked as unknown outcome",
-            "block": block.number,
-            "can_trade": True,
-        }
 
-    click.echo(f"[{block.number}] Updating previous decision outcome...")
-    context.state.decisions_df = _update_latest_decision_outcome(
-        decisions_df=context.state.decisions_df, final_price=matching_metrics[0]
-    )
-
-    bot.state.can_trade = True
-    click.echo(f"[{block.number}] State: trade={bot.state.can_trade}, sell={bot.state.sell_token}")
+    portfolio_state.can_trade = True
+    click.echo(f"{tag} State: trade={portfolio_state.can_trade}, sell={portfolio_state.sell_token}")
     return {
         "message": "Updated previous decision outcome",
         "can_trade": True,
@@ -918,67 +4021,449 @@ def update_state(block: BlockAPI, context: Annotated[Context, TaskiqDepends()]):
     }
 
 
-@bot.on_(chain.blocks)
-def make_trading_decision(block: BlockAPI, context: Annotated[Context, TaskiqDepends()]):
-    """Make and execute trading decisions"""
-    click.echo(f"\n[{block.number}] Starting trading decision...")
-    click.echo(f"[{block.number}] State: trade={bot.state.can_trade}, sell={bot.state.sell_token}")
-
-    if not bot.state.can_trade:
-        click.echo(f"[{block.number}] Trading not enabled, skipping")
-        return {"message": "Trading not enabled", "block": block.number}
+async def _make_portfolio_decision(
+    portfolio: Portfolio, block_number: int, worker: TaskiqState
+) -> Dict:
+    """Run the agent for one portfolio, save its decision and place its order"""
+    portfolio_state = bot.state.portfolios[portfolio.name]
+    sell_token = portfolio_state.sell_token
+    tag = f"[{block_number}][{portfolio.name}]"
+
+    click.echo(f"{tag} Creating trade context...")
+    with _span("create_trade_context"):
+        trade_ctx = await asyncio.to_thread(
+            _create_trade_context,
+            trades_df=None,
+            decisions_df=worker.decisions[portfolio.name],
+            metrics_engine=worker.metrics_engine,
+            block_number=block_number,
+            owner=portfolio.safe_address,
+            sell_token=sell_token,
+        )
 
-    click.echo(f"[{block.number}] Creating trade context...")
-    trade_ctx = _create_trade_context(
-        trades_df=context.state.trades_df, decisions_df=context.state.decisions_df
+    click.echo(f"{tag} Running agent with sell_token={sell_token}...")
+    deps = AgentDependencies(
+        trade_ctx=trade_ctx,
+        sell_token=sell_token,
+        block_number=block_number,
+        owner=portfolio.safe_address,
     )
 
-    click.echo(f"[{block.number}] Running agent with sell_token={bot.state.sell_token}...")
-    deps = AgentDependencies(trade_ctx=trade_ctx, sell_token=bot.state.sell_token)
-
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-
-    result = context.state.agent.run_sync(
-        "Analyze current market conditions and make a trading decision", deps=deps
-    )
+    cache_key = _decision_cache_key(trade_ctx, sell_token)
+    response = worker.decision_cache.get(cache_key, block_number)
+    if response is not None:
+        click.echo(f"{tag} Context unchanged, reusing cached decision")
+        run_stats = AgentRunStats(cached=True)
+    else:
+        response, run_stats = await _run_agent(worker.agent, deps)
+        if not run_stats.timed_out:
+            worker.decision_cache.put(cache_key, block_number, response)
 
     click.echo(
-        f"[{block.number}] Agent: trade={result.data.should_trade}, buy={result.data.buy_token}"
+        f"{tag} Agent: trade={response.should_trade}, buy={response.buy_token}, "
+        f"llm={run_stats.llm_seconds}s, tools={run_stats.tool_calls}, "
+        f"tokens={run_stats.total_tokens}, timed_out={run_stats.timed_out}"
     )
-    _save_reasoning(block.number, result.data.reasoning)
+    with _span("save_decision"):
+        _save_reasoning(block_number, response.reasoning, asdict(run_stats), portfolio.namespace)
 
     decision = _build_decision(
-        block_number=block.number,
-        response=result.data,
+        block_number=block_number,
+        response=response,
         metrics=trade_ctx.metrics,
-        sell_token=bot.state.sell_token,
+        sell_token=sell_token,
+        cached=run_stats.cached,
     )
 
     decision.valid = _validate_decision(decision)
-    click.echo(f"[{block.number}] Decision valid={decision.valid}")
-    _save_decision(decision)
+    click.echo(f"{tag} Decision valid={decision.valid}")
+    with _span("save_decision"):
+        worker.decisions[portfolio.name] = _save_decision(decision, portfolio.namespace)
 
     if decision.valid and decision.should_trade:
-        click.echo(f"[{block.number}] Order: {decision.sell_token} -> {decision.buy_token}")
-        order_uid, error = create_submit_and_sign_order(
-            sell_token=decision.sell_token,
-            buy_token=decision.buy_token,
-            sell_amount=trade_ctx.token_balances[decision.sell_token],
-        )
+        click.echo(f"{tag} Order: {decision.sell_token} -> {decision.buy_token}")
+        with _span("order"):
+            order_uid, error = await asyncio.to_thread(
+                create_submit_and_sign_order,
+                sell_token=decision.sell_token,
+                buy_token=decision.buy_token,
+                sell_amount=trade_ctx.token_balances[decision.sell_token],
+                block_number=block_number,
+                portfolio=portfolio,
+            )
         if error:
-            click.echo(f"[{block.number}] Order failed: {error}")
+            click.echo(f"{tag} Order failed: {error}")
         else:
-            click.echo(f"[{block.number}] Order: {order_uid}")
+            click.echo(f"{tag} Order: {order_uid}")
 
-    bot.state.next_decision_block = block.number + TRADING_BLOCK_COOLDOWN
-    click.echo(f"[{block.number}] Next decision: {bot.state.next_decision_block}")
+    portfolio_state.can_trade = False
+    portfolio_state.next_decision_block = block_number + portfolio.cooldown_blocks
+    click.echo(f"{tag} Next decision: {portfolio_state.next_decision_block}")
 
     return {
-        "message": "Trading decision made",
-        "block": block.number,
         "should_trade": decision.should_trade,
         "sell_token": decision.sell_token,
         "buy_token": decision.buy_token,
-        "next_decision_block": bot.state.next_decision_block,
+        "next_decision_block": portfolio_state.next_decision_block,
+        **asdict(run_stats),
+    }
+
+
+# Followed chain helper functions
+class ChainPipeline:
+    """
+    Trade ingestion and metrics for a chain followed alongside the bot's own, through its own
+    provider, settlement contract, token universe and trade store namespace. Only confirmed
+    blocks are ingested, so there are no reorgs to handle. Log chunks are fetched on an
+    executor shared by all followed chains, at most `max_workers` at a time per chain.
+    """
+
+    def __init__(
+        self,
+        config: ChainConfig,
+        executor: ThreadPoolExecutor,
+        provider=None,
+        max_workers: int = BACKFILL_MAX_WORKERS,
+    ):
+        self.config = config
+        self.executor = executor
+        self.max_workers = max_workers
+        self.settlement_contract = _get_contract(config.settlement_address, "GPv2Settlement")
+        self.token_bytes = {bytes.fromhex(token[2:]): token for token in config.tokens}
+        self.metrics_engine = RollingMetricsEngine()
+        self.synced_block: int | None = None
+        self.error: str | None = None
+        self._provider = provider
+        self._sync: Future | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def provider(self):
+        """The chain's provider, connected on first use without changing the bot's own"""
+        if self._provider is None:
+            self._provider = networks.get_provider_from_choice(self.config.network)
+        if not self._provider.is_connected:
+            self._provider.connect()
+        return self._provider
+
+    def sync(self) -> int:
+        """
+        Store the trades of blocks confirmed since the last sync and feed them to the metrics
+        engine, which the agent reads through `get_followed_chain_metrics`. A chain followed for
+        the first time starts LOOKBACK_BLOCKS back. Returns the number of trades stored.
+        """
+        namespace = self.config.namespace
+        if self.synced_block is None:
+            self.metrics_engine.update(_load_lookback_trades(namespace=namespace))
+            self.synced_block = _trade_store_cursor(namespace)
+
+        _count("rpc_calls", "eth_blockNumber")
+        confirmed_block = self.provider.web3.eth.block_number - CONFIRMATION_BLOCKS
+        start_block = (
+            max(confirmed_block - LOOKBACK_BLOCKS, 0)
+            if self.synced_block is None
+            else self.synced_block + 1
+        )
+        if start_block > confirmed_block:
+            return 0
+
+        stored = _backfill_trades(
+            self.settlement_contract,
+            start_block=start_block,
+            stop_block=confirmed_block,
+            max_workers=self.max_workers,
+            provider=self.provider,
+            token_bytes=self.token_bytes,
+            namespace=namespace,
+            executor=self.executor,
+        )
+        # Ranges stored by an earlier run are skipped by the backfill but still read here
+        trades = _load_trades_db(start_block, namespace=namespace)
+        self.metrics_engine.update(trades[trades.block_number <= confirmed_block])
+        _archive_trade_store(namespace=namespace)
+        self.synced_block = confirmed_block
+        return stored
+
+    def poll(self) -> Dict:
+        """
+        Start a sync in the background unless the previous one is still running, so a slow
+        chain is skipped rather than queued up. Returns the state of the chain.
+        """
+        with self._lock:
+            running = self._sync is not None and not self._sync.done()
+            if not running:
+                if self._sync is not None and self._sync.exception() is not None:
+                    self.error = repr(self._sync.exception())
+                    click.echo(f"Sync of chain {self.config.chain_id} failed: {self.error}")
+                self._sync = _get_chain_sync_executor().submit(self.sync)
+
+        return {
+            "synced_block": self.synced_block,
+            "sync_skipped": running,
+            "pairs": len(self.metrics_engine.pairs),
+            "error": self.error,
+        }
+
+    def metrics(self) -> List[TradeMetrics]:
+        return self.metrics_engine.metrics()
+
+
+@lru_cache
+def _get_chain_sync_executor() -> ThreadPoolExecutor:
+    """One sync thread per followed chain, each waiting on the shared fetch executor"""
+    return ThreadPoolExecutor(max(len(FOLLOWED_CHAINS), 1), thread_name_prefix="chain-sync")
+
+
+@lru_cache
+def _get_chain_pipelines() -> List[ChainPipeline]:
+    """Pipelines of the followed chains, created once per process with a shared fetch executor"""
+    executor = ThreadPoolExecutor(CHAIN_FETCH_WORKERS, thread_name_prefix="chain-fetch")
+    return [
+        ChainPipeline(_get_chain(chain_id), executor)
+        for chain_id in FOLLOWED_CHAINS
+        if chain_id != CHAIN_ID
+    ]
+
+
+# Silverback bot
+@bot.on_startup()
+def bot_startup(startup_state: StateSnapshot):
+    """Initialize bot state and historical data"""
+    if PROMPT_AUTOSIGN and click.confirm("Enable autosign?"):
+        bot.signer.set_autosign(enabled=True)
+
+    # Process historical trades
+    _migrate_trade_store()
+    _import_trades_csv()
+    start_block = _trade_store_start()
+    if start_block is None:
+        start_block = _load_block_db()
+    head_block = chain.blocks.head.number
+    _save_block_db(head_block)
+    TOKEN_UNIVERSE.refresh(head_block)
+    click.echo(f"Monitoring {len(TOKEN_UNIVERSE.tokens)} tokens")
+    _backfill_trades(
+        GPV2_SETTLEMENT_CONTRACT,
+        start_block=start_block,
+        stop_block=head_block - CONFIRMATION_BLOCKS,
+    )
+    archived = _archive_trade_store()
+    if archived:
+        click.echo(f"Archived {archived} trades older than {TRADE_RETENTION_BLOCKS} blocks")
+
+    # Initialize bot state
+    bot.state.portfolios = {
+        portfolio.name: PortfolioState(_next_decision_block(portfolio, head_block))
+        for portfolio in PORTFOLIOS
+    }
+
+    return {"message": "Starting...", "block_number": startup_state.last_block_seen}
+
+
+@bot.on_worker_startup()
+def worker_startup(state: TaskiqState):
+    """Initialize worker state"""
+    _start_metrics_server()
+    TOKEN_UNIVERSE.load()
+    state.agent = trading_agent
+    state.decisions = {
+        portfolio.name: _load_decisions_db(portfolio.namespace) for portfolio in PORTFOLIOS
+    }
+    _migrate_trade_store()
+    state.trade_cache = TradeCache()
+    state.trade_cache.refresh()
+    last_trade_block = _last_trade_block()
+    state.metrics_engine = RollingMetricsEngine()
+    if last_trade_block is not None:
+        lookback_trades = state.trade_cache.table(start_block=last_trade_block - LOOKBACK_BLOCKS)
+        state.metrics_engine.update(_trades_frame(lookback_trades))
+    state.live_writer_lock = _claim_live_writer()
+    if state.live_writer_lock is None:
+        state.live_reader_lock = _register_live_reader()
+        state.live_trades = None
+    else:
+        state.live_trades = _LiveTradeBuffer()
+    state.decision_cache = DecisionCache()
+
+
+@bot.on_(GPV2_SETTLEMENT_CONTRACT.Trade)
+@_instrumented
+def ingest_trade(log: ContractLog, context: Annotated[Context, TaskiqDepends()]):
+    """Ingest monitored trades as they are emitted"""
+    if context.state.live_trades is None:
+        return {"message": "Skipped - not the live writer", "block": log.block_number}
+    context.state.live_trades.mark_seen(log.block_number)
+
+    if not _is_monitored_trade(log):
+        return {"message": "Skipped - token not monitored", "block": log.block_number}
+
+    trade = _process_trade_log(log)
+    if not context.state.live_trades.add(trade, _as_bytes(log.block_hash)):
+        return {"message": "Skipped - orphaned or re-fetched block", "block": log.block_number}
+
+    # Only fills of accepted blocks count towards an order, and each only once
+    portfolio = PORTFOLIO_SAFES.get(log.owner)
+    if portfolio is not None:
+        BALANCE_CACHE.invalidate()
+        order_uid = "0x" + _as_bytes(log.orderUid).hex()
+        _get_order_tracker(portfolio.safe_address, portfolio.namespace).record_trade(
+            order_uid, int(log.sellAmount), int(log.buyAmount)
+        )
+
+    context.state.metrics_engine.update([trade])
+    _count("rows_ingested", "live")
+    return {"message": "Trade ingested", "block": log.block_number}
+
+
+@bot.on_(chain.blocks)
+@_instrumented
+def update_state(block: BlockAPI, context: Annotated[Context, TaskiqDepends()]):
+    """Update trade history and, for portfolios past their cooldown, decision outcomes"""
+    click.echo(f"\n[{block.number}] Starting state update...")
+    with _span("save_block"):
+        _save_block_db(block.number)
+    for portfolio_state in bot.state.portfolios.values():
+        portfolio_state.can_trade = False
+
+    # Other worker processes pick up the live writer's flushes and rollbacks from the store
+    live_trades = context.state.live_trades
+    if live_trades is not None:
+        live_trades.mark_seen(block.number)
+        with _span("reorg_check"):
+            fork_block = _find_fork_block(live_trades, block)
+        if fork_block is not None:
+            with _span("reorg_resync"):
+                resynced = _resync_after_reorg(
+                    live_trades,
+                    context.state.metrics_engine,
+                    context.state.trade_cache,
+                    fork_block,
+                    block.number,
+                )
+            click.echo(
+                f"[{block.number}] Reorg from block {fork_block}, re-fetched {resynced} trades"
+            )
+        live_trades.prune(block.number - REORG_TRACKING_BLOCKS)
+
+    with _span("refresh_token_universe"):
+        if TOKEN_UNIVERSE.refresh(block.number):
+            BALANCE_CACHE.invalidate()
+            click.echo(f"[{block.number}] Token universe now {len(TOKEN_UNIVERSE.tokens)} tokens")
+
+    confirmed_block = block.number - CONFIRMATION_BLOCKS
+    due = [
+        portfolio
+        for portfolio in PORTFOLIOS
+        if block.number >= bot.state.portfolios[portfolio.name].next_decision_block
+    ]
+
+    if live_trades is not None and (
+        due or confirmed_block - (live_trades.flushed_block or 0) >= LIVE_FLUSH_BLOCKS
+    ):
+        with _span("flush_live_trades"):
+            flushed = _flush_live_trades(
+                live_trades, stop_block=confirmed_block, metrics_engine=context.state.metrics_engine
+            )
+        click.echo(f"[{block.number}] Stored {flushed} live trades up to {confirmed_block}")
+        with _span("archive_trades"):
+            archived = _archive_trade_store()
+        if archived:
+            click.echo(f"[{block.number}] Archived {archived} trades to cold partitions")
+
+    if not due:
+        next_decision_block = min(s.next_decision_block for s in bot.state.portfolios.values())
+        click.echo(f"[{block.number}] Skip - next decision at {next_decision_block}")
+        return {"message": "Skipped - before cooldown", "block": block.number}
+
+    with _span("refresh_worker_state"):
+        refreshed = _refresh_trade_cache(context.state.trade_cache, context.state.metrics_engine)
+        for portfolio in due:
+            context.state.decisions[portfolio.name] = _refresh_decisions(
+                context.state.decisions[portfolio.name], portfolio.namespace
+            )
+    _count("rows_ingested", "trade_cache", amount=refreshed.rows.num_rows)
+
+    click.echo(f"[{block.number}] Past cooldown, filling trade gaps...")
+    with _span("catch_up_trades"):
+        new_trades = _catch_up_trades(
+            current_block=confirmed_block,
+            next_decision_block=min(
+                bot.state.portfolios[portfolio.name].next_decision_block for portfolio in due
+            ),
+        )
+        context.state.metrics_engine.update(new_trades)
+    _count("rows_ingested", "catch_up", amount=len(new_trades))
+
+    results = {
+        portfolio.name: _update_portfolio_state(portfolio, block.number, context.state)
+        for portfolio in due
+    }
+    return {"message": "Updated portfolio state", "block": block.number, "portfolios": results}
+
+
+@bot.on_(chain.blocks)
+@_instrumented
+async def make_trading_decision(block: BlockAPI, context: Annotated[Context, TaskiqDepends()]):
+    """Make and execute trading decisions for every portfolio enabled to trade"""
+    click.echo(f"\n[{block.number}] Starting trading decision...")
+    enabled = [p for p in PORTFOLIOS if bot.state.portfolios[p.name].can_trade]
+
+    if not enabled:
+        click.echo(f"[{block.number}] Trading not enabled, skipping")
+        return {"message": "Trading not enabled", "block": block.number}
+
+    with _span("refresh_worker_state"):
+        refreshed = await asyncio.to_thread(
+            _refresh_trade_cache, context.state.trade_cache, context.state.metrics_engine
+        )
+        for portfolio in enabled:
+            context.state.decisions[portfolio.name] = _refresh_decisions(
+                context.state.decisions[portfolio.name], portfolio.namespace
+            )
+    _count("rows_ingested", "trade_cache", amount=refreshed.rows.num_rows)
+
+    # Portfolios share the metrics, balance multicall and quote cache; each runs its own agent
+    decisions = await asyncio.gather(
+        *(_make_portfolio_decision(p, block.number, context.state) for p in enabled)
+    )
+
+    return {
+        "message": "Trading decisions made",
+        "block": block.number,
+        "portfolios": {p.name: decision for p, decision in zip(enabled, decisions)},
+        **context.state.decision_cache.stats(),
+        **BALANCE_CACHE.stats(),
+    }
+
+
+@bot.on_(chain.blocks)
+@_instrumented
+def follow_chains(block: BlockAPI, context: Annotated[Context, TaskiqDepends()]):
+    """Sync the trade stores and metrics of the followed chains in the background"""
+    pipelines = _get_chain_pipelines()
+    if not pipelines:
+        return {"message": "Skipped - no followed chains", "block": block.number}
+
+    return {
+        "message": "Polled followed chains",
+        "block": block.number,
+        "chains": {pipeline.config.chain_id: pipeline.poll() for pipeline in pipelines},
+    }
+
+
+@bot.on_(chain.blocks)
+@_instrumented
+def track_orders(block: BlockAPI, context: Annotated[Context, TaskiqDepends()]):
+    """Refresh each portfolio's open orders once its polling interval has elapsed"""
+    trackers = {p.name: _get_order_tracker(p.safe_address, p.namespace) for p in PORTFOLIOS}
+    due = {name: tracker for name, tracker in trackers.items() if tracker.due()}
+    if not due:
+        return {"message": "Skipped - no order poll due", "block": block.number}
+
+    return {
+        "message": "Polled open orders",
+        "block": block.number,
+        "portfolios": {
+            name: {**tracker.poll(block.number), **tracker.stats()} for name, tracker in due.items()
+        },
     }
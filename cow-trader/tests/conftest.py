@@ -0,0 +1,108 @@
+"""
+Shared fixtures. Run from the cow-trader directory with `ape test` (or `pytest`), which connects
+to the local `ethereum:local:test` network.
+
+The bot reads its configuration when imported, so the environment is set up here first: the
+ABIs are the subsets in `tests/abi/`, and the default storage paths point at a scratch directory.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+TESTS_DIRPATH = Path(__file__).parent
+
+os.environ.setdefault("SILVERBACK_NETWORK_CHOICE", "ethereum:local:test")
+for _abi_name in ("GPv2Settlement", "TokenAllowlist", "TradingModule"):
+    os.environ.setdefault(
+        f"{_abi_name}_ABI_FILEPATH", str(TESTS_DIRPATH / "abi" / f"{_abi_name}.json")
+    )
+_scratch = tempfile.mkdtemp(prefix="cow-trader-tests-")
+for _name, _filename in (
+    ("TRADE_FILEPATH", "trades.csv"),
+    ("BLOCK_FILEPATH", "block.csv"),
+    ("ORDERS_FILEPATH", "orders.csv"),
+    ("DECISIONS_FILEPATH", "decisions.csv"),
+    ("REASONING_FILEPATH", "reasoning.csv"),
+    ("TRADE_STORE_DIRPATH", "trades"),
+    ("SQLITE_FILEPATH", "state.sqlite"),
+    ("NAMESPACES_DIRPATH", ""),
+    ("TOKEN_CACHE_FILEPATH", "tokens.json"),
+    ("PORTFOLIOS_FILEPATH", "portfolios.json"),
+):
+    os.environ.setdefault(_name, os.path.join(_scratch, _filename))
+
+import bot  # noqa: E402
+
+# Emits LOG2 with topics calldata[0:32] and calldata[32:64] and data calldata[64:]
+TRADE_EMITTER_RUNTIME = "366000600037602051600051604036036040a200"
+TRADE_EMITTER_INIT = "0x6014600c60003960146000f3" + TRADE_EMITTER_RUNTIME
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point every storage path of the bot at a fresh directory"""
+    for name, filename in (
+        ("BLOCK_FILEPATH", "block.csv"),
+        ("ORDERS_FILEPATH", "orders.csv"),
+        ("DECISIONS_FILEPATH", "decisions.csv"),
+        ("REASONING_FILEPATH", "reasoning.csv"),
+        ("TRADE_STORE_DIRPATH", "trades"),
+        ("SQLITE_FILEPATH", "state.sqlite"),
+        ("NAMESPACES_DIRPATH", ""),
+    ):
+        monkeypatch.setattr(bot, name, str(tmp_path / filename))
+    bot._get_storage.cache_clear()
+    yield tmp_path
+    bot._get_storage.cache_clear()
+
+
+def deploy_trade_emitter(web3) -> str:
+    """Deploy a contract that emits whatever log its calldata describes"""
+    tx_hash = web3.eth.send_transaction({"from": web3.eth.accounts[0], "data": TRADE_EMITTER_INIT})
+    return web3.eth.get_transaction_receipt(tx_hash)["contractAddress"]
+
+
+def emit_trade_logs(web3, emitter: str, raw_logs: list[dict]) -> list[int]:
+    """Emit `generate_trade_logs` output from `emitter`, one block per log; returns the blocks"""
+    block_numbers = []
+    for log in raw_logs:
+        tx_hash = web3.eth.send_transaction(
+            {
+                "from": web3.eth.accounts[0],
+                "to": emitter,
+                "data": "0x" + (log["topics"][0] + log["topics"][1] + log["data"]).hex(),
+                "gas": 200_000,
+            }
+        )
+        block_numbers.append(web3.eth.get_transaction_receipt(tx_hash)["blockNumber"])
+    return block_numbers
+
+
+def mine_blocks(web3, n_blocks: int) -> None:
+    for _ in range(n_blocks):
+        web3.eth.send_transaction({"from": web3.eth.accounts[0], "to": web3.eth.accounts[0]})
+
+
+@pytest.fixture
+def web3(chain):
+    return chain.provider.web3
+
+
+@pytest.fixture
+def settlement(web3):
+    """A stand-in settlement contract on the local chain emitting GPv2 Trade logs"""
+    return bot._get_contract(deploy_trade_emitter(web3), "GPv2Settlement")
+
+
+@pytest.fixture
+def emit_trades(web3, settlement):
+    """Emit raw Trade logs from `settlement`"""
+    return lambda raw_logs: emit_trade_logs(web3, settlement.address, raw_logs)
+
+
+@pytest.fixture
+def mine(web3):
+    return lambda n_blocks: mine_blocks(web3, n_blocks)
@@ -0,0 +1,87 @@
+import pandas as pd
+
+import bot
+from benchmarks.synthetic import decode_trade_logs, generate_trade_logs, token_addresses
+
+UNMONITORED_TOKEN = token_addresses(1)[0]
+
+
+def _expected_trades(raw_logs: list[dict], block_numbers: list[int]) -> pd.DataFrame:
+    """Monitored trades of `raw_logs` as `_process_trade_log` builds them"""
+    tokens = bot.MONITORED_TOKENS + [UNMONITORED_TOKEN]
+    trades = []
+    for log, block_number in zip(decode_trade_logs(raw_logs, tokens), block_numbers):
+        log.block_number = block_number
+        if log.sellToken in bot.MONITORED_TOKENS and log.buyToken in bot.MONITORED_TOKENS:
+            trades.append(bot._process_trade_log(log))
+    return pd.DataFrame(trades)
+
+
+def test_backfill_from_local_provider(db, settlement, emit_trades):
+    raw_logs = generate_trade_logs(24, bot.MONITORED_TOKENS + [UNMONITORED_TOKEN], seed=4)
+    block_numbers = emit_trades(raw_logs)
+    start_block, stop_block = block_numbers[0], block_numbers[-1]
+
+    stored = bot._backfill_trades(
+        settlement, start_block, stop_block, chunk_blocks=5, max_workers=3
+    )
+
+    expected = _expected_trades(raw_logs, block_numbers)
+    trades = bot._load_trades_db()
+    assert stored == len(expected) == len(trades) > 0
+    assert list(trades.block_number) == list(expected.block_number)
+    for column in ("owner", "sellToken", "buyToken", "token_a", "token_b"):
+        assert list(trades[column].astype(str).str.lower()) == list(
+            expected[column].astype(str).str.lower()
+        ), column
+    assert list(trades.sellAmount) == [float(amount) for amount in expected.sellAmount]
+    assert list(trades.price) == list(expected.price)
+    assert bot._trade_store_cursor() == stop_block
+    assert bot._missing_block_ranges(start_block, stop_block) == []
+
+    # A second run finds the whole range stored and fetches nothing
+    assert bot._backfill_trades(settlement, start_block, stop_block, chunk_blocks=5) == 0
+    assert len(bot._load_trades_db()) == len(expected)
+
+
+def test_decoded_amounts_and_prices_round_as_processed_trade_logs():
+    token_a, token_b = bot._get_canonical_pair(*bot.MONITORED_TOKENS[:2])
+    # (sellAmount, buyAmount) of trades selling token_a, priced buyAmount / sellAmount
+    amounts = [
+        (7, 3),
+        (3 * 10**17, 10**18),
+        # Beyond 64 bits
+        (3 * 2**130 + 7, 2**200 + 1),
+        (2**64 + 1, 2**64 - 1),
+        # Quotients just off a float64 rounding midpoint
+        (72021389291, 14438035223904801508),
+        (16554568579829061539, 16244868364099531303),
+    ]
+    trades = [(token_a, token_b, *amount) for amount in amounts]
+    # The same trades selling token_b, priced sellAmount / buyAmount
+    trades += [(token_b, token_a, buy, sell) for sell, buy in amounts]
+
+    raw_logs = generate_trade_logs(len(trades), bot.MONITORED_TOKENS, seed=5)
+    for log, (sell_token, buy_token, sell_amount, buy_amount) in zip(raw_logs, trades):
+        log["data"] = b"".join(
+            (
+                bytes(12) + bytes.fromhex(sell_token[2:]),
+                bytes(12) + bytes.fromhex(buy_token[2:]),
+                sell_amount.to_bytes(32, "big"),
+                buy_amount.to_bytes(32, "big"),
+                log["data"][128:],
+            )
+        )
+        log["blockNumber"] = hex(log["blockNumber"])
+    block_numbers = [int(log["blockNumber"], 16) for log in raw_logs]
+
+    expected = _expected_trades(raw_logs, block_numbers)
+    decoded = bot._decode_trade_logs(raw_logs)
+    assert len(decoded) == len(expected) == len(trades)
+    assert list(decoded.block_number) == list(expected.block_number)
+    assert list(decoded.owner.str.lower()) == list(expected.owner.str.lower())
+    assert list(decoded.token_a) == [token_a] * len(trades)
+    assert list(decoded.sellAmount) == [float(amount) for amount in expected.sellAmount]
+    assert list(decoded.buyAmount) == [float(amount) for amount in expected.buyAmount]
+    assert list(decoded.sellAmountRaw) == list(expected.sellAmountRaw)
+    assert list(decoded.price) == list(expected.price)
@@ -0,0 +1,47 @@
+import json
+
+from click.testing import CliRunner
+
+import backtest
+import bot
+from benchmarks.synthetic import generate_trades, token_addresses
+
+
+def test_default_balances_from_cached_token_universe(db, monkeypatch):
+    trades = generate_trades(600, 3, start_block=1, seed=5)
+    bot._append_trades_segment(trades, start_block=1, stop_block=600)
+
+    # The bot last cached an allowlist that differs from the configured tokens
+    tokens = token_addresses(3)
+    filepath = str(db / "tokens.json")
+    bot._save_token_cache(
+        {
+            "allowlist": bot.TOKEN_ALLOWLIST_ADDRESS,
+            "block_number": 600,
+            "tokens": tokens,
+            "metadata": {
+                token: {"symbol": f"T{i}", "decimals": 18} for i, token in enumerate(tokens)
+            },
+        },
+        filepath,
+    )
+    universe = bot.TokenUniverse(
+        {token: bot.TokenMetadata(symbol) for token, symbol in bot.CHAIN.tokens.items()},
+        bot.MINIMUM_TOKEN_BALANCES,
+        filepath=str(db / "missing.json"),
+    )
+    universe.filepath = filepath
+    monkeypatch.setattr(bot, "TOKEN_UNIVERSE", universe)
+    monkeypatch.setattr(backtest, "TOKEN_UNIVERSE", universe)
+
+    output = db / "backtest.json"
+    result = CliRunner().invoke(backtest.main, ["--output", str(output)])
+    assert result.exit_code == 0, result.output
+    for rate in ("blocks/s", "decisions/s", "trades/s"):
+        assert rate in result.output
+
+    replayed = json.loads(output.read_text())
+    assert set(replayed["final_balances"]) == set(tokens)
+    assert replayed["trades"] == len(trades)
+    assert replayed["decisions"] == len(range(1, 601, bot.TRADING_BLOCK_COOLDOWN))
+    assert replayed["blocks_per_second"] > 0
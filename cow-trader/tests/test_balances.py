@@ -0,0 +1,98 @@
+import pytest
+
+import bot
+
+SAFES = [bot.SAFE_ADDRESS, f"0x{0xA1:040x}"]
+OTHER_OWNER = f"0x{0xB2:040x}"
+
+
+def _balance(token: str, owner: str, block_number: int) -> int:
+    """A balance that differs by token, owner and block"""
+    return bot.TOKEN_UNIVERSE.tokens.index(token) * 10**6 + int(owner, 16) % 10**3 + block_number
+
+
+class RecordingMulticall:
+    """Stands in for `multicall.Call`, answering every balanceOf with `_balance`"""
+
+    def __init__(self, multicalls: list):
+        self.calls: list[tuple[str, str]] = []
+        self.block_id = None
+        multicalls.append(self)
+
+    def add(self, method, owner: str) -> None:
+        self.calls.append((method.contract.address, owner))
+
+    def __call__(self, block_id: int | None = None) -> list[int]:
+        self.block_id = block_id
+        return [_balance(token, owner, block_id or 0) for token, owner in self.calls]
+
+
+@pytest.fixture
+def multicalls(monkeypatch):
+    multicalls = []
+    monkeypatch.setattr(bot.multicall, "Call", lambda: RecordingMulticall(multicalls))
+    return multicalls
+
+
+def _expected(owner: str, block_number: int) -> dict[str, int]:
+    return {token: _balance(token, owner, block_number) for token in bot.TOKEN_UNIVERSE.tokens}
+
+
+def test_balance_cache_reads_every_safe_in_one_multicall_per_block(multicalls):
+    cache = bot.BalanceCache(SAFES)
+
+    assert cache.get(100, SAFES[0]) == _expected(SAFES[0], 100)
+    assert cache.get(100, SAFES[1]) == _expected(SAFES[1], 100)
+    assert cache.get(100, SAFES[0]) == _expected(SAFES[0], 100)
+
+    (call,) = multicalls
+    assert call.block_id == 100
+    assert call.calls == [(token, safe) for safe in SAFES for token in bot.TOKEN_UNIVERSE.tokens]
+    assert cache.stats() == {"balance_cache_hits": 2, "balance_cache_misses": 1}
+
+
+def test_balance_cache_refetches_for_a_new_block(multicalls):
+    cache = bot.BalanceCache(SAFES)
+    cache.get(100, SAFES[0])
+
+    assert cache.get(101, SAFES[1]) == _expected(SAFES[1], 101)
+    assert cache.get(101, SAFES[0]) == _expected(SAFES[0], 101)
+    assert [call.block_id for call in multicalls] == [100, 101]
+    assert cache.stats() == {"balance_cache_hits": 1, "balance_cache_misses": 2}
+
+
+def test_balance_cache_refetches_after_invalidation(multicalls):
+    cache = bot.BalanceCache(SAFES)
+    cache.get(100, SAFES[0])
+
+    # e.g. after a fill of one of the Safes within the block
+    cache.invalidate()
+
+    assert cache.get(100, SAFES[0]) == _expected(SAFES[0], 100)
+    assert [call.block_id for call in multicalls] == [100, 100]
+    assert cache.stats() == {"balance_cache_hits": 0, "balance_cache_misses": 2}
+
+
+def test_balance_cache_adds_other_owners_to_the_multicall(multicalls):
+    cache = bot.BalanceCache(SAFES)
+
+    assert cache.get(100, OTHER_OWNER) == _expected(OTHER_OWNER, 100)
+    assert [owner for _, owner in multicalls[0].calls] == [
+        owner for owner in (*SAFES, OTHER_OWNER) for _ in bot.TOKEN_UNIVERSE.tokens
+    ]
+    # Other owners are not kept for the next block
+    cache.get(101, SAFES[0])
+    assert {owner for _, owner in multicalls[1].calls} == set(SAFES)
+
+
+def test_unpinned_balances_bypass_the_cache(multicalls, monkeypatch):
+    monkeypatch.setattr(bot, "BALANCE_CACHE", bot.BalanceCache(SAFES))
+
+    assert bot._get_token_balances(owner=SAFES[0]) == _expected(SAFES[0], 0)
+    assert bot._get_token_balances(owner=SAFES[0]) == _expected(SAFES[0], 0)
+    assert [call.block_id for call in multicalls] == [None, None]
+    assert bot.BALANCE_CACHE.stats() == {"balance_cache_hits": 0, "balance_cache_misses": 0}
+
+    bot._get_token_balances(100, SAFES[0])
+    bot._get_token_balances(100, SAFES[1])
+    assert [call.block_id for call in multicalls] == [None, None, 100]
@@ -0,0 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from ape import networks
+
+import bot
+from benchmarks.synthetic import generate_trade_logs, token_addresses
+from tests.conftest import deploy_trade_emitter, emit_trade_logs, mine_blocks
+
+CHAIN_IDS = (111, 222)
+UNMONITORED_TOKEN = token_addresses(1)[0]
+
+
+@pytest.fixture
+def local_networks():
+    """Two independent local test chains, each with its own provider and settlement stand-in"""
+    chains = {}
+    for chain_id in CHAIN_IDS:
+        provider = networks.get_provider_from_choice(
+            "ethereum:local:test", provider_settings={"chain_id": chain_id}
+        )
+        provider.connect()
+        chains[chain_id] = (provider, deploy_trade_emitter(provider.web3))
+    yield chains
+    for provider, _ in chains.values():
+        provider.disconnect()
+
+
+def _pipeline(chain_id, provider, settlement, executor) -> bot.ChainPipeline:
+    config = bot.ChainConfig(
+        chain_id,
+        "ethereum:local:test",
+        "xdai",
+        settlement_address=settlement,
+        tokens={token: symbol for token, symbol in bot.CHAIN.tokens.items()},
+    )
+    return bot.ChainPipeline(config, executor, provider=provider, max_workers=2)
+
+
+def test_followed_chains_on_two_local_networks(db, local_networks, monkeypatch):
+    monkeypatch.setattr(bot, "CONFIRMATION_BLOCKS", 2)
+    executor = ThreadPoolExecutor(2)
+    pipelines, expected = {}, {}
+    for n_trades, (chain_id, (provider, settlement)) in zip((18, 7), local_networks.items()):
+        raw_logs = generate_trade_logs(
+            n_trades, bot.MONITORED_TOKENS + [UNMONITORED_TOKEN], seed=chain_id
+        )
+        emit_trade_logs(provider.web3, settlement, raw_logs)
+        mine_blocks(provider.web3, bot.CONFIRMATION_BLOCKS)
+        unmonitored = bytes(12) + bytes.fromhex(UNMONITORED_TOKEN[2:])
+        expected[chain_id] = sum(unmonitored not in log["data"][:64] for log in raw_logs)
+        pipelines[chain_id] = _pipeline(chain_id, provider, settlement, executor)
+
+    # Both chains sync concurrently on the shared executor
+    monkeypatch.setattr(bot, "FOLLOWED_CHAINS", list(CHAIN_IDS))
+    for pipeline in pipelines.values():
+        assert pipeline.poll()["sync_skipped"] is False
+    for pipeline in pipelines.values():
+        pipeline._sync.result(timeout=60)
+
+    for chain_id, pipeline in pipelines.items():
+        namespace = pipeline.config.namespace
+        assert namespace == f"chains/{chain_id}"
+        assert len(bot._load_trades_db(namespace=namespace)) == expected[chain_id]
+        confirmed = pipeline.provider.web3.eth.block_number - bot.CONFIRMATION_BLOCKS
+        assert pipeline.synced_block == bot._trade_store_cursor(namespace) == confirmed
+        assert sum(m.trade_count for m in pipeline.metrics()) == expected[chain_id]
+        assert pipeline.poll()["error"] is None
+    # The bot's own trade store is untouched
+    assert bot._load_trades_db().empty
+
+    # The agent sees each chain's metrics with pairs named by token name
+    monkeypatch.setattr(bot, "_get_chain_pipelines", lambda: list(pipelines.values()))
+    followed = bot.get_followed_chain_metrics()
+    assert set(followed) == {str(chain_id) for chain_id in CHAIN_IDS}
+    for chain_id, pipeline in pipelines.items():
+        rows = followed[str(chain_id)]["metrics"]["rows"]
+        assert len(rows) == len(pipeline.metrics())
+        assert all(set(row[0].split("/")) <= {"GNO", "COW", "WXDAI"} for row in rows)
+
+    # A restarted pipeline reads the stored history and resumes after it
+    provider, settlement = local_networks[CHAIN_IDS[0]]
+    restarted = _pipeline(CHAIN_IDS[0], provider, settlement, executor)
+    assert restarted.sync() == 0
+    assert sum(m.trade_count for m in restarted.metrics()) == expected[CHAIN_IDS[0]]
+    executor.shutdown()
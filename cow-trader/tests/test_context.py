@@ -0,0 +1,71 @@
+import bot
+
+USDC_BRIDGED = "0xDDAfbb505ad214D7b80b1f830fcCc89B60fb7A83"
+USDC_NATIVE = "0x2a22f9c3b484c3629090FeED35F17Ff8F88f76F0"
+USDC_LOOKALIKE = "0xDDAf0000000000000000000000000000000000aa"
+
+
+def _metrics(token_a: str, token_b: str, last_price: float) -> bot.TradeMetrics:
+    return bot.TradeMetrics(
+        token_a=token_a,
+        token_b=token_b,
+        last_price=last_price,
+        min_price=last_price,
+        max_price=last_price,
+        volume_buy=1.0,
+        volume_sell=1.0,
+        up_moves_ratio=0.5,
+        max_up_streak=1,
+        max_down_streak=1,
+        trade_count=2,
+    )
+
+
+def test_unique_token_names():
+    names = bot._unique_token_names(
+        {bot.GNO: "GNO", USDC_BRIDGED: "USDC", USDC_NATIVE: "USDC", USDC_LOOKALIKE: "USDC"}
+    )
+    assert names == {
+        bot.GNO: "GNO",
+        USDC_BRIDGED: "USDC-ddafbb",
+        USDC_NATIVE: "USDC-2a22f9",
+        USDC_LOOKALIKE: "USDC-ddaf00",
+    }
+
+
+def test_trade_context_tokens_with_shared_symbol(tmp_path, monkeypatch):
+    universe = bot.TokenUniverse(
+        {
+            bot.GNO: bot.TokenMetadata("GNO", 18),
+            USDC_BRIDGED: bot.TokenMetadata("USDC", 6),
+            USDC_NATIVE: bot.TokenMetadata("USDC", 6),
+        },
+        {},
+        filepath=str(tmp_path / "tokens.json"),
+    )
+    monkeypatch.setattr(bot, "TOKEN_UNIVERSE", universe)
+    trade_ctx = bot.TradeContext(
+        token_balances={bot.GNO: 10**18, USDC_BRIDGED: 5 * 10**6, USDC_NATIVE: 7 * 10**6},
+        metrics=[
+            _metrics(*bot._get_canonical_pair(bot.GNO, USDC_BRIDGED), 100.0),
+            _metrics(*bot._get_canonical_pair(bot.GNO, USDC_NATIVE), 101.0),
+        ],
+        prior_decisions=[],
+    )
+
+    context = bot._encode_trade_context(trade_ctx)
+
+    # Every address the agent sees keeps its own name
+    assert context["tokens"] == {
+        "GNO": bot.GNO,
+        "USDC-ddaf": USDC_BRIDGED,
+        "USDC-2a22": USDC_NATIVE,
+    }
+    assert context["token_balances"] == {
+        "GNO": "1000000000000000000",
+        "USDC-ddaf": "5000000",
+        "USDC-2a22": "7000000",
+    }
+    pairs = [row[0] for row in context["metrics"]["rows"]]
+    assert len(set(pairs)) == 2
+    assert all(set(pair.split("/")) <= set(context["tokens"]) for pair in pairs)
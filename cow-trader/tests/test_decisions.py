@@ -0,0 +1,223 @@
+import asyncio
+import functools
+
+import pytest
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+from taskiq import TaskiqState
+
+import bot
+
+SELL_TOKEN, BUY_TOKEN = bot._get_canonical_pair(*bot.MONITORED_TOKENS[:2])
+# Centres of their log buckets, so small moves stay in the bucket
+PRICE = (1 + bot.DECISION_CACHE_PRICE_TOLERANCE) ** 900
+BALANCE = int((1 + bot.DECISION_CACHE_AMOUNT_TOLERANCE) ** 850)
+
+
+def _trade_context(
+    price: float = PRICE, balance: int = BALANCE, max_up_streak: int = 2
+) -> bot.TradeContext:
+    return bot.TradeContext(
+        token_balances={SELL_TOKEN: balance, BUY_TOKEN: 0},
+        metrics=[
+            bot.TradeMetrics(
+                token_a=SELL_TOKEN,
+                token_b=BUY_TOKEN,
+                last_price=price,
+                min_price=price,
+                max_price=price,
+                volume_buy=1e18,
+                volume_sell=2e18,
+                up_moves_ratio=0.5,
+                max_up_streak=max_up_streak,
+                max_down_streak=1,
+                trade_count=10,
+            )
+        ],
+        prior_decisions=[],
+    )
+
+
+@pytest.mark.parametrize(
+    "nearby",
+    [
+        pytest.param({"price": PRICE * (1 + bot.DECISION_CACHE_PRICE_TOLERANCE / 10)}, id="price"),
+        pytest.param({"price": PRICE * (1 - bot.DECISION_CACHE_PRICE_TOLERANCE / 10)}, id="lower"),
+        pytest.param(
+            {"balance": int(BALANCE * (1 + bot.DECISION_CACHE_AMOUNT_TOLERANCE / 10))},
+            id="balance",
+        ),
+    ],
+)
+def test_decision_cache_key_matches_within_tolerance(nearby):
+    key = bot._decision_cache_key(_trade_context(), SELL_TOKEN)
+    assert bot._decision_cache_key(_trade_context(**nearby), SELL_TOKEN) == key
+
+
+@pytest.mark.parametrize(
+    "distant",
+    [
+        pytest.param({"price": PRICE * (1 + 4 * bot.DECISION_CACHE_PRICE_TOLERANCE)}, id="price"),
+        pytest.param(
+            {"balance": int(BALANCE * (1 + 4 * bot.DECISION_CACHE_AMOUNT_TOLERANCE))},
+            id="balance",
+        ),
+        pytest.param({"max_up_streak": 3}, id="streak"),
+    ],
+)
+def test_decision_cache_key_differs_beyond_tolerance(distant):
+    key = bot._decision_cache_key(_trade_context(), SELL_TOKEN)
+    assert bot._decision_cache_key(_trade_context(**distant), SELL_TOKEN) != key
+
+
+def test_decision_cache_key_depends_on_sell_token():
+    trade_ctx = _trade_context()
+    assert bot._decision_cache_key(trade_ctx, SELL_TOKEN) != bot._decision_cache_key(
+        trade_ctx, BUY_TOKEN
+    )
+
+
+def _response(reasoning: str = "Trend up") -> bot.AgentResponse:
+    return bot.AgentResponse(should_trade=True, buy_token=BUY_TOKEN, reasoning=reasoning)
+
+
+def test_decision_cache_entries_expire_after_ttl():
+    cache = bot.DecisionCache(ttl_blocks=10)
+    cache.put("key", 100, _response())
+
+    assert cache.get("key", 110) == _response()
+    # A hit does not extend the entry's lifetime
+    assert cache.get("key", 111) is None
+    assert "key" not in cache.entries
+    assert cache.stats() == {"decision_cache_hits": 1, "decision_cache_misses": 1}
+
+
+def test_decision_cache_evicts_least_recently_used():
+    cache = bot.DecisionCache(max_entries=2)
+    cache.put("a", 100, _response("a"))
+    cache.put("b", 100, _response("b"))
+    assert cache.get("a", 101) == _response("a")
+
+    cache.put("c", 102, _response("c"))
+
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.get("b", 102) is None
+
+
+class ScriptedModel(FunctionModel):
+    """Calls `tools` one after another, then answers with `response`; counts the agent runs"""
+
+    def __init__(self, response: bot.AgentResponse, tools: tuple[str, ...] = ()):
+        self.runs = 0
+
+        def respond(messages, info):
+            step = sum(isinstance(message, ModelResponse) for message in messages)
+            self.runs += step == 0
+            if step < len(tools):
+                return ModelResponse(parts=[ToolCallPart(tools[step], {})])
+            return ModelResponse(
+                parts=[ToolCallPart(info.result_tools[0].name, response.model_dump())]
+            )
+
+        super().__init__(respond)
+
+
+async def _stall(messages, info):
+    await asyncio.sleep(3600)
+
+
+@pytest.fixture
+def worker(db, monkeypatch):
+    """Worker state for deciding the default portfolio on a fixed trade context"""
+    portfolio = bot.Portfolio(name=bot.DEFAULT_PORTFOLIO_NAME)
+    # The bot's own state, set up by `bot_startup`
+    bot_state = TaskiqState()
+    bot_state.portfolios = {
+        portfolio.name: bot.PortfolioState(0, can_trade=True, sell_token=SELL_TOKEN)
+    }
+    monkeypatch.setattr(bot.bot, "state", bot_state, raising=False)
+    monkeypatch.setattr(bot, "_create_trade_context", lambda **kwargs: _trade_context())
+    orders = []
+    monkeypatch.setattr(
+        bot, "create_submit_and_sign_order", lambda **kwargs: orders.append(kwargs) or ("0x1", None)
+    )
+
+    state = TaskiqState()
+    state.portfolio = portfolio
+    state.orders = orders
+    state.agent = bot.trading_agent
+    state.decisions = {portfolio.name: bot._load_decisions_db()}
+    state.metrics_engine = bot.RollingMetricsEngine()
+    state.decision_cache = bot.DecisionCache()
+    return state
+
+
+def test_cached_decision_is_recorded_and_judged(worker):
+    model = ScriptedModel(_response())
+    with bot.trading_agent.override(model=model):
+        first = asyncio.run(bot._make_portfolio_decision(worker.portfolio, 100, worker))
+        second = asyncio.run(bot._make_portfolio_decision(worker.portfolio, 101, worker))
+
+    # The unchanged context is answered from the cache, without a model run
+    assert model.runs == 1
+    assert (first["cached"], second["cached"]) == (False, True)
+    assert second["should_trade"] and second["buy_token"] == BUY_TOKEN
+    assert len(worker.orders) == 2
+    assert worker.decision_cache.stats() == {"decision_cache_hits": 1, "decision_cache_misses": 1}
+
+    decisions_df = bot._update_latest_decision_outcome(
+        worker.decisions[worker.portfolio.name], final_price=PRICE * 1.1
+    )
+    stored = bot._load_decisions_db()
+    assert list(stored.cached) == [False, True]
+    # The cached decision is judged like any other, against the price it was made at
+    assert decisions_df.iloc[-1].profitable == stored.iloc[-1].profitable == 1
+
+
+def test_agent_run_counts_registered_tool_calls():
+    deps = bot.AgentDependencies(trade_ctx=_trade_context(), sell_token=SELL_TOKEN)
+    model = ScriptedModel(_response(), tools=("get_sell_token", "get_trading_context"))
+    with bot.trading_agent.override(model=model):
+        response, run_stats = asyncio.run(bot._run_agent(bot.trading_agent, deps))
+
+    assert response == _response()
+    # The final result is a tool call too, but not one of the agent's tools
+    assert run_stats.tool_calls == 2
+    assert run_stats.llm_requests == 3
+    assert not run_stats.timed_out
+
+
+def test_stalled_agent_falls_back_to_no_trade(worker, monkeypatch):
+    monkeypatch.setattr(bot, "_run_agent", functools.partial(bot._run_agent, deadline_seconds=0.2))
+    with bot.trading_agent.override(model=FunctionModel(_stall)):
+        result = asyncio.run(bot._make_portfolio_decision(worker.portfolio, 100, worker))
+
+    assert result["timed_out"] and not result["should_trade"]
+    assert result["llm_seconds"] < 5
+    assert worker.orders == []
+    # The fallback is recorded, but not cached for the next decision
+    (decision,) = bot._load_decisions_db().to_dict("records")
+    assert (decision["should_trade"], decision["cached"]) == (False, False)
+    (reasoning,) = bot._get_storage().load_reasoning()
+    assert reasoning["reasoning"] == "No decision within the 0.2s agent deadline"
+    assert reasoning["timed_out"]
+    assert worker.decision_cache.entries == {}
+
+
+def test_agent_is_offered_only_its_registered_tools():
+    offered = []
+
+    def respond(messages, info):
+        offered.extend(tool.name for tool in info.function_tools)
+        return ModelResponse(
+            parts=[ToolCallPart(info.result_tools[0].name, _response().model_dump())]
+        )
+
+    deps = bot.AgentDependencies(trade_ctx=_trade_context(), sell_token=SELL_TOKEN)
+    with bot.trading_agent.override(model=FunctionModel(respond)):
+        asyncio.run(bot._run_agent(bot.trading_agent, deps))
+
+    assert set(offered) == bot.TRADING_AGENT_TOOLS
+    # No chains are followed here, so the agent is not offered their metrics
+    assert not bot.FOLLOWED_CHAINS
+    assert "get_followed_chain_metrics" not in offered
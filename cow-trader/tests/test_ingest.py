@@ -0,0 +1,92 @@
+from types import SimpleNamespace
+
+import bot
+from benchmarks.synthetic import decode_trade_logs, generate_trade_logs, generate_trades
+
+
+def test_ingest_trade_leaves_token_universe_refresh_to_update_state(monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(bot.TOKEN_UNIVERSE, "refresh", refreshed.append)
+    state = SimpleNamespace(
+        live_trades=bot._LiveTradeBuffer(), metrics_engine=bot.RollingMetricsEngine()
+    )
+    context = SimpleNamespace(state=state)
+
+    for block_number, log in enumerate(
+        decode_trade_logs(generate_trade_logs(5, bot.MONITORED_TOKENS), bot.MONITORED_TOKENS),
+        start=100,
+    ):
+        log.block_number = block_number
+        log.block_hash = block_number.to_bytes(32, "big")
+        assert bot.ingest_trade(log, context)["message"] == "Trade ingested"
+
+    assert refreshed == []
+    assert sum(m.trade_count for m in state.metrics_engine.metrics()) == 5
+
+
+def test_one_live_writer_per_trade_store(db):
+    lock_file = bot._claim_live_writer()
+    assert (db / "trades" / bot.LIVE_WRITER_LOCK_FILENAME).read_text() == bot._worker_id()
+    # Further worker processes fall back to the catch-up path instead of failing
+    assert bot._claim_live_writer() is None
+    # A followed chain's trade store has a writer of its own
+    bot._claim_live_writer("chains/111").close()
+
+    lock_file.close()
+    bot._claim_live_writer().close()
+
+
+def test_live_readers_are_registered_while_open(db):
+    assert not bot._has_live_readers()
+    reader_lock = bot._register_live_reader()
+    assert bot._has_live_readers()
+    reader_lock.close()
+    assert not bot._has_live_readers()
+
+
+def test_flush_with_overlapping_buffers_stores_each_block_once(db):
+    trades = generate_trades(10, 3, start_block=100).to_dict("records")
+    live_trades = bot._LiveTradeBuffer()
+    live_trades.mark_seen(100)
+    for trade in trades[:5]:
+        live_trades.add(trade)
+    assert bot._flush_live_trades(live_trades, stop_block=104) == 5
+
+    # Blocks 102-104 arrive again, as late duplicates of already flushed events
+    for trade in trades[2:]:
+        live_trades.add(trade)
+    assert bot._flush_live_trades(live_trades, stop_block=109) == 5
+
+    segments = sorted(
+        (s["start_block"], s["stop_block"]) for s in bot._load_trade_manifest()["segments"]
+    )
+    assert segments == [(100, 104), (105, 109)]
+    assert list(bot._load_trades_db().block_number) == list(range(100, 110))
+
+
+def test_flush_fetches_range_while_live_readers_are_registered(
+    db, settlement, emit_trades, monkeypatch
+):
+    monkeypatch.setattr(bot, "GPV2_SETTLEMENT_CONTRACT", settlement)
+    block_numbers = emit_trades(generate_trade_logs(6, bot.MONITORED_TOKENS, seed=5))
+    trades = bot._fetch_trades_chunk(settlement, block_numbers[0], block_numbers[-1])
+
+    # This process was handed every other Trade event, another worker process the rest
+    live_trades = bot._LiveTradeBuffer()
+    metrics_engine = bot.RollingMetricsEngine()
+    live_trades.mark_seen(block_numbers[0])
+    for trade in trades.to_dict("records")[::2]:
+        live_trades.add(trade)
+        metrics_engine.update([trade])
+
+    reader_lock = bot._register_live_reader()
+    try:
+        flushed = bot._flush_live_trades(
+            live_trades, stop_block=block_numbers[-1], metrics_engine=metrics_engine
+        )
+    finally:
+        reader_lock.close()
+
+    assert flushed == len(trades) == 6
+    assert len(bot._load_trades_db()) == 6
+    assert sum(m.trade_count for m in metrics_engine.metrics()) == 6
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import bot
+from benchmarks.metrics import _compute_metrics_loop, check_parity
+from benchmarks.synthetic import generate_trades, token_addresses
+
+TOKENS = token_addresses(4)
+
+
+def _trades(rows: list[tuple[int, int, int, float]]) -> pd.DataFrame:
+    """Trades from (block, token_a index, token_b index, price) rows"""
+    return pd.DataFrame(
+        {
+            "block_number": [row[0] for row in rows],
+            "token_a": [TOKENS[row[1]] for row in rows],
+            "token_b": [TOKENS[row[2]] for row in rows],
+            "price": [row[3] for row in rows],
+            "buyAmount": [1e18] * len(rows),
+            "sellAmount": [2e18] * len(rows),
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        pytest.param([(10, 0, 1, 1.5)], id="single trade"),
+        pytest.param([(10, 0, 1, 1.5), (11, 1, 2, 2.0)], id="single-trade pairs"),
+        pytest.param(
+            [(10, 0, 1, 1.5), (11, 1, 2, 2.0), (12, 1, 2, 2.5)], id="single-trade pair among others"
+        ),
+        pytest.param([(10, 0, 1, 3.0), (11, 0, 1, 3.0), (12, 0, 1, 3.0)], id="constant price"),
+        pytest.param(
+            [(10, 0, 1, 1.0), (11, 0, 1, 2.0), (12, 0, 1, 2.0), (13, 0, 1, 1.0)], id="flat move"
+        ),
+        pytest.param([(10, 0, 1, 1.0), (11, 0, 1, 2.0), (12, 0, 1, 3.0)], id="single run"),
+        pytest.param([(10, 0, 1, np.nan), (11, 1, 2, 2.0)], id="missing price"),
+    ],
+)
+def test_compute_metrics_edge_cases(rows):
+    df = _trades(rows)
+    check_parity(_compute_metrics_loop(df, 100), bot._compute_metrics(df, 100))
+
+
+def test_compute_metrics_empty_window():
+    assert bot._compute_metrics(_trades([]), 100) == []
+    assert bot._compute_metrics(_trades([(10, 0, 1, np.nan)]), 100) == []
+
+
+def test_compute_metrics_single_trade_pair_metrics():
+    (metrics,) = bot._compute_metrics(_trades([(10, 0, 1, 1.5)]), 100)
+    assert metrics.trade_count == 1
+    assert metrics.up_moves_ratio == 0.5
+    assert (metrics.max_up_streak, metrics.max_down_streak) == (0, 0)
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("n_tokens", [2, 5, 12])
+def test_compute_metrics_matches_reference(seed, n_tokens):
+    rng = np.random.default_rng(seed)
+    df = generate_trades(int(rng.integers(1, 400)), n_tokens, int(rng.integers(1, 4)), seed=seed)
+    # Repeated prices exercise flat moves and constant-price pairs
+    df["price"] = np.round(df.price, 0)
+    lookback_blocks = int(rng.integers(0, 200))
+    check_parity(
+        _compute_metrics_loop(df, lookback_blocks), bot._compute_metrics(df, lookback_blocks)
+    )
+
+
+def test_rolling_metrics_engine_matches_compute_metrics():
+    df = generate_trades(2000, 6, 2)
+    engine = bot.RollingMetricsEngine(lookback_blocks=150)
+    records = df.to_dict("records")
+    for start in range(0, len(records), 64):
+        engine.update(records[start : start + 64])
+    # The engine sums volumes exactly and `_compute_metrics` as floats, so `check_parity`
+    # compares volumes with a relative tolerance of 1e-9; every other field must match exactly
+    check_parity(bot._compute_metrics(df, 150), engine.metrics())
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_rolling_metrics_engine_inserts_late_trades(seed):
+    rng = np.random.default_rng(seed)
+    df = generate_trades(1500, 4, 3, seed=seed)
+    df["price"] = np.round(df.price, 0)
+    # A fifth of the trades arrive up to 30 trades late, after trades of later blocks
+    delays = rng.integers(1, 30, len(df)) * (rng.random(len(df)) < 0.2)
+    arrived = df.iloc[np.argsort(np.arange(len(df)) + delays, kind="stable")]
+
+    engine = bot.RollingMetricsEngine(lookback_blocks=int(rng.integers(20, 300)))
+    records = arrived.to_dict("records")
+    for start in range(0, len(records), 16):
+        engine.update(records[start : start + 16])
+
+    # Trades of one block stay in arrival order
+    expected = arrived.sort_values("block_number", kind="stable")
+    check_parity(bot._compute_metrics(expected, engine.lookback_blocks), engine.metrics())
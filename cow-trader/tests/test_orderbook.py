@@ -0,0 +1,308 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import bot
+from benchmarks.synthetic import generate_trade_logs
+
+OWNER = f"0x{0xF001:040x}"
+
+
+class StubOrderbook(ThreadingHTTPServer):
+    """Local orderbook API answering each request with the next queued (status, body)"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubOrderbookHandler)
+        self.responses: list[tuple[int, object]] = []
+        self.requests: list[str] = []
+        self.delay_seconds = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v1"
+
+
+class StubOrderbookHandler(BaseHTTPRequestHandler):
+    def _respond(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(f"{self.command} {self.path}")
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            status, body = server.responses.pop(0) if server.responses else (200, {})
+        threading.Event().wait(server.delay_seconds)
+        with server.lock:
+            server.in_flight -= 1
+
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def orderbook():
+    server = StubOrderbook()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(orderbook):
+    client = bot.CowOrderbookClient(base_url=orderbook.url, backoff_seconds=0.001, pool_size=4)
+    yield client
+    client.close()
+
+
+def test_async_requests_bounded_by_pool_size(orderbook, client):
+    orderbook.delay_seconds = 0.05
+
+    async def fan_out():
+        return await asyncio.gather(*(client.get_quote_async({"i": i}) for i in range(20)))
+
+    assert len(asyncio.run(fan_out())) == 20
+    assert len(orderbook.requests) == 20
+    assert orderbook.max_in_flight <= client.pool_size
+
+
+@pytest.mark.parametrize("status", sorted(bot.API_RETRY_STATUS_CODES))
+def test_quote_retried_on_429_and_5xx(orderbook, client, status):
+    orderbook.responses = [(status, {}), (status, {}), (200, {"quote": {"sellAmount": "1"}})]
+
+    assert client.get_quote({}) == {"quote": {"sellAmount": "1"}}
+    assert orderbook.requests == ["POST /api/v1/quote"] * 3
+    assert client.stats()["quote"]["retries"] == 2
+    assert client.stats()["quote"]["errors"] == 0
+
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+def test_quote_gives_up_on_4xx(orderbook, client, status):
+    orderbook.responses = [(status, {"errorType": "Bad"}), (200, {})]
+
+    with pytest.raises(requests.HTTPError):
+        client.get_quote({})
+    assert len(orderbook.requests) == 1
+    assert client.stats()["quote"]["retries"] == 0
+    assert client.stats()["quote"]["errors"] == 1
+
+
+def test_quote_gives_up_after_max_retries(orderbook, client):
+    orderbook.responses = [(503, {})] * (client.max_retries + 2)
+
+    with pytest.raises(requests.HTTPError):
+        client.get_quote({})
+    assert len(orderbook.requests) == client.max_retries + 1
+
+
+def test_order_submission_retried_only_on_429(orderbook, client):
+    orderbook.responses = [(429, {}), (200, "0xabc")]
+    assert client.submit_order({}) == "0xabc"
+    assert len(orderbook.requests) == 2
+
+    orderbook.requests.clear()
+    orderbook.responses = [(500, {"errorType": "InternalError", "description": "boom"})]
+    with pytest.raises(Exception, match="InternalError - boom"):
+        client.submit_order({})
+    assert len(orderbook.requests) == 1
+
+
+def test_backoff_is_jittered_exponential(orderbook, client, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(bot.time, "sleep", sleeps.append)
+    orderbook.responses = [(503, {}), (503, {}), (503, {}), (200, {})]
+
+    client.get_quote({})
+
+    assert len(sleeps) == 3
+    for attempt, delay in enumerate(sleeps):
+        backoff = client.backoff_seconds * 2**attempt
+        assert backoff / 2 <= delay <= backoff
+
+
+def _track_orders(tracker, valid_tos: dict[str, int], block_number: int = 1) -> None:
+    """Store and track sell orders of 10**18 with the given UIDs and expiries"""
+    for uid, valid_to in valid_tos.items():
+        payload = {
+            "sellToken": bot.MONITORED_TOKENS[0],
+            "buyToken": bot.MONITORED_TOKENS[1],
+            "receiver": OWNER,
+            "sellAmount": str(10**18),
+            "buyAmount": str(10**18),
+            "validTo": valid_to,
+        }
+        tracker.track(bot._save_order(uid, payload, signed=True, block_number=block_number))
+
+
+def _remote(uid: str, status: str, executed_sell: int = 0) -> dict:
+    return {
+        "uid": uid,
+        "status": status,
+        "executedSellAmount": str(executed_sell),
+        "executedBuyAmount": str(executed_sell),
+    }
+
+
+def _stored_orders() -> dict[str, dict]:
+    return {order["orderUid"]: order for order in bot._load_orders_db().to_dict("records")}
+
+
+def test_order_tracker_polls_all_open_orders_page_by_page(db, orderbook, client, monkeypatch):
+    monkeypatch.setattr(bot, "ORDER_POLL_PAGE_SIZE", 2)
+    tracker = bot.OrderTracker(client=client, owner=OWNER)
+    _track_orders(tracker, {"0xa": 5000, "0xb": 5000, "0xc": 5000, "0xd": 900})
+    orderbook.responses = [
+        (200, [_remote("0xother", "fulfilled"), _remote("0xa", "fulfilled", 10**18)]),
+        (200, [_remote("0xb", "open", 10**17), _remote("0xother2", "expired")]),
+        (200, [_remote("0xc", "cancelled")]),
+    ]
+
+    assert tracker.poll(block_number=10, now=1000) == {"order_transitions": 3}
+
+    # One request per page, stopping at the short page; 0xd was not listed and has expired
+    path = f"GET /api/v1/account/{OWNER}/orders"
+    assert orderbook.requests == [
+        f"{path}?offset=0&limit=2",
+        f"{path}?offset=2&limit=2",
+        f"{path}?offset=4&limit=2",
+    ]
+    assert set(tracker.open_orders()) == {"0xb"}
+    stored = _stored_orders()
+    assert {uid: order["status"] for uid, order in stored.items()} == {
+        "0xa": "fulfilled",
+        "0xb": "open",
+        "0xc": "cancelled",
+        "0xd": "expired",
+    }
+    assert stored["0xb"]["executedSellAmount"] == str(10**17)
+    assert (tracker.polls, tracker.fallback_polls, tracker.transitions) == (1, 0, 3)
+
+
+def test_order_tracker_stops_paging_once_every_open_order_is_found(
+    db, orderbook, client, monkeypatch
+):
+    monkeypatch.setattr(bot, "ORDER_POLL_PAGE_SIZE", 2)
+    tracker = bot.OrderTracker(client=client, owner=OWNER)
+    _track_orders(tracker, {"0xa": 5000})
+    orderbook.responses = [(200, [_remote("0xother", "open"), _remote("0xa", "open")])]
+
+    assert tracker.poll(block_number=10, now=1000) == {"order_transitions": 0}
+    assert len(orderbook.requests) == 1
+    assert set(tracker.open_orders()) == {"0xa"}
+
+
+@pytest.mark.parametrize(
+    "valid_tos, interval",
+    [
+        pytest.param({}, 300, id="no open orders"),
+        pytest.param({"0xa": 1000 + 4000}, 300, id="capped at the maximum"),
+        pytest.param({"0xa": 1000 + 4000, "0xb": 1000 + 400}, 100, id="nearest expiry"),
+        pytest.param({"0xa": 1000 + 20}, 15, id="floored at the minimum"),
+        pytest.param({"0xa": 1000 - 20}, 15, id="already expired"),
+    ],
+)
+def test_order_tracker_interval_follows_nearest_expiry(db, valid_tos, interval):
+    tracker = bot.OrderTracker(owner=OWNER, min_interval=15, max_interval=300)
+    _track_orders(tracker, valid_tos)
+
+    assert tracker._interval(tracker.open_orders().values(), 1000) == interval
+
+
+def test_order_tracker_polls_sooner_as_orders_near_expiry(db, orderbook, client):
+    tracker = bot.OrderTracker(client=client, owner=OWNER, min_interval=15, max_interval=300)
+    _track_orders(tracker, {"0xa": 1400})
+    assert tracker.due(now=1000)
+
+    orderbook.responses = [(200, [_remote("0xa", "open")])] * 2
+    tracker.poll(block_number=10, now=1000)
+    assert tracker.next_poll_at == 1100
+    assert not tracker.due(now=1099)
+    assert tracker.due(now=1100)
+
+    tracker.poll(block_number=11, now=1360)
+    assert tracker.next_poll_at == 1360 + 15
+
+
+def test_order_tracker_matches_trade_logs_when_the_api_is_down(
+    db, orderbook, client, settlement, emit_trades, chain, monkeypatch
+):
+    monkeypatch.setattr(bot, "GPV2_SETTLEMENT_CONTRACT", settlement)
+    filled_uid, partial_uid = ("0x" + suffix.rjust(112, "0") for suffix in ("0a", "0b"))
+    other_owner = f"0x{0xF002:040x}"
+    fills = [
+        (OWNER, filled_uid, 6 * 10**17),
+        (OWNER, partial_uid, 3 * 10**17),
+        (OWNER, filled_uid, 4 * 10**17),
+        # Another owner's trade is not ours, even with the same UID
+        (other_owner, partial_uid, 7 * 10**17),
+    ]
+    raw_logs = generate_trade_logs(len(fills), bot.MONITORED_TOKENS, seed=7)
+    for log, (owner, uid, sell_amount) in zip(raw_logs, fills):
+        log["topics"][1] = bytes(12) + bytes.fromhex(owner[2:])
+        log["data"] = (
+            log["data"][:64] + sell_amount.to_bytes(32, "big") + log["data"][96:-56]
+        ) + bytes.fromhex(uid[2:])
+
+    tracker = bot.OrderTracker(client=client, owner=OWNER)
+    _track_orders(
+        tracker,
+        {filled_uid: 5000, partial_uid: 5000, "0xc": 900},
+        block_number=chain.blocks.head.number + 1,
+    )
+    block_numbers = emit_trades(raw_logs)
+    orderbook.responses = [(503, {})] * (client.max_retries + 1)
+
+    assert tracker.poll(block_number=block_numbers[-1], now=1000) == {"order_transitions": 2}
+
+    assert (tracker.polls, tracker.fallback_polls) == (0, 1)
+    assert set(tracker.open_orders()) == {partial_uid}
+    stored = _stored_orders()
+    assert {uid: order["status"] for uid, order in stored.items()} == {
+        filled_uid: "fulfilled",
+        partial_uid: "open",
+        "0xc": "expired",
+    }
+    assert stored[filled_uid]["executedSellAmount"] == str(10**18)
+    assert stored[partial_uid]["executedSellAmount"] == str(3 * 10**17)
+
+
+def test_order_tracker_persists_recorded_trades(db):
+    tracker = bot.OrderTracker(owner=OWNER)
+    _track_orders(tracker, {"0xa": 5000})
+
+    tracker.record_trade("0xa", 4 * 10**17, 5 * 10**17)
+    tracker.record_trade("0xunknown", 10**18, 10**18)
+    assert tracker.transitions == 0
+    # A restarted tracker resumes from the stored partial fill
+    tracker = bot.OrderTracker(owner=OWNER)
+    assert tracker.open_orders()["0xa"]["executedSellAmount"] == str(4 * 10**17)
+
+    tracker.record_trade("0xa", 6 * 10**17, 5 * 10**17)
+    assert tracker.transitions == 1
+    assert tracker.open_orders() == {}
+    stored = _stored_orders()["0xa"]
+    assert stored["status"] == "fulfilled"
+    assert (stored["executedSellAmount"], stored["executedBuyAmount"]) == (
+        str(10**18),
+        str(10**18),
+    )
+    assert bot.OrderTracker(owner=OWNER).open_orders() == {}
@@ -0,0 +1,181 @@
+import pandas as pd
+import pytest
+
+import bot
+from benchmarks.metrics import check_parity
+from benchmarks.synthetic import generate_trade_logs, generate_trades
+
+
+class LiveIngestion:
+    """Drives the live buffer and metrics engine the way `ingest_trade` and `update_state` do"""
+
+    def __init__(self, chain, settlement):
+        self.chain = chain
+        self.settlement = settlement
+        self.live_trades = bot._LiveTradeBuffer()
+        self.metrics_engine = bot.RollingMetricsEngine(lookback_blocks=10_000)
+        self.ingested_block = chain.blocks.head.number
+
+    def ingest(self) -> int | None:
+        """Ingest the Trade events and heads since the last call; returns a detected fork block"""
+        head = self.chain.blocks.head
+        start_block = self.ingested_block + 1
+        self.live_trades.mark_seen(start_block)
+        trades = bot._fetch_trades_chunk(self.settlement, start_block, head.number)
+        for trade in trades.to_dict("records"):
+            block_hash = bot._as_bytes(self.chain.blocks[trade["block_number"]].hash)
+            if self.live_trades.add(trade, block_hash):
+                self.metrics_engine.update([trade])
+        self.ingested_block = head.number
+        return bot._find_fork_block(self.live_trades, head)
+
+
+def _trade_keys(trades: pd.DataFrame) -> list[tuple]:
+    return sorted(
+        zip(trades.block_number.astype(int), trades.owner.astype(str).str.lower(), trades.price)
+    )
+
+
+@pytest.fixture
+def monitored_logs():
+    return lambda n_trades, seed: generate_trade_logs(n_trades, bot.MONITORED_TOKENS, seed=seed)
+
+
+def test_resync_after_reorg(db, chain, settlement, emit_trades, monitored_logs, monkeypatch):
+    monkeypatch.setattr(bot, "GPV2_SETTLEMENT_CONTRACT", settlement)
+    ingestion = LiveIngestion(chain, settlement)
+    live_trades = ingestion.live_trades
+
+    kept_blocks = emit_trades(monitored_logs(6, seed=1))
+    assert ingestion.ingest() is None
+    snapshot = chain.snapshot()
+
+    orphaned_blocks = emit_trades(monitored_logs(6, seed=2))
+    orphaned_hash = bot._as_bytes(chain.blocks[orphaned_blocks[-1]].hash)
+    assert ingestion.ingest() is None
+    # The reorg reaches into blocks already flushed to the trade store
+    assert bot._flush_live_trades(live_trades, stop_block=orphaned_blocks[2]) == 9
+    orphaned_trades = bot._fetch_trades_chunk(settlement, orphaned_blocks[0], orphaned_blocks[-1])
+
+    chain.restore(snapshot)
+    canonical_blocks = emit_trades(monitored_logs(8, seed=3))
+    fork_block = ingestion.ingest()
+    assert fork_block == orphaned_blocks[0] == canonical_blocks[0]
+
+    head_block = chain.blocks.head.number
+    resynced = bot._resync_after_reorg(
+        live_trades, ingestion.metrics_engine, bot.TradeCache(), fork_block, head_block
+    )
+    assert resynced == 8
+
+    # Late events from the orphaned blocks are rejected, as are re-fetched canonical blocks
+    orphaned_trade = orphaned_trades.to_dict("records")[-1]
+    assert not live_trades.add(orphaned_trade, orphaned_hash)
+    assert not live_trades.add({**orphaned_trade, "block_number": canonical_blocks[-1]})
+
+    assert live_trades.flushed_block == fork_block - 1
+    bot._flush_live_trades(live_trades, stop_block=head_block)
+    expected = bot._fetch_trades_chunk(settlement, kept_blocks[0], head_block)
+    stored = bot._load_trades_db()
+    assert _trade_keys(stored) == _trade_keys(expected)
+    assert not set(_trade_keys(orphaned_trades)) & set(_trade_keys(stored))
+    assert bot._missing_block_ranges(kept_blocks[0], head_block) == []
+
+    engine_metrics = {(m.token_a, m.token_b): m for m in ingestion.metrics_engine.metrics()}
+    for metrics in bot._compute_metrics(expected, lookback_blocks=10_000):
+        assert engine_metrics[(metrics.token_a, metrics.token_b)].trade_count == metrics.trade_count
+    assert sum(m.trade_count for m in engine_metrics.values()) == len(expected)
+
+
+def test_find_fork_block_without_reorg(chain, mine):
+    live_trades = bot._LiveTradeBuffer()
+    assert bot._find_fork_block(live_trades, chain.blocks.head) is None
+    mine(3)
+    # Skipped blocks are recorded so their parent hashes chain up to the new head
+    head = chain.blocks.head
+    assert bot._find_fork_block(live_trades, head) is None
+    assert set(range(head.number - 3, head.number + 1)) <= set(live_trades.block_hashes)
+
+
+def _stored_rows(trades: pd.DataFrame) -> list[tuple]:
+    return list(zip(trades.block_number, trades.price))
+
+
+@pytest.mark.parametrize(
+    "from_block",
+    [
+        pytest.param(130, id="within a cold partition"),
+        pytest.param(200, id="at a cold partition boundary"),
+        pytest.param(251, id="at the hot/cold boundary"),
+        pytest.param(330, id="within the hot segments"),
+    ],
+)
+def test_rollback_across_hot_and_cold_trades(db, monkeypatch, from_block):
+    trades = generate_trades(400, 3, start_block=1)
+    for start in range(1, 401, 50):
+        segment = trades[trades.block_number.between(start, start + 49)]
+        bot._append_trades_segment(segment, start_block=start, stop_block=start + 49)
+    # Blocks 1-250 move to cold partitions of blocks 1-99, 100-199 and 200-250
+    assert bot._archive_trade_store(retention_blocks=100, partition_blocks=100) == 250
+    manifest = bot._load_trade_manifest()
+    assert [(p["start_block"], p["stop_block"]) for p in manifest["cold"]] == [
+        (1, 99),
+        (100, 199),
+        (200, 250),
+    ]
+    trade_cache = bot.TradeCache()
+    trade_cache.refresh()
+
+    with monkeypatch.context() as m:
+        m.setattr(bot, "_worker_id", lambda: "other-host:1")
+        bot._rollback_trade_store(from_block)
+
+    surviving = trades[trades.block_number < from_block]
+    assert _stored_rows(bot._load_trades_db()) == _stored_rows(surviving)
+    assert _stored_rows(bot._load_trades_db(start_block=from_block - 60)) == _stored_rows(
+        surviving[surviving.block_number >= from_block - 60]
+    )
+    assert _stored_rows(bot._load_lookback_trades(lookback_blocks=60)) == _stored_rows(
+        surviving[surviving.block_number >= from_block - 61]
+    )
+    assert bot._last_trade_block() == bot._trade_store_cursor() == from_block - 1
+    assert bot._missing_block_ranges(1, 400) == [(from_block, 400)]
+    # Worker caches only map the hot segments
+    assert trade_cache.refresh().rollback_block == from_block
+    hot = surviving[surviving.block_number > 250]
+    assert _stored_rows(bot._trades_frame(trade_cache.table())) == _stored_rows(hot)
+
+    manifest = bot._load_trade_manifest()
+    assert all(partition["stop_block"] < from_block for partition in manifest["cold"])
+    cold_files = {p.name for p in (db / "trades" / bot.TRADE_COLD_DIRNAME).iterdir()}
+    assert cold_files == {partition["file"].split("/")[-1] for partition in manifest["cold"]}
+
+    # The refetched range is stored after the surviving trades
+    canonical = generate_trades(401 - from_block, 3, start_block=from_block, seed=1)
+    bot._append_trades_segment(canonical, start_block=from_block, stop_block=400)
+    assert _stored_rows(bot._load_trades_db()) == _stored_rows(pd.concat([surviving, canonical]))
+
+
+def test_rollback_reloads_evicted_trades_into_metrics_engine(db, monkeypatch):
+    trades = generate_trades(667, 4, start_block=1)
+    for start in range(1, 668, 100):
+        segment = trades[trades.block_number.between(start, start + 99)]
+        bot._append_trades_segment(
+            segment, start_block=start, stop_block=min(start + 99, 667), writer="other-host:1"
+        )
+    trade_cache = bot.TradeCache()
+    trade_cache.refresh()
+    metrics_engine = bot.RollingMetricsEngine(lookback_blocks=200)
+    metrics_engine.update(bot._trades_frame(trade_cache.table()))
+    assert sum(m.trade_count for m in metrics_engine.metrics()) < len(trades)
+
+    # Another worker process rolls the store back past the engine's evicted trades
+    with monkeypatch.context() as m:
+        m.setattr(bot, "_worker_id", lambda: "other-host:1")
+        bot._rollback_trade_store(500)
+    update = bot._refresh_trade_cache(trade_cache, metrics_engine)
+    assert update.rollback_block == 500
+
+    surviving = trades[trades.block_number < 500]
+    check_parity(bot._compute_metrics(surviving, 200), metrics_engine.metrics())
+    assert metrics_engine.latest_block == 499
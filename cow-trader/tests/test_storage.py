@@ -0,0 +1,38 @@
+import pytest
+
+import bot
+
+
+def _order(order_uid: str, block_number: int) -> dict:
+    return {
+        "orderUid": order_uid,
+        "signed": True,
+        "sellToken": bot.GNO,
+        "buyToken": bot.COW,
+        "receiver": bot.SAFE_ADDRESS,
+        "sellAmount": "1000",
+        "buyAmount": "2000",
+        "validTo": 1_800_000_000,
+        "block_number": block_number,
+    }
+
+
+@pytest.mark.parametrize("backend", ["csv", "sqlite"])
+def test_load_decision_order(db, monkeypatch, backend):
+    monkeypatch.setattr(bot, "STORAGE_BACKEND", backend)
+    for order_uid, block_number in (("0x01", 100), ("0x02", 200), ("0x03", 200)):
+        bot._get_storage().insert_order(_order(order_uid, block_number))
+
+    assert bot._load_decision_order(100)["orderUid"] == "0x01"
+    assert bot._load_decision_order(200)["orderUid"] == "0x03"
+    assert bot._load_decision_order(300) is None
+    assert list(bot._load_orders_db(block_number=200).orderUid) == ["0x02", "0x03"]
+    assert len(bot._load_orders_db()) == 3
+
+
+def test_orders_block_number_index(db):
+    storage = bot._get_storage()
+    plan = storage.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM orders WHERE block_number = ?", (100,)
+    ).fetchall()
+    assert any("orders_block" in row[-1] for row in plan)
@@ -0,0 +1,110 @@
+import threading
+
+import pandas as pd
+import pyarrow as pa
+
+import bot
+from benchmarks.synthetic import generate_trades
+
+OTHER_WRITER = "other-host:1"
+
+
+def _append(trades: pd.DataFrame, start_block: int, stop_block: int, writer=OTHER_WRITER):
+    segment = trades[trades.block_number.between(start_block, stop_block)]
+    bot._append_trades_segment(segment, start_block, stop_block, writer=writer)
+
+
+def _rows(trades: pd.DataFrame | pa.Table) -> list[tuple]:
+    df = bot._trades_frame(trades) if isinstance(trades, pa.Table) else trades
+    return list(zip(df.block_number, df.owner.astype(str).str.lower(), df.price))
+
+
+def test_trade_cache_picks_up_new_segments(db):
+    trades = generate_trades(300, 3, start_block=1)
+    cache = bot.TradeCache()
+    assert cache.refresh().rows.num_rows == 0
+
+    for start in (1, 101):
+        _append(trades, start, start + 99)
+    update = cache.refresh()
+    assert (update.segments, update.rollback_block) == (2, None)
+    assert _rows(update.rows) == _rows(cache.table()) == _rows(trades[trades.block_number <= 200])
+
+    # Only segments written since are read, and this process's own writes are not returned
+    _append(trades, 201, 250)
+    _append(trades, 251, 300, writer=bot._worker_id())
+    update = cache.refresh()
+    assert update.segments == 2
+    assert _rows(update.rows) == _rows(trades[trades.block_number.between(201, 250)])
+    assert _rows(cache.table()) == _rows(trades)
+    assert _rows(cache.table(start_block=251)) == _rows(trades[trades.block_number >= 251])
+
+    update = cache.refresh()
+    assert (update.segments, update.rows.num_rows) == (0, 0)
+
+
+def test_trade_cache_is_stable_while_a_writer_appends(db):
+    trades = generate_trades(2000, 3, trades_per_block=2, start_block=1)
+    # Row counts of the store after each appended segment
+    boundaries = {0} | {int((trades.block_number <= stop).sum()) for stop in range(25, 1001, 25)}
+
+    def write():
+        for start in range(1, 1001, 25):
+            _append(trades, start, start + 24)
+
+    writer = threading.Thread(target=write)
+    cache = bot.TradeCache()
+    seen, views = [], []
+    writer.start()
+    while writer.is_alive() or not views or len(seen) < len(trades):
+        update = cache.refresh()
+        seen += _rows(update.rows)
+        views.append(cache.table())
+    writer.join()
+
+    # Every refresh sees whole segments in block order, and each row is returned once
+    for view in views:
+        blocks = view["block_number"].to_pylist()
+        assert blocks == sorted(blocks)
+        assert len(blocks) in boundaries
+        assert _rows(view) == _rows(trades.head(len(blocks)))
+    assert seen == _rows(trades)
+
+
+def test_trade_cache_replays_rollbacks_and_trimmed_segments(db, monkeypatch):
+    trades = generate_trades(400, 3, start_block=1)
+    for start in range(1, 401, 100):
+        _append(trades, start, start + 99)
+    cache = bot.TradeCache()
+    cache.refresh()
+    earlier_view = cache.table()
+
+    # Another process rolls back into the third segment, which is rewritten with its earlier rows
+    with monkeypatch.context() as m:
+        m.setattr(bot, "_worker_id", lambda: OTHER_WRITER)
+        bot._rollback_trade_store(250)
+    update = cache.refresh()
+    assert update.rollback_block == 250
+    assert update.segments == 1
+    # The trimmed segment's rows are not new to this worker
+    assert update.rows.num_rows == 0
+    surviving = trades[trades.block_number < 250]
+    assert _rows(cache.table()) == _rows(surviving)
+    # Tables handed out earlier stay readable
+    assert _rows(earlier_view) == _rows(trades)
+
+    # The range is refetched with the canonical trades
+    canonical = generate_trades(151, 3, start_block=250, seed=1)
+    _append(canonical, 250, 400)
+    update = cache.refresh()
+    assert update.rollback_block is None
+    assert _rows(update.rows) == _rows(canonical)
+    assert _rows(cache.table()) == _rows(pd.concat([surviving, canonical]))
+
+    # A rollback of this process's own is already known to it
+    bot._rollback_trade_store(300)
+    update = cache.refresh()
+    assert update.rollback_block is None
+    assert _rows(cache.table()) == _rows(
+        pd.concat([surviving, canonical[canonical.block_number < 300]])
+    )